@@ -0,0 +1,11 @@
+# =============================================================================
+# FILE: benchmarks/__init__.py
+# DESCRIPTION: Benchmarks package initialization
+# LOCATION: benchmarks/__init__.py
+# PURPOSE: Performance benchmarks for database operations and handlers
+# =============================================================================
+
+"""
+Performance benchmarks for the Telegram School Bot.
+Run each module directly, e.g. python -m benchmarks.bench_class_attendance
+"""
@@ -0,0 +1,172 @@
+# =============================================================================
+# FILE: benchmarks/bench_class_attendance.py
+# DESCRIPTION: Benchmark for get_class_attendance (per-user loop vs. one join)
+# LOCATION: benchmarks/bench_class_attendance.py
+# PURPOSE: Report query count and latency for classes of 10, 100 and 1,000
+# USAGE: python -m benchmarks.bench_class_attendance [--url DATABASE_URL]
+# =============================================================================
+
+"""
+Benchmark for loading a class roster together with one day's attendance.
+
+Compares the previous implementation (one SELECT on Attendance per member)
+with the set-based get_class_attendance. Runs against an in-memory SQLite
+database by default; pass --url to run against PostgreSQL, e.g.
+
+    python -m benchmarks.bench_class_attendance --url postgresql://user:pw@localhost/school_bot
+
+All rows created by the benchmark are removed again when it finishes.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+CLASS_SIZES = (10, 100, 1000)
+ATTENDANCE_DATE = "2025-10-25"  # A Saturday
+REPEATS = 20
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--url",
+        default="sqlite:///:memory:",
+        help="Database URL to benchmark against (default: in-memory SQLite)",
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=REPEATS, help="Runs per class size"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # config.py reads the environment at import time
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("BOT_API", "benchmark")
+
+    from datetime import datetime
+
+    from sqlalchemy import and_, event
+
+    from database import Attendance, Class, User, engine, get_db, init_db
+    from database.operations import get_class_attendance
+
+    init_db()
+
+    query_count = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_queries(conn, cursor, statement, parameters, context, executemany):
+        query_count[0] += 1
+
+    def legacy_get_class_attendance(class_id, attendance_date):
+        """Previous implementation: roster query plus one query per member."""
+        date_obj = datetime.strptime(attendance_date, "%Y-%m-%d").date()
+        with get_db() as db:
+            users = db.query(User).filter_by(class_id=class_id).all()
+            result = []
+            for user in users:
+                attendance = (
+                    db.query(Attendance)
+                    .filter(
+                        and_(
+                            Attendance.user_id == user.id,
+                            Attendance.class_id == class_id,
+                            Attendance.date == date_obj,
+                        )
+                    )
+                    .first()
+                )
+                db.expunge(user)
+                if attendance:
+                    db.expunge(attendance)
+                result.append((user, attendance))
+            return result
+
+    def seed_class(size):
+        """Create a class with `size` members, half of them already marked."""
+        date_obj = datetime.strptime(ATTENDANCE_DATE, "%Y-%m-%d").date()
+        with get_db() as db:
+            class_obj = Class(name=f"Benchmark {size}")
+            db.add(class_obj)
+            db.flush()
+
+            # Negative telegram IDs never collide with real Telegram users
+            base_id = -(size * 10_000)
+            users = [
+                User(
+                    telegram_id=base_id - i,
+                    name=f"Bench Student {i}",
+                    role=1,
+                    class_id=class_obj.id,
+                )
+                for i in range(size)
+            ]
+            db.add_all(users)
+            db.flush()
+
+            db.add_all(
+                Attendance(
+                    user_id=user.id,
+                    class_id=class_obj.id,
+                    date=date_obj,
+                    status=i % 3 != 0,
+                    marked_by=users[0].id,
+                )
+                for i, user in enumerate(users)
+                if i % 2 == 0
+            )
+            return class_obj.id
+
+    def cleanup_class(class_id):
+        with get_db() as db:
+            db.query(Attendance).filter_by(class_id=class_id).delete()
+            db.query(User).filter_by(class_id=class_id).delete()
+            db.query(Class).filter_by(id=class_id).delete()
+
+    def measure(func, class_id):
+        query_count[0] = 0
+        func(class_id, ATTENDANCE_DATE)
+        queries = query_count[0]
+
+        started = time.perf_counter()
+        for _ in range(args.repeats):
+            func(class_id, ATTENDANCE_DATE)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / args.repeats
+        return queries, elapsed_ms
+
+    print(f"Database: {engine.dialect.name} ({args.url.split('@')[-1]})")
+    print(f"Runs per measurement: {args.repeats}\n")
+    print(f"{'members':>8} | {'impl':<10} | {'queries':>7} | {'avg ms':>9}")
+    print("-" * 45)
+
+    for size in CLASS_SIZES:
+        class_id = seed_class(size)
+        try:
+            legacy = legacy_get_class_attendance(class_id, ATTENDANCE_DATE)
+            current = get_class_attendance(class_id, ATTENDANCE_DATE)
+            assert [(u.id, a and a.id) for u, a in legacy] == [
+                (u.id, a and a.id) for u, a in current
+            ], "Implementations disagree"
+
+            for label, func in (
+                ("per-user", legacy_get_class_attendance),
+                ("join", get_class_attendance),
+            ):
+                queries, elapsed_ms = measure(func, class_id)
+                print(f"{size:>8} | {label:<10} | {queries:>7} | {elapsed_ms:>9.2f}")
+        finally:
+            cleanup_class(class_id)
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
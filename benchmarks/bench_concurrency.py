@@ -0,0 +1,184 @@
+# =============================================================================
+# FILE: benchmarks/bench_concurrency.py
+# DESCRIPTION: Throughput benchmark for concurrent update handling
+# LOCATION: benchmarks/bench_concurrency.py
+# PURPOSE: Report updates per second for 1 vs. several updates in flight,
+#          to pick CONCURRENT_UPDATES for a database
+# USAGE: python -m benchmarks.bench_concurrency [--url DATABASE_URL]
+# =============================================================================
+
+"""
+Throughput benchmark for concurrent update handling.
+
+Every simulated update does what a menu callback does: it opens the
+request session (like RequestScopedApplication), loads a class roster
+with one day's attendance, waits for a Telegram reply, loads the roster
+again and waits for a second reply. The Telegram calls are simulated with
+asyncio.sleep(--latency). Updates are limited by a semaphore, like
+Application.concurrent_updates.
+
+The updates only read, so the SQLite numbers show the best case; with
+writes, SQLite serializes the transactions (see get_configured_concurrency).
+Runs against a temporary SQLite file by default; pass --url to run
+against PostgreSQL, e.g.
+
+    python -m benchmarks.bench_concurrency --url postgresql://user:pw@localhost/school_bot
+
+All rows created by the benchmark are removed again when it finishes.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+UPDATES = 200
+LEVELS = "1,4,8,16"
+LATENCY_MS = 50.0
+CLASS_SIZE = 30
+ATTENDANCE_DATE = "2025-10-25"  # A Saturday
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="Database URL to benchmark against (default: temporary SQLite file)",
+    )
+    parser.add_argument(
+        "--updates", type=int, default=UPDATES, help="Updates per concurrency level"
+    )
+    parser.add_argument(
+        "--levels",
+        default=LEVELS,
+        help=f"Comma-separated updates in flight to compare (default: {LEVELS})",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=LATENCY_MS,
+        help=f"Simulated Telegram API round trip in ms (default: {LATENCY_MS})",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    # config.py reads the environment at import time
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("BOT_API", "benchmark")
+
+    from datetime import datetime
+
+    from database import (
+        Attendance,
+        Class,
+        User,
+        async_request_scope,
+        engine,
+        get_db,
+        get_update_concurrency,
+        init_db,
+        is_async_enabled,
+        request_scope,
+    )
+    from database.operations import aio
+
+    init_db()
+    latency = args.latency / 1000
+    levels = [int(level) for level in args.levels.split(",")]
+
+    def seed_class():
+        """Create a class whose members are all marked on ATTENDANCE_DATE."""
+        date_obj = datetime.strptime(ATTENDANCE_DATE, "%Y-%m-%d").date()
+        with get_db() as db:
+            class_obj = Class(name="Benchmark concurrency")
+            db.add(class_obj)
+            db.flush()
+
+            # Negative telegram IDs never collide with real Telegram users
+            users = [
+                User(
+                    telegram_id=-5_000_000 - i,
+                    name=f"Bench Student {i}",
+                    role=1,
+                    class_id=class_obj.id,
+                )
+                for i in range(CLASS_SIZE)
+            ]
+            db.add_all(users)
+            db.flush()
+            db.add_all(
+                Attendance(
+                    user_id=user.id,
+                    class_id=class_obj.id,
+                    date=date_obj,
+                    status=i % 3 != 0,
+                    marked_by=users[0].id,
+                )
+                for i, user in enumerate(users)
+            )
+            return class_obj.id
+
+    def cleanup_class(class_id):
+        with get_db() as db:
+            db.query(Attendance).filter_by(class_id=class_id).delete()
+            db.query(User).filter_by(class_id=class_id).delete()
+            db.query(Class).filter_by(id=class_id).delete()
+
+    async def handle_update(class_id):
+        await aio.get_class_attendance(class_id, ATTENDANCE_DATE)
+        await asyncio.sleep(latency)  # answer_callback_query
+        await aio.get_class_attendance(class_id, ATTENDANCE_DATE)
+        await asyncio.sleep(latency)  # edit_message_text
+
+    async def process_update(class_id, semaphore):
+        async with semaphore:
+            if is_async_enabled():
+                async with async_request_scope():
+                    await handle_update(class_id)
+            else:
+                with request_scope():
+                    await handle_update(class_id)
+
+    async def measure(class_id, level):
+        semaphore = asyncio.Semaphore(level)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(process_update(class_id, semaphore) for _ in range(args.updates))
+        )
+        return args.updates / (time.perf_counter() - started)
+
+    if is_async_enabled():
+        mode = "async engine"
+    else:
+        mode = "thread pool"
+    print(f"Database: {engine.dialect.name} ({url.split('@')[-1]}), {mode}")
+    print(f"Automatic CONCURRENT_UPDATES for this database: {get_update_concurrency()}")
+    print(f"Updates per level: {args.updates}, Telegram latency: {args.latency:g} ms\n")
+    print(f"{'in flight':>9} | {'updates/s':>10} | {'speedup':>7}")
+    print("-" * 33)
+
+    class_id = seed_class()
+    try:
+        baseline = None
+        for level in levels:
+            rate = asyncio.run(measure(class_id, level))
+            baseline = baseline or rate
+            print(f"{level:>9} | {rate:>10.1f} | {rate / baseline:>6.1f}x")
+    finally:
+        cleanup_class(class_id)
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# =============================================================================
+# FILE: benchmarks/bench_menus.py
+# DESCRIPTION: Microbenchmark for main menu rendering
+# LOCATION: benchmarks/bench_menus.py
+# PURPOSE: Report main menu render time when the keyboard is built on every
+#          render vs. served from the keyboard cache
+# USAGE: python -m benchmarks.bench_menus [--renders N]
+# =============================================================================
+
+"""
+Microbenchmark for main menu rendering.
+
+Main menu renders for every role and language:
+
+- built:  keyboard built on every render (translation lookups and
+          InlineKeyboardButton objects for every button)
+- cached: build_main_menu_keyboard as used by show_main_menu
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+RENDERS = 20000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--renders", type=int, default=RENDERS, help="Main menu renders per run"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # config.py reads the environment at import time
+    os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    os.environ.setdefault("BOT_API", "benchmark")
+
+    from config import ROLE_DEVELOPER, ROLE_STUDENT
+    from handlers import common
+    from utils import clear_keyboard_cache
+
+    uncached_build = common.build_main_menu_keyboard.__wrapped__
+    renders = [
+        (role, lang)
+        for role in range(ROLE_STUDENT, ROLE_DEVELOPER + 1)
+        for lang in ("ar", "en")
+    ]
+
+    for role, lang in renders:
+        assert uncached_build(role, lang) == common.build_main_menu_keyboard(
+            role, lang
+        ), f"Cached keyboard differs for role {role} ({lang})"
+
+    def measure_renders(build):
+        rounds = max(1, args.renders // len(renders))
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for role, lang in renders:
+                build(role, lang)
+        return (time.perf_counter() - started) / (rounds * len(renders)) * 1e6
+
+    print(f"Main menu renders per run: {args.renders} ({len(renders)} role/language pairs)")
+    print(f"{'impl':<7} | {'µs/render':>10}")
+    print("-" * 20)
+    try:
+        built = measure_renders(uncached_build)
+        clear_keyboard_cache()
+        cached = measure_renders(common.build_main_menu_keyboard)
+    finally:
+        clear_keyboard_cache()
+
+    for label, micros in (("built", built), ("cached", cached)):
+        print(f"{label:<7} | {micros:>10.2f}")
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# =============================================================================
+# FILE: benchmarks/bench_permissions.py
+# DESCRIPTION: Microbenchmark for permission checks
+# LOCATION: benchmarks/bench_permissions.py
+# PURPOSE: Report permission checks per second and queries per update for
+#          per-call lookups vs. one PermissionContext per update
+# USAGE: python -m benchmarks.bench_permissions [--url DATABASE_URL]
+# =============================================================================
+
+"""
+Microbenchmark for permission checks.
+
+Simulates updates that each ask the same four permission questions for a
+teacher stored in the database (not in AUTHORIZED_USERS):
+
+- legacy:  previous can_* functions (get_user_role + get_user_class, so
+           up to two user lookups per check)
+- per-call: current module-level can_* functions (one lookup per check)
+- context: one PermissionContext per update (one lookup per update)
+
+Each variant runs with the user cache cleared before every lookup (cold,
+so each lookup is a query) and with the cache left warm. All rows
+created are removed at the end.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+UPDATES = 2000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--url",
+        default="sqlite:///:memory:",
+        help="Database URL to benchmark against (default: in-memory SQLite)",
+    )
+    parser.add_argument(
+        "--updates", type=int, default=UPDATES, help="Simulated updates per run"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # config.py reads the environment at import time
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("BOT_API", "benchmark")
+
+    from sqlalchemy import event
+
+    from config import ROLE_LEADER, ROLE_STUDENT, ROLE_TEACHER
+    from database import Class, User, engine, get_db, init_db
+    from database.operations import clear_user_cache
+    from utils import permissions as permissions_module
+    from utils.permissions import (
+        PermissionContext,
+        can_edit_attendance,
+        can_manage_students,
+        can_view_student_details,
+        has_role,
+    )
+
+    init_db()
+
+    query_count = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_queries(conn, cursor, statement, parameters, context, executemany):
+        query_count[0] += 1
+
+    lookup_count = [0]
+    cold = [False]
+    get_user_from_db = permissions_module.get_user_from_db
+
+    def counting_get_user_from_db(telegram_id, db=None):
+        lookup_count[0] += 1
+        if cold[0]:
+            clear_user_cache()
+        return get_user_from_db(telegram_id, db)
+
+    permissions_module.get_user_from_db = counting_get_user_from_db
+
+    def legacy_role(telegram_id):
+        user = counting_get_user_from_db(telegram_id)
+        return user.role if user else None
+
+    def legacy_class(telegram_id):
+        user = counting_get_user_from_db(telegram_id)
+        return user.class_id if user else None
+
+    def legacy_checks(telegram_id, class_id):
+        """Previous implementation: role and class looked up separately."""
+        role = legacy_role(telegram_id)
+        results = [role is not None and role >= ROLE_TEACHER]
+        # can_edit_attendance / can_view_student_details for a teacher
+        for _ in range(2):
+            role = legacy_role(telegram_id)
+            results.append(
+                role is not None
+                and role != ROLE_STUDENT
+                and legacy_class(telegram_id) == class_id
+            )
+        # can_manage_students
+        role = legacy_role(telegram_id)
+        results.append(role is not None and role >= ROLE_LEADER)
+        return results
+
+    def per_call_checks(telegram_id, class_id):
+        return [
+            has_role(telegram_id, ROLE_TEACHER),
+            can_edit_attendance(telegram_id, class_id),
+            can_view_student_details(telegram_id, class_id),
+            can_manage_students(telegram_id, class_id),
+        ]
+
+    def context_checks(telegram_id, class_id):
+        permissions = PermissionContext.load(telegram_id)
+        return [
+            permissions.has_role(ROLE_TEACHER),
+            permissions.can_edit_attendance(class_id),
+            permissions.can_view_student_details(class_id),
+            permissions.can_manage_students(class_id),
+        ]
+
+    checks_per_update = 4
+
+    with get_db() as db:
+        class_obj = Class(name="Benchmark permissions")
+        db.add(class_obj)
+        db.flush()
+        class_id = class_obj.id
+        # Negative telegram IDs never collide with real Telegram users
+        teacher = User(
+            telegram_id=-424242, name="Bench Teacher", role=ROLE_TEACHER, class_id=class_id
+        )
+        db.add(teacher)
+        db.flush()
+        telegram_id = teacher.telegram_id
+
+    def measure(func):
+        query_count[0] = lookup_count[0] = 0
+        started = time.perf_counter()
+        for _ in range(args.updates):
+            func(telegram_id, class_id)
+        elapsed = time.perf_counter() - started
+        return (
+            lookup_count[0] / args.updates,
+            query_count[0] / args.updates,
+            args.updates * checks_per_update / elapsed,
+        )
+
+    try:
+        expected = context_checks(telegram_id, class_id)
+        assert legacy_checks(telegram_id, class_id) == expected, "Legacy disagrees"
+        assert per_call_checks(telegram_id, class_id) == expected, "Per-call disagrees"
+
+        print(f"Database: {engine.dialect.name} ({args.url.split('@')[-1]})")
+        print(f"Updates per run: {args.updates}, {checks_per_update} checks each\n")
+        print(
+            f"{'cache':<5} | {'impl':<9} | {'lookups/update':>14} | "
+            f"{'queries/update':>14} | {'checks/s':>10}"
+        )
+        print("-" * 65)
+        for cold[0] in (True, False):
+            for label, func in (
+                ("legacy", legacy_checks),
+                ("per-call", per_call_checks),
+                ("context", context_checks),
+            ):
+                lookups, queries, rate = measure(func)
+                cache = "cold" if cold[0] else "warm"
+                print(
+                    f"{cache:<5} | {label:<9} | {lookups:>14.1f} | "
+                    f"{queries:>14.1f} | {rate:>10,.0f}"
+                )
+    finally:
+        with get_db() as db:
+            db.query(User).filter_by(class_id=class_id).delete()
+            db.query(Class).filter_by(id=class_id).delete()
+        clear_user_cache()
+        permissions_module.get_user_from_db = get_user_from_db
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
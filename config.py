@@ -31,15 +31,31 @@ if not BOT_API:
 
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///school_bot.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+ASYNC_DB_ENABLED = os.getenv('ASYNC_DB_ENABLED', 'True').lower() == 'true'  # Needs aiosqlite/asyncpg
+DB_THREAD_OFFLOAD = os.getenv('DB_THREAD_OFFLOAD', 'True').lower() == 'true'  # Used when async is off
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '0'))  # 0 = auto: 8 on PostgreSQL, 1 on SQLite
 
 # Redis Configuration
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 REDIS_ENABLED = os.getenv('REDIS_ENABLED', 'False').lower() == 'true'
 
+# Bot State Persistence (user_data/chat_data; Redis when REDIS_ENABLED)
+PERSISTENCE_ENABLED = os.getenv('PERSISTENCE_ENABLED', 'True').lower() == 'true'
+PERSISTENCE_PATH = Path(os.getenv('PERSISTENCE_PATH', 'bot_state.sqlite'))
+PERSISTENCE_INTERVAL = float(os.getenv('PERSISTENCE_INTERVAL', '10'))  # Seconds between batch writes
+
 # Session Configuration
 SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', '3600'))
 UNDO_TIMEOUT = int(os.getenv('UNDO_TIMEOUT', '300'))
 
+# Cache Configuration
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))  # Seconds
+KNOWN_USERS_MAX = int(os.getenv('KNOWN_USERS_MAX', '100000'))  # Registered IDs kept in memory
+DEFAULT_LANGUAGE = 'ar'
+
 # Backup Configuration
 BACKUP_HOUR = int(os.getenv('BACKUP_HOUR', '2'))
 BACKUP_DIR = Path(os.getenv('BACKUP_DIR', 'backups'))
@@ -135,6 +151,12 @@ AUTHORIZED_USERS = parse_users()
 ITEMS_PER_PAGE = 10
 STUDENTS_PER_PAGE = 10
 
+# Message Edit Settings
+EDIT_COALESCE_DELAY = float(os.getenv('EDIT_COALESCE_DELAY', '0.3'))  # Seconds; 0 sends every edit
+
+# Callback Data Settings
+CALLBACK_PAYLOAD_CACHE_SIZE = int(os.getenv('CALLBACK_PAYLOAD_CACHE_SIZE', '10000'))  # Oversized payloads kept
+
 # Birthday Notification Settings
 BIRTHDAY_NOTIFICATION_DAYS = 3  # Notify 3 days before birthday
 BIRTHDAY_UPCOMING_DAYS = 30     # Show birthdays in next 30 days
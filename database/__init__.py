@@ -13,12 +13,30 @@ from database.connection import (
     ScopedSession,
     SessionLocal,
     check_connection,
+    detach,
     engine,
     get_db,
+    get_request_session,
     get_session,
     get_table_counts,
     init_db,
+    mark_request_failed,
+    on_rollback,
+    request_scope,
 )
+from database.async_connection import (
+    AsyncSessionLocal,
+    async_engine,
+    async_request_scope,
+    get_async_db,
+    get_async_request_session,
+    get_update_concurrency,
+    is_async_enabled,
+    mark_async_request_failed,
+    run_sync,
+    supports_concurrent_updates,
+)
+from database.executor import db_executor, get_executor_stats
 from database.models import (
     ActionHistory,
     Attendance,
@@ -27,6 +45,8 @@ from database.models import (
     Base,
     Broadcast,
     Class,
+    ClassDayChange,
+    ClassSkipDate,
     Log,
     MimicSession,
     Notification,
@@ -42,9 +62,28 @@ __all__ = [
     "ScopedSession",
     "get_db",
     "get_session",
+    "request_scope",
+    "get_request_session",
+    "mark_request_failed",
+    "on_rollback",
+    "detach",
     "init_db",
     "check_connection",
     "get_table_counts",
+    # Async connection
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
+    "async_request_scope",
+    "get_async_request_session",
+    "mark_async_request_failed",
+    "is_async_enabled",
+    "run_sync",
+    "supports_concurrent_updates",
+    "get_update_concurrency",
+    # Thread pool
+    "db_executor",
+    "get_executor_stats",
     # Models
     "Base",
     "User",
@@ -52,6 +91,8 @@ __all__ = [
     "UserClass",
     "Attendance",
     "AttendanceStatistics",
+    "ClassSkipDate",
+    "ClassDayChange",
     "Log",
     "MimicSession",
     "Notification",
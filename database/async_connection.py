@@ -0,0 +1,256 @@
+# =============================================================================
+# FILE: database/async_connection.py
+# DESCRIPTION: Async database engine and session management
+# LOCATION: database/async_connection.py
+# PURPOSE: Run database work without blocking the bot's event loop
+# =============================================================================
+
+"""
+Async database engine and session management.
+
+Uses aiosqlite for SQLite and asyncpg for PostgreSQL. The database operations
+stay synchronous and are run on the async engine through AsyncSession.run_sync,
+so the same code serves handlers (awaiting database.operations.aio) and
+scripts/tests (calling database.operations directly).
+
+If the async driver is not installed, or the database is an in-memory SQLite
+database that an async engine could not share, the async engine is disabled
+and run_sync runs the operation on the database thread pool instead
+(database.executor), or inline if DB_THREAD_OFFLOAD is off.
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from config import (
+    ASYNC_DB_ENABLED,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_THREAD_OFFLOAD,
+    DEBUG,
+)
+from database.connection import (
+    enable_sqlite_savepoints,
+    get_configured_concurrency,
+    get_pool_size,
+)
+from database.executor import db_executor
+
+logger = logging.getLogger(__name__)
+
+# Sync driver prefix -> async driver prefix
+ASYNC_DRIVERS = {
+    "sqlite://": "sqlite+aiosqlite://",
+    "postgresql://": "postgresql+asyncpg://",
+    "postgres://": "postgresql+asyncpg://",
+}
+
+
+def get_async_url(url: str) -> Optional[str]:
+    """
+    Map a sync database URL to its async driver.
+
+    Args:
+        url: Database URL as configured in DATABASE_URL
+
+    Returns:
+        Async URL, or None if there is no supported async driver
+    """
+    if url.startswith("sqlite") and ":memory:" in url:
+        # Every connection would get its own empty in-memory database
+        return None
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return None
+
+
+def _create_async_engine():
+    """Create the async engine, or return None if it is unavailable."""
+    if not ASYNC_DB_ENABLED:
+        return None
+
+    async_url = get_async_url(DATABASE_URL)
+    if async_url is None:
+        logger.info("Async database engine not available for this URL")
+        return None
+
+    try:
+        if async_url.startswith("sqlite"):
+            sqlite_engine = create_async_engine(
+                async_url,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                echo=DEBUG,
+            )
+            enable_sqlite_savepoints(sqlite_engine.sync_engine)
+            return sqlite_engine
+        return create_async_engine(
+            async_url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            echo=DEBUG,
+        )
+    except ImportError as e:
+        logger.warning(f"Async database driver missing, using sync engine: {e}")
+        return None
+
+
+async_engine = _create_async_engine()
+
+# Objects stay readable after commit, like the detached objects of get_db()
+AsyncSessionLocal = (
+    async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    if async_engine is not None
+    else None
+)
+
+# Async session shared by everything that runs while one update is handled
+_request_async_session: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "request_async_session", default=None
+)
+
+
+def is_async_enabled() -> bool:
+    """Check whether database work runs on the async engine."""
+    return async_engine is not None
+
+
+def supports_concurrent_updates() -> bool:
+    """
+    Check whether updates may be handled concurrently: database calls must
+    not block the event loop, and the thread pool needs more than the one
+    shared SQLite connection.
+    """
+    if async_engine is not None:
+        return True
+    return DB_THREAD_OFFLOAD and db_executor.max_workers > 1
+
+
+def get_update_concurrency() -> int:
+    """
+    Get how many updates the application may handle at once
+    (see get_configured_concurrency; 1 if database calls would block).
+
+    Each update in flight holds a pooled connection for its request
+    session, so this never exceeds the pool size: further updates would
+    wait up to pool_timeout for a connection and then fail.
+    """
+    if async_engine is not None:
+        return min(get_configured_concurrency(), get_pool_size(async_engine.pool))
+    if DB_THREAD_OFFLOAD:
+        # Already capped at the pool size
+        return db_executor.max_workers
+    return 1
+
+
+@asynccontextmanager
+async def get_async_db():
+    """
+    Async context manager for database sessions.
+
+    Joins the request session if one is open (see async_request_scope);
+    otherwise opens a short-lived session and commits it on exit.
+
+    Usage:
+        async with get_async_db() as db:
+            user = await db.run_sync(lambda s: s.query(User).first())
+    """
+    shared = _request_async_session.get()
+    if shared is not None:
+        yield shared
+        return
+
+    db = AsyncSessionLocal()
+    db.info["short_lived"] = True
+    try:
+        yield db
+        await db.commit()
+    except Exception as e:
+        await _async_rollback(db)
+        logger.error(f"Database error: {e}")
+        raise
+    finally:
+        await db.close()
+
+
+@asynccontextmanager
+async def async_request_scope():
+    """
+    Open one async session for the current update and commit it once at
+    the end. Every get_async_db() call made while handling the update
+    reuses it.
+
+    Usage:
+        async with async_request_scope() as db:
+            await application.process_update(update)
+    """
+    db = AsyncSessionLocal()
+    token = _request_async_session.set(db)
+    try:
+        yield db
+        if db.info.get("rollback_only"):
+            await _async_rollback(db)
+        else:
+            await db.commit()
+    except Exception as e:
+        await _async_rollback(db)
+        logger.error(f"Database error: {e}")
+        raise
+    finally:
+        _request_async_session.reset(token)
+        await db.close()
+
+
+def get_async_request_session() -> Optional[AsyncSession]:
+    """Get the async session of the update being handled, if any."""
+    return _request_async_session.get()
+
+
+def mark_async_request_failed():
+    """Roll back the current async request session instead of committing it."""
+    db = _request_async_session.get()
+    if db is not None:
+        db.info["rollback_only"] = True
+
+
+async def run_sync(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a synchronous database operation on the async engine.
+
+    The operation receives the async session's sync facade as `db`, so its
+    queries are awaited on the event loop instead of blocking it. Without
+    the async engine it runs on the database thread pool.
+
+    Args:
+        func: Database operation accepting a `db` keyword argument
+        *args, **kwargs: Arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    if async_engine is None:
+        if DB_THREAD_OFFLOAD:
+            return await db_executor.run(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+    async with get_async_db() as db:
+        return await db.run_sync(lambda session: func(*args, db=session, **kwargs))
+
+
+async def _async_rollback(db: AsyncSession):
+    """Roll back db and run any callbacks registered with on_rollback."""
+    await db.rollback()
+    for callback in db.info.pop("rollback_callbacks", []):
+        callback()
@@ -9,17 +9,49 @@
 Database connection and session management.
 """
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
+from sqlalchemy.pool import Pool, QueuePool, StaticPool
 from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
 import logging
 
-from config import DATABASE_URL, DEBUG
+from config import (
+    CONCURRENT_UPDATES,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DEBUG,
+)
 from database.models import Base
 
 logger = logging.getLogger(__name__)
 
+# Updates handled at once on PostgreSQL when CONCURRENT_UPDATES is 0 (auto)
+DEFAULT_CONCURRENT_UPDATES = 8
+
+
+def enable_sqlite_savepoints(sqlite_engine: Engine):
+    """
+    Let SQLAlchemy issue BEGIN itself on a SQLite engine.
+
+    The sqlite3 driver only starts transactions before INSERT/UPDATE/DELETE,
+    so a SAVEPOINT issued first (see get_db) would open the transaction
+    and its RELEASE would commit it. Works for the sync and aiosqlite
+    engines (pass async_engine.sync_engine).
+    """
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sqlite_engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
 # Create engine with appropriate settings
 if DATABASE_URL.startswith('sqlite'):
     # SQLite-specific settings
@@ -29,12 +61,13 @@ if DATABASE_URL.startswith('sqlite'):
         poolclass=StaticPool,
         echo=DEBUG
     )
+    enable_sqlite_savepoints(engine)
 else:
     # PostgreSQL and other databases
     engine = create_engine(
         DATABASE_URL,
-        pool_size=10,
-        max_overflow=20,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
         echo=DEBUG
     )
 
@@ -44,14 +77,94 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Thread-safe session
 ScopedSession = scoped_session(SessionLocal)
 
+# Session shared by everything that runs while one update is handled
+_request_session: ContextVar[Optional[Session]] = ContextVar(
+    "request_session", default=None
+)
+
+
+def get_configured_concurrency() -> int:
+    """
+    Get how many updates should be handled at once.
+
+    CONCURRENT_UPDATES if set, otherwise DEFAULT_CONCURRENT_UPDATES on
+    PostgreSQL and 1 on SQLite: SQLite lets one transaction write at a time
+    and request sessions stay open across Telegram calls, so overlapping
+    updates would queue on (or fail with) "database is locked".
+    """
+    if CONCURRENT_UPDATES > 0:
+        return CONCURRENT_UPDATES
+    if DATABASE_URL.startswith('sqlite'):
+        return 1
+    return DEFAULT_CONCURRENT_UPDATES
+
+
+def get_pool_size(pool: Pool) -> int:
+    """Get how many connections a pool keeps (StaticPool shares one)."""
+    if isinstance(pool, QueuePool):
+        return pool.size()
+    return 1
+
 
 def init_db():
     """Initialize database - create all tables."""
     logger.info("Initializing database...")
     Base.metadata.create_all(bind=engine)
+    create_missing_indexes()
+    check_nullable_columns()
     logger.info("Database initialized successfully")
 
 
+def create_missing_indexes():
+    """
+    Create model indexes that are missing from existing tables.
+    create_all() only creates indexes together with new tables.
+    """
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                logger.error(
+                    f"Could not create index {index.name}: {e} "
+                    "(run 'alembic upgrade head' to migrate existing data)"
+                )
+
+
+def check_nullable_columns() -> List[str]:
+    """
+    Find columns that the models allow to be NULL but the database does
+    not. create_all() never alters existing tables, so such a database
+    keeps the old constraint (and rejects the rows) until it is migrated.
+
+    Returns:
+        List of "table.column" names that need 'alembic upgrade head'
+    """
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    stale = []
+    for table in Base.metadata.tables.values():
+        if table.name not in existing:
+            continue
+        not_null = {
+            column["name"]
+            for column in inspector.get_columns(table.name)
+            if not column["nullable"]
+        }
+        stale.extend(
+            f"{table.name}.{column.name}"
+            for column in table.columns
+            if column.nullable and not column.primary_key and column.name in not_null
+        )
+
+    for name in stale:
+        logger.error(
+            f"Column {name} is NOT NULL in the database but nullable in the "
+            "models (run 'alembic upgrade head' to migrate existing data)"
+        )
+    return stale
+
+
 def drop_db():
     """Drop all tables - USE WITH CAUTION!"""
     logger.warning("Dropping all database tables...")
@@ -60,26 +173,124 @@ def drop_db():
 
 
 @contextmanager
-def get_db():
+def get_db(db: Optional[Session] = None):
     """
     Context manager for database sessions.
+
+    Joins the session passed in, or the request session if one is open
+    (see request_scope). Work in a joined session runs in a SAVEPOINT and
+    is only flushed here; whoever opened the session commits. If it fails,
+    only that work is rolled back (earlier work of the same update stays)
+    and the exception propagates. Otherwise a short-lived session is
+    opened and committed on exit.
     
     Usage:
         with get_db() as db:
             user = db.query(User).first()
     """
+    shared = db if db is not None else _request_session.get()
+    if shared is not None:
+        callbacks = shared.info.setdefault("rollback_callbacks", [])
+        first_callback = len(callbacks)
+        savepoint = shared.begin_nested()
+        try:
+            yield shared
+            shared.flush()
+            savepoint.commit()
+        except Exception as e:
+            # Undo this work only; a failed flush would otherwise leave the
+            # whole session unusable and discard the update's earlier writes
+            savepoint.rollback()
+            _run_rollback_callbacks(callbacks, first_callback)
+            logger.error(f"Database error: {e}")
+            raise
+        return
+
     db = SessionLocal()
+    db.info["short_lived"] = True
     try:
         yield db
         db.commit()
     except Exception as e:
-        db.rollback()
+        _rollback(db)
         logger.error(f"Database error: {e}")
         raise
     finally:
         db.close()
 
 
+@contextmanager
+def request_scope():
+    """
+    Open one session for the current update and commit it once at the end.
+    Every get_db() call made while handling the update reuses it.
+
+    Usage:
+        with request_scope() as db:
+            await application.process_update(update)
+    """
+    db = SessionLocal()
+    token = _request_session.set(db)
+    try:
+        yield db
+        if db.info.get("rollback_only"):
+            _rollback(db)
+        else:
+            db.commit()
+    except Exception as e:
+        _rollback(db)
+        logger.error(f"Database error: {e}")
+        raise
+    finally:
+        _request_session.reset(token)
+        db.close()
+
+
+def get_request_session() -> Optional[Session]:
+    """Get the session of the update being handled, if any."""
+    return _request_session.get()
+
+
+def mark_request_failed():
+    """Roll back the current request session instead of committing it."""
+    db = _request_session.get()
+    if db is not None:
+        db.info["rollback_only"] = True
+
+
+def on_rollback(db: Session, callback: Callable[[], None]):
+    """
+    Run callback if the changes made in db are rolled back.
+    Used to undo cache updates made before the session commits (after a
+    short-lived session has committed, registering is harmless).
+    """
+    db.info.setdefault("rollback_callbacks", []).append(callback)
+
+
+def detach(db: Session, *objects):
+    """
+    Detach objects loaded in a short-lived session so they stay readable
+    after it closes. Objects in shared sessions stay in the identity map.
+    """
+    if db.info.get("short_lived"):
+        for obj in objects:
+            db.expunge(obj)
+
+
+def _rollback(db: Session):
+    """Roll back db and run any callbacks registered with on_rollback."""
+    db.rollback()
+    _run_rollback_callbacks(db.info.pop("rollback_callbacks", []))
+
+
+def _run_rollback_callbacks(callbacks: list, start: int = 0):
+    """Run and remove the callbacks registered from index start, newest first."""
+    pending = callbacks[start:]
+    del callbacks[start:]
+    for callback in reversed(pending):
+        callback()
+
+
 def get_session():
     """
     Get a database session.
@@ -0,0 +1,136 @@
+# =============================================================================
+# FILE: database/executor.py
+# DESCRIPTION: Bounded thread pool for blocking database calls
+# LOCATION: database/executor.py
+# PURPOSE: Keep the bot's event loop free while sync SQLAlchemy queries run
+# =============================================================================
+
+"""
+Thread pool for blocking database calls.
+
+Used by database.async_connection.run_sync when the async engine is not
+available. The pool has one worker per update handled at once (see
+get_configured_concurrency), since an update awaits its database calls one
+at a time; saturation shows up as queue depth and wait time (see
+DatabaseExecutor.stats).
+
+Request sessions keep their connection across awaits, so the workers are
+capped at the connection pool size (a single worker for SQLite, whose
+StaticPool shares one connection): with more updates in flight than
+connections, a worker could block on a checkout that only an update
+waiting for a worker would release.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from database.connection import engine, get_configured_concurrency, get_pool_size
+
+
+class DatabaseExecutor:
+    """
+    ThreadPoolExecutor wrapper that tracks queue depth and wait time.
+
+    Context variables (such as the request session) are copied into the
+    worker, so operations join the session of the update that called them.
+
+    Usage:
+        users = await db_executor.run(get_users_by_class, class_id)
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self.started = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker threads on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="db"
+                )
+            return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking function on the pool and await its result.
+
+        Args:
+            func: Blocking function to call
+            *args, **kwargs: Arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        context = contextvars.copy_context()
+        submitted_at = time.monotonic()
+
+        def call():
+            wait = time.monotonic() - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.started += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return context.run(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        def forget_if_cancelled(future: Future):
+            # Cancelled before a worker picked it up, so call() never ran
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+
+        with self._lock:
+            self.queued += 1
+        future = self._get_executor().submit(call)
+        future.add_done_callback(forget_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, float]:
+        """Return worker count, queue depth and wait times (ms)."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self.running,
+                "queued": self.queued,
+                "completed": self.completed,
+                "avg_wait_ms": (
+                    self.total_wait / self.started * 1000 if self.started else 0.0
+                ),
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads (a new pool is created on next use)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# One worker per update in flight, never more than pooled connections
+db_executor = DatabaseExecutor(
+    min(get_configured_concurrency(), get_pool_size(engine.pool))
+)
+
+
+def get_executor_stats() -> Dict[str, float]:
+    """Get queue depth and wait time of the database thread pool."""
+    return db_executor.stats()
@@ -0,0 +1,44 @@
+"""Add class day changes (weekday history of each class)
+
+Revision ID: a5c8e2f7d3b9
+Revises: f3b9d4c8a2e1
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c8e2f7d3b9'
+down_revision = 'f3b9d4c8a2e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # No rows: every class keeps meeting on Class.class_day on every date
+    op.create_table(
+        'class_day_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('class_id', sa.Integer(), nullable=False),
+        sa.Column('effective_from', sa.Date(), nullable=False),
+        sa.Column('previous_day', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    # init_db() may already have created them on this database
+    op.create_index(
+        'uq_class_day_change',
+        'class_day_changes',
+        ['class_id', 'effective_from'],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_class_day_change', table_name='class_day_changes')
+    op.drop_table('class_day_changes')
@@ -0,0 +1,61 @@
+"""Unique attendance record per user, class and date
+
+Revision ID: c4a1f2d9e7b3
+Revises: b6791066a1ed
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a1f2d9e7b3'
+down_revision = 'b6791066a1ed'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep only the newest record for each (user, class, date) before
+    # enforcing uniqueness. GROUP BY treats NULL class_ids as one group.
+    op.execute(
+        """
+        DELETE FROM attendance
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM attendance
+            GROUP BY user_id, class_id, date
+        )
+        """
+    )
+
+    # init_db() may already have created the new indexes on this database
+    op.drop_index(
+        'idx_attendance_user_class_date', table_name='attendance', if_exists=True
+    )
+    op.create_index(
+        'uq_attendance_user_class_date',
+        'attendance',
+        ['user_id', 'class_id', 'date'],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        'uq_attendance_user_date_no_class',
+        'attendance',
+        ['user_id', 'date'],
+        unique=True,
+        if_not_exists=True,
+        postgresql_where=sa.text('class_id IS NULL'),
+        sqlite_where=sa.text('class_id IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_attendance_user_date_no_class', table_name='attendance')
+    op.drop_index('uq_attendance_user_class_date', table_name='attendance')
+    op.create_index(
+        'idx_attendance_user_class_date',
+        'attendance',
+        ['user_id', 'class_id', 'date'],
+    )
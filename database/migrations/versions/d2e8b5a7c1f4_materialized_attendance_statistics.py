@@ -0,0 +1,119 @@
+"""Allow class-less attendance statistics and fill the table
+
+Revision ID: d2e8b5a7c1f4
+Revises: c4a1f2d9e7b3
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+import calendar
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e8b5a7c1f4'
+down_revision = 'c4a1f2d9e7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Attendance marked without a class (managers/developers) gets stats too
+    with op.batch_alter_table('attendance_statistics') as batch_op:
+        batch_op.alter_column(
+            'class_id', existing_type=sa.Integer(), nullable=True
+        )
+
+    # The table was never written before; compute it from attendance once.
+    # From here on attendance writes keep it up to date.
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        month = "CAST(date_trunc('month', {0}) AS DATE)"
+        next_month = "{0} + INTERVAL '1 month'"
+        same_class = 'IS NOT DISTINCT FROM'
+        no_date = "DATE '0001-01-01'"
+    else:
+        month = "date({0}, 'start of month')"
+        next_month = "date({0}, '+1 month')"
+        same_class = 'IS'
+        no_date = "'0001-01-01'"
+
+    op.execute(
+        f"""
+        INSERT INTO attendance_statistics (
+            user_id, class_id, month, total_saturdays, present_count,
+            absent_count, attendance_percentage, consecutive_absences,
+            updated_at
+        )
+        SELECT
+            user_id,
+            class_id,
+            {month.format('date')},
+            0,
+            SUM(CASE WHEN status THEN 1 ELSE 0 END),
+            SUM(CASE WHEN status THEN 0 ELSE 1 END),
+            0,
+            0,
+            CURRENT_TIMESTAMP
+        FROM attendance
+        GROUP BY user_id, class_id, {month.format('date')}
+        """
+    )
+
+    # Absences after the last present mark up to the end of each month
+    op.execute(
+        f"""
+        UPDATE attendance_statistics
+        SET consecutive_absences = (
+            SELECT COUNT(*) FROM attendance a
+            WHERE a.user_id = attendance_statistics.user_id
+              AND a.class_id {same_class} attendance_statistics.class_id
+              AND a.date < {next_month.format('attendance_statistics.month')}
+              AND a.date > COALESCE((
+                  SELECT MAX(p.date) FROM attendance p
+                  WHERE p.user_id = attendance_statistics.user_id
+                    AND p.class_id {same_class} attendance_statistics.class_id
+                    AND p.status
+                    AND p.date < {next_month.format('attendance_statistics.month')}
+              ), {no_date})
+        )
+        """
+    )
+
+    # Every class met on Saturdays at this revision. The percentage is
+    # present out of the sessions held (or the marked records, if more).
+    months = bind.execute(
+        sa.text('SELECT DISTINCT month FROM attendance_statistics')
+    ).scalars().all()
+    for month_value in months:
+        # SQLite returns the month as text
+        first_day = (
+            date.fromisoformat(month_value)
+            if isinstance(month_value, str)
+            else month_value
+        )
+        saturdays = sum(
+            1
+            for week in calendar.monthcalendar(first_day.year, first_day.month)
+            if week[calendar.SATURDAY]
+        )
+        bind.execute(
+            sa.text(
+                'UPDATE attendance_statistics SET total_saturdays = :total, '
+                'attendance_percentage = ROUND(100.0 * present_count / '
+                'CASE WHEN present_count + absent_count > :total '
+                'THEN present_count + absent_count ELSE :total END, 1) '
+                'WHERE month = :month'
+            ),
+            {'total': saturdays, 'month': month_value},
+        )
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM attendance_statistics WHERE class_id IS NULL')
+    with op.batch_alter_table('attendance_statistics') as batch_op:
+        batch_op.alter_column(
+            'class_id', existing_type=sa.Integer(), nullable=False
+        )
@@ -0,0 +1,29 @@
+"""Index attendance by class, status and date
+
+Revision ID: e7c3a9f1b2d6
+Revises: d2e8b5a7c1f4
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3a9f1b2d6'
+down_revision = 'd2e8b5a7c1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() may already have created it on this database
+    op.create_index(
+        'idx_attendance_class_status_date',
+        'attendance',
+        ['class_id', 'status', 'date'],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_attendance_class_status_date', table_name='attendance')
@@ -0,0 +1,53 @@
+"""Add class skip dates (holidays and skipped sessions)
+
+Revision ID: f3b9d4c8a2e1
+Revises: e7c3a9f1b2d6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d4c8a2e1'
+down_revision = 'e7c3a9f1b2d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'class_skip_dates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('class_id', sa.Integer(), nullable=True),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('reason', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    # init_db() may already have created them on this database
+    op.create_index(
+        'uq_skip_class_date',
+        'class_skip_dates',
+        ['class_id', 'date'],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        'uq_skip_date_all_classes',
+        'class_skip_dates',
+        ['date'],
+        unique=True,
+        postgresql_where=sa.text('class_id IS NULL'),
+        sqlite_where=sa.text('class_id IS NULL'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_skip_date_all_classes', table_name='class_skip_dates')
+    op.drop_index('uq_skip_class_date', table_name='class_skip_dates')
+    op.drop_table('class_skip_dates')
@@ -1,10 +1,10 @@
 # =============================================================================
 # FILE: database/models.py
-# DESCRIPTION: SQLAlchemy database models - defines 9 database tables
+# DESCRIPTION: SQLAlchemy database models - defines 14 database tables
 # LOCATION: database/models.py
 # PURPOSE: Database schema for users, classes, attendance, stats, logs, etc.
-# TABLES: User, Class, UserClass, Attendance, AttendanceStatistics, Log,
-#         MimicSession, Notification, Backup, ActionHistory, Broadcast, UsageAnalytics
+# TABLES: User, Class, UserClass, Attendance, AttendanceStatistics,
+#         ClassSkipDate, ClassDayChange, Log, MimicSession, Notification, Backup, ActionHistory, Broadcast, UsageAnalytics
 # =============================================================================
 
 """
@@ -86,7 +86,8 @@ class Class(Base):
     name = Column(String(100), nullable=False)
     teacher_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     leader_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    class_day = Column(Integer, default=5)  # Day of week (5=Saturday)
+    # Day of week (5=Saturday); earlier weekdays are in ClassDayChange
+    class_day = Column(Integer, default=5)
     class_time = Column(Time, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -105,6 +106,12 @@ class Class(Base):
     statistics = relationship(
         "AttendanceStatistics", back_populates="class_obj", cascade="all, delete-orphan"
     )
+    skip_dates = relationship(
+        "ClassSkipDate", back_populates="class_obj", cascade="all, delete-orphan"
+    )
+    day_changes = relationship(
+        "ClassDayChange", back_populates="class_obj", cascade="all, delete-orphan"
+    )
 
     def __repr__(self):
         return f"<Class(id={self.id}, name='{self.name}')>"
@@ -151,9 +158,28 @@ class Attendance(Base):
     class_obj = relationship("Class", back_populates="attendance_records")
     # marker relationship is created via backref in User model
 
-    # Composite index for faster queries
+    # One record per user, class and date. Records marked without a class
+    # (managers/developers) get their own partial index, since NULL class_ids
+    # never conflict in a regular unique index. Both back the ON CONFLICT
+    # upserts in database.operations.attendance.
     __table_args__ = (
-        Index("idx_attendance_user_class_date", "user_id", "class_id", "date"),
+        Index(
+            "uq_attendance_user_class_date",
+            "user_id",
+            "class_id",
+            "date",
+            unique=True,
+        ),
+        Index(
+            "uq_attendance_user_date_no_class",
+            "user_id",
+            "date",
+            unique=True,
+            postgresql_where=class_id.is_(None),
+            sqlite_where=class_id.is_(None),
+        ),
+        # Class statistics: count by status within a date window
+        Index("idx_attendance_class_status_date", "class_id", "status", "date"),
     )
 
     def __repr__(self):
@@ -167,9 +193,12 @@ class AttendanceStatistics(Base):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    # NULL for attendance marked without a class (managers/developers)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=True)
     month = Column(Date, nullable=False)  # First day of month
-    total_saturdays = Column(Integer, default=0)
+    # Sessions the class held that month (column named before classes
+    # could meet on other days than Saturday)
+    total_sessions = Column("total_saturdays", Integer, default=0)
     present_count = Column(Integer, default=0)
     absent_count = Column(Integer, default=0)
     attendance_percentage = Column(Float, default=0.0)
@@ -187,6 +216,64 @@ class AttendanceStatistics(Base):
         return f"<AttendanceStatistics(user_id={self.user_id}, month={self.month}, percentage={self.attendance_percentage})>"
 
 
+class ClassSkipDate(Base):
+    """Dates a class does not meet on its class day (holidays, skipped sessions)."""
+
+    __tablename__ = "class_skip_dates"
+
+    id = Column(Integer, primary_key=True)
+    # NULL for holidays that apply to every class
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=True)
+    date = Column(Date, nullable=False)
+    reason = Column(String(100), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    class_obj = relationship("Class", back_populates="skip_dates")
+
+    # One entry per class and date (and per date for holidays)
+    __table_args__ = (
+        Index("uq_skip_class_date", "class_id", "date", unique=True),
+        Index(
+            "uq_skip_date_all_classes",
+            "date",
+            unique=True,
+            postgresql_where=class_id.is_(None),
+            sqlite_where=class_id.is_(None),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ClassSkipDate(class_id={self.class_id}, date={self.date})>"
+
+
+class ClassDayChange(Base):
+    """
+    A change of Class.class_day: the class met on previous_day before
+    effective_from (and on the next change's previous_day, or on
+    Class.class_day, from then on).
+    """
+
+    __tablename__ = "class_day_changes"
+
+    id = Column(Integer, primary_key=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    effective_from = Column(Date, nullable=False)
+    previous_day = Column(Integer, nullable=False)  # Day of week (0=Monday)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    class_obj = relationship("Class", back_populates="day_changes")
+
+    # One change per class and date
+    __table_args__ = (
+        Index("uq_class_day_change", "class_id", "effective_from", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<ClassDayChange(class_id={self.class_id}, effective_from={self.effective_from})>"
+
+
 class Log(Base):
     """Activity logs for audit trail."""
 
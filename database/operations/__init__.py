@@ -19,28 +19,63 @@ from database.operations.attendance import (
     get_all_attendance_records,
     get_attendance_between_dates,
     get_class_attendance,
+    get_class_attendance_matrix,
+    get_class_daily_counts,
+    get_attendance_roster,
+    get_daily_counts_by_class,
     get_consecutive_absences,
     get_user_attendance_history,
     mark_attendance,
+    mark_attendance_batch,
     get_attendance_stats_by_class,
 )
 
+# Class calendar operations
+from database.operations.class_calendar import (
+    SessionCalendar,
+    add_skip_date,
+    load_session_calendar,
+    remove_skip_date,
+    session_calendar,
+    set_class_day,
+    validate_class_date,
+)
+
+# Statistics operations
+from database.operations.statistics import (
+    find_statistics_mismatches,
+    get_class_statistics,
+    get_user_statistics,
+    rebuild_statistics,
+    refresh_session_totals,
+    refresh_statistics,
+)
+
 # User operations
 from database.operations.users import (
+    clear_user_cache,
     count_users,
     create_user,
     delete_user,
     get_all_users,
+    get_user_cache_stats,
     get_user_by_id,
     get_user_by_telegram_id,
     get_users_by_class,
+    get_known_language,
     get_users_by_role,
+    is_known_user,
+    load_known_users,
     search_users,
     update_last_active,
     update_user,
 )
 
+# Async versions of the operations above (await aio.<name>(...))
+from database.operations import aio
+
 __all__ = [
+    "aio",
     # User operations
     "create_user",
     "get_user_by_telegram_id",
@@ -53,11 +88,21 @@ __all__ = [
     "update_last_active",
     "get_all_users",
     "count_users",
+    "get_user_cache_stats",
+    "clear_user_cache",
+    "load_known_users",
+    "is_known_user",
+    "get_known_language",
     # Attendance operations
     "mark_attendance",
+    "mark_attendance_batch",
     "get_attendance",
     "get_all_attendance_records",
     "get_class_attendance",
+    "get_class_attendance_matrix",
+    "get_class_daily_counts",
+    "get_attendance_roster",
+    "get_daily_counts_by_class",
     "bulk_mark_attendance",
     "get_user_attendance_history",
     "get_attendance_between_dates",
@@ -65,4 +110,19 @@ __all__ = [
     "get_consecutive_absences",
     "delete_attendance",
     "get_attendance_stats_by_class",
+    # Class calendar operations
+    "SessionCalendar",
+    "session_calendar",
+    "load_session_calendar",
+    "validate_class_date",
+    "set_class_day",
+    "add_skip_date",
+    "remove_skip_date",
+    # Statistics operations
+    "refresh_statistics",
+    "refresh_session_totals",
+    "rebuild_statistics",
+    "find_statistics_mismatches",
+    "get_user_statistics",
+    "get_class_statistics",
 ]
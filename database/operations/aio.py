@@ -0,0 +1,88 @@
+# =============================================================================
+# FILE: database/operations/aio.py
+# DESCRIPTION: Async versions of the database operations
+# LOCATION: database/operations/aio.py
+# PURPOSE: Let handlers await database work instead of blocking the event loop
+# =============================================================================
+
+"""
+Async database operations.
+
+Each function here has the same name, arguments and return value as its
+synchronous counterpart in database.operations (or utils.birthday_utils),
+and runs it on the async engine, or on the database thread pool when the
+async engine is unavailable (see database.async_connection.run_sync).
+
+Usage:
+    from database.operations import aio
+
+    user = await aio.get_user_by_telegram_id(telegram_id)
+"""
+
+from functools import wraps
+from typing import Awaitable, Callable
+
+from database.async_connection import run_sync
+from database.operations import attendance, class_calendar, statistics, users
+from utils import birthday_utils
+
+
+def _async_operation(func: Callable) -> Callable[..., Awaitable]:
+    """Wrap a sync database operation as a coroutine function."""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_sync(func, *args, **kwargs)
+
+    return wrapper
+
+
+# User operations
+create_user = _async_operation(users.create_user)
+get_user_by_telegram_id = _async_operation(users.get_user_by_telegram_id)
+get_user_by_id = _async_operation(users.get_user_by_id)
+update_user = _async_operation(users.update_user)
+delete_user = _async_operation(users.delete_user)
+get_users_by_role = _async_operation(users.get_users_by_role)
+get_users_by_class = _async_operation(users.get_users_by_class)
+search_users = _async_operation(users.search_users)
+update_last_active = _async_operation(users.update_last_active)
+get_all_users = _async_operation(users.get_all_users)
+count_users = _async_operation(users.count_users)
+
+# Attendance operations
+mark_attendance = _async_operation(attendance.mark_attendance)
+mark_attendance_batch = _async_operation(attendance.mark_attendance_batch)
+get_attendance = _async_operation(attendance.get_attendance)
+get_all_attendance_records = _async_operation(attendance.get_all_attendance_records)
+get_class_attendance = _async_operation(attendance.get_class_attendance)
+get_class_attendance_matrix = _async_operation(attendance.get_class_attendance_matrix)
+get_class_daily_counts = _async_operation(attendance.get_class_daily_counts)
+get_attendance_roster = _async_operation(attendance.get_attendance_roster)
+get_daily_counts_by_class = _async_operation(attendance.get_daily_counts_by_class)
+bulk_mark_attendance = _async_operation(attendance.bulk_mark_attendance)
+get_user_attendance_history = _async_operation(attendance.get_user_attendance_history)
+get_attendance_between_dates = _async_operation(
+    attendance.get_attendance_between_dates
+)
+count_attendance = _async_operation(attendance.count_attendance)
+get_consecutive_absences = _async_operation(attendance.get_consecutive_absences)
+delete_attendance = _async_operation(attendance.delete_attendance)
+get_attendance_stats_by_class = _async_operation(
+    attendance.get_attendance_stats_by_class
+)
+
+# Class calendar operations
+set_class_day = _async_operation(class_calendar.set_class_day)
+add_skip_date = _async_operation(class_calendar.add_skip_date)
+remove_skip_date = _async_operation(class_calendar.remove_skip_date)
+
+# Statistics operations
+get_user_statistics = _async_operation(statistics.get_user_statistics)
+get_class_statistics = _async_operation(statistics.get_class_statistics)
+
+# Birthday queries
+get_upcoming_birthdays = _async_operation(birthday_utils.get_upcoming_birthdays)
+get_birthdays_in_month = _async_operation(birthday_utils.get_birthdays_in_month)
+notify_upcoming_birthdays = _async_operation(birthday_utils.notify_upcoming_birthdays)
+get_age_statistics = _async_operation(birthday_utils.get_age_statistics)
@@ -9,13 +9,26 @@
 Attendance database operations.
 """
 
-from datetime import date
-from typing import Dict, List, Optional, Tuple
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
 
-from database import Attendance, User, get_db
-from utils import validate_note, validate_saturday
+from database import Attendance, User, detach, get_db
+from database.operations.class_calendar import validate_class_date
+from database.operations.statistics import refresh_statistics
+from utils import validate_note
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement (keeps SQLite under its bound-parameter limit)
+UPSERT_CHUNK_SIZE = 500
+
+# (user_id, class_id, attendance_date, status, note, marked_by)
+AttendanceRow = Tuple[int, Optional[int], str, bool, Optional[str], int]
 
 
 def mark_attendance(
@@ -25,6 +38,7 @@ def mark_attendance(
     status: bool,
     marked_by: int,
     note: Optional[str] = None,
+    db: Optional[Session] = None,
 ) -> Tuple[bool, Optional[Attendance], str]:
     """
     Mark attendance for a user on a specific date.
@@ -36,12 +50,13 @@ def mark_attendance(
         status: True=Present, False=Absent
         marked_by: ID of user marking attendance
         note: Optional absence reason
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Tuple of (success, attendance_object, error_key)
     """
-    # Validate date is Saturday
-    valid, date_obj, error = validate_saturday(attendance_date)
+    # Validate date is a meeting date of the class
+    valid, date_obj, error = validate_class_date(attendance_date, class_id)
     if not valid:
         return False, None, error
 
@@ -53,7 +68,7 @@ def mark_attendance(
         note = validated_note
 
     try:
-        with get_db() as db:
+        with get_db(db) as db:
             # Check if attendance already exists
             if class_id is None:
                 existing = (
@@ -85,8 +100,12 @@ def mark_attendance(
                 existing.status = status
                 existing.note = note
                 existing.marked_by = marked_by
-                # FIX: Expunge before returning
-                db.expunge(existing)
+                # Flush before detaching, otherwise the changes are discarded
+                db.flush()
+                refresh_statistics(db, [(user_id, class_id, date_obj)])
+
+                # FIX: Detach before returning
+                detach(db, existing)
                 return True, existing, ""
 
             # Create new attendance record
@@ -101,9 +120,10 @@ def mark_attendance(
 
             db.add(attendance)
             db.flush()
+            refresh_statistics(db, [(user_id, class_id, date_obj)])
 
-            # FIX: Expunge before returning
-            db.expunge(attendance)
+            # FIX: Detach before returning
+            detach(db, attendance)
 
             return True, attendance, ""
 
@@ -112,7 +132,10 @@ def mark_attendance(
 
 
 def get_attendance(
-    user_id: int, class_id: Optional[int], attendance_date: str
+    user_id: int,
+    class_id: Optional[int],
+    attendance_date: str,
+    db: Optional[Session] = None,
 ) -> Optional[Attendance]:
     """
     Get attendance record for a user on a specific date.
@@ -121,15 +144,16 @@ def get_attendance(
         user_id: User database ID
         class_id: Class ID
         attendance_date: Date string (YYYY-MM-DD)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Attendance object or None
     """
-    valid, date_obj, _ = validate_saturday(attendance_date)
+    valid, date_obj, _ = validate_class_date(attendance_date, class_id)
     if not valid:
         return None
 
-    with get_db() as db:
+    with get_db(db) as db:
         if class_id is None:
             attendance = (
                 db.query(Attendance)
@@ -155,13 +179,13 @@ def get_attendance(
                 .first()
             )
         if attendance:
-            # FIX: Expunge before returning
-            db.expunge(attendance)
+            # FIX: Detach before returning
+            detach(db, attendance)
         return attendance
 
 
 def get_class_attendance(
-    class_id: int, attendance_date: str
+    class_id: int, attendance_date: str, db: Optional[Session] = None
 ) -> List[Tuple[User, Optional[Attendance]]]:
     """
     Get attendance for all users in a class on a specific date.
@@ -169,105 +193,384 @@ def get_class_attendance(
     Args:
         class_id: Class ID
         attendance_date: Date string (YYYY-MM-DD)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of tuples: (user, attendance_record_or_None)
     """
-    valid, date_obj, _ = validate_saturday(attendance_date)
+    valid, date_obj, _ = validate_class_date(attendance_date, class_id)
     if not valid:
         return []
 
-    with get_db() as db:
-        # Get all users in class
-        users = db.query(User).filter_by(class_id=class_id).all()
+    with get_db(db) as db:
+        # Load the roster and that date's attendance in a single statement
+        rows = (
+            db.query(User, Attendance)
+            .outerjoin(
+                Attendance,
+                and_(
+                    Attendance.user_id == User.id,
+                    Attendance.class_id == class_id,
+                    Attendance.date == date_obj,
+                ),
+            )
+            .filter(User.class_id == class_id)
+            .order_by(User.id)
+            .all()
+        )
 
         result = []
-        for user in users:
-            # Get attendance for this user
-            attendance = (
+        for user, attendance in rows:
+            # FIX: Detach both user and attendance
+            detach(db, user)
+            if attendance:
+                detach(db, attendance)
+
+            result.append((user, attendance))
+
+        return result
+
+
+def _upsert_attendance(
+    db, values: List[Dict], update_columns: Sequence[str]
+) -> None:
+    """
+    Insert attendance rows, updating `update_columns` where a record for the
+    same (user_id, class_id, date) already exists.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite (backed by
+    the unique indexes on Attendance) and falls back to SELECT-then-write on
+    other databases.
+
+    Args:
+        db: SQLAlchemy session
+        values: Column dictionaries for the Attendance table
+        update_columns: Columns to overwrite on conflict
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        for row in values:
+            existing = (
                 db.query(Attendance)
-                .filter(
-                    and_(
-                        Attendance.user_id == user.id,
-                        Attendance.class_id == class_id,
-                        Attendance.date == date_obj,
-                    )
+                .filter_by(
+                    user_id=row["user_id"], class_id=row["class_id"], date=row["date"]
                 )
                 .first()
             )
+            if existing:
+                for column in update_columns:
+                    setattr(existing, column, row[column])
+                existing.updated_at = row["updated_at"]
+            else:
+                db.add(Attendance(**row))
+        return
+
+    # Rows without a class are covered by the partial index on (user_id, date)
+    targets = (
+        (
+            [row for row in values if row["class_id"] is not None],
+            ["user_id", "class_id", "date"],
+            None,
+        ),
+        (
+            [row for row in values if row["class_id"] is None],
+            ["user_id", "date"],
+            Attendance.class_id.is_(None),
+        ),
+    )
+
+    for rows, index_elements, index_where in targets:
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = insert(Attendance).values(rows[start : start + UPSERT_CHUNK_SIZE])
+            set_ = {column: stmt.excluded[column] for column in update_columns}
+            set_["updated_at"] = stmt.excluded.updated_at
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=index_elements,
+                    index_where=index_where,
+                    set_=set_,
+                )
+            )
 
-            # FIX: Expunge both user and attendance
-            db.expunge(user)
-            if attendance:
-                db.expunge(attendance)
 
-            result.append((user, attendance))
+def mark_attendance_batch(
+    rows: Iterable[AttendanceRow], db: Optional[Session] = None
+) -> Tuple[bool, int, str]:
+    """
+    Mark attendance for many users in a single transaction.
+
+    Args:
+        rows: Tuples of (user_id, class_id, attendance_date, status, note, marked_by)
+              with attendance_date as a YYYY-MM-DD string
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Tuple of (success, count_saved, error_key)
+    """
+    now = datetime.utcnow()
+    parsed_dates = {}
+    values = {}
+
+    for user_id, class_id, attendance_date, status, note, marked_by in rows:
+        # Validate each distinct date once per class
+        if (attendance_date, class_id) not in parsed_dates:
+            valid, date_obj, error = validate_class_date(attendance_date, class_id)
+            if not valid:
+                return False, 0, error
+            parsed_dates[(attendance_date, class_id)] = date_obj
+
+        if note:
+            valid, note, error = validate_note(note)
+            if not valid:
+                return False, 0, error
+
+        date_obj = parsed_dates[(attendance_date, class_id)]
+        # The last row wins if the same record appears twice in one batch
+        values[(user_id, class_id, date_obj)] = {
+            "user_id": user_id,
+            "class_id": class_id,
+            "date": date_obj,
+            "status": status,
+            "note": note or None,
+            "marked_by": marked_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    if not values:
+        return True, 0, ""
+
+    try:
+        with get_db(db) as db:
+            _upsert_attendance(
+                db, list(values.values()), ("status", "note", "marked_by")
+            )
+            refresh_statistics(db, values.keys())
+            return True, len(values), ""
+
+    except Exception:
+        logger.exception(f"Failed to save attendance batch of {len(values)} records")
+        return False, 0, "unknown_error"
 
-        return result
+
+def get_class_attendance_matrix(
+    class_id: int,
+    dates: Sequence[date],
+    role: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    db: Optional[Session] = None,
+) -> Tuple[List[Tuple[User, List[Optional[bool]]]], int]:
+    """
+    Get a member x date attendance matrix for a class in one query.
+
+    Args:
+        class_id: Class ID
+        dates: Dates to include (matrix columns, in this order)
+        role: Only include members with this role (optional)
+        limit: Members per page (optional, default: all)
+        offset: Members to skip
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Tuple of (rows, total_members) where each row is
+        (user, [True/False/None per date]) and None means not marked
+    """
+    # The page of members, each carrying the unpaged member count
+    members = select(User.id, func.count().over().label("total")).where(
+        User.class_id == class_id
+    )
+    if role is not None:
+        members = members.where(User.role == role)
+    members = members.order_by(User.id).offset(offset)
+    if limit is not None:
+        members = members.limit(limit)
+    members = members.subquery()
+
+    with get_db(db) as db:
+        records = (
+            db.query(User, members.c.total, Attendance.date, Attendance.status)
+            .join(members, members.c.id == User.id)
+            .outerjoin(
+                Attendance,
+                and_(
+                    Attendance.user_id == User.id,
+                    Attendance.class_id == class_id,
+                    Attendance.date.in_(list(dates)),
+                ),
+            )
+            .order_by(User.id)
+            .all()
+        )
+
+        column = {day: index for index, day in enumerate(dates)}
+        rows: Dict[int, Tuple[User, List[Optional[bool]]]] = {}
+        total = 0
+        for user, total, day, status in records:
+            if user.id not in rows:
+                detach(db, user)
+                rows[user.id] = (user, [None] * len(dates))
+            if day is not None:
+                rows[user.id][1][column[day]] = status
+
+        return list(rows.values()), total
+
+
+def get_attendance_roster(
+    class_id: Optional[int],
+    attendance_date: str,
+    role: Optional[int] = None,
+    exclude_user_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    db: Optional[Session] = None,
+) -> Tuple[List[Tuple[User, Optional[Attendance]]], int, int]:
+    """
+    Get the users to mark on a date together with their existing records.
+
+    Filtering and paging happen in SQL; the totals are computed over the
+    whole roster by window functions in the same query.
+
+    Args:
+        class_id: Class ID (None: users of any class, records without a class)
+        attendance_date: Date string (YYYY-MM-DD)
+        role: Only include users with this role (optional)
+        exclude_user_id: User database ID to leave out (optional)
+        limit: Users per page (optional, default: all)
+        offset: Users to skip
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Tuple of (rows, total_users, total_present) where rows is a list of
+        (user, attendance or None) ordered by user ID
+    """
+    valid, date_obj, _ = validate_class_date(attendance_date, class_id)
+    if not valid:
+        return [], 0, 0
+
+    if class_id is None:
+        same_class = Attendance.class_id.is_(None)
+    else:
+        same_class = Attendance.class_id == class_id
+
+    # The page of users, each carrying the unpaged totals
+    members = select(
+        User.id.label("user_id"),
+        Attendance.id.label("attendance_id"),
+        func.count().over().label("total"),
+        func.sum(case((Attendance.status.is_(True), 1), else_=0))
+        .over()
+        .label("present"),
+    ).outerjoin(
+        Attendance,
+        and_(
+            Attendance.user_id == User.id,
+            same_class,
+            Attendance.date == date_obj,
+        ),
+    )
+    if class_id is not None:
+        members = members.where(User.class_id == class_id)
+    if role is not None:
+        members = members.where(User.role == role)
+    if exclude_user_id is not None:
+        members = members.where(User.id != exclude_user_id)
+    members = members.order_by(User.id).offset(offset)
+    if limit is not None:
+        members = members.limit(limit)
+    members = members.subquery()
+
+    with get_db(db) as db:
+        records = (
+            db.query(User, Attendance, members.c.total, members.c.present)
+            .join(members, members.c.user_id == User.id)
+            .outerjoin(Attendance, Attendance.id == members.c.attendance_id)
+            .order_by(User.id)
+            .all()
+        )
+
+        rows = []
+        total = present = 0
+        for user, attendance, total, present in records:
+            detach(db, user)
+            if attendance is not None:
+                detach(db, attendance)
+            rows.append((user, attendance))
+        return rows, total, present or 0
 
 
 def bulk_mark_attendance(
-    class_id: int, attendance_date: str, status: bool, marked_by: int
+    class_id: int,
+    attendance_date: str,
+    status: bool,
+    marked_by: int,
+    db: Optional[Session] = None,
 ) -> Tuple[bool, int, str]:
     """
     Mark attendance for all users in a class.
+    Existing absence reasons are kept.
 
     Args:
         class_id: Class ID
         attendance_date: Date string (YYYY-MM-DD)
         status: True=Present, False=Absent
         marked_by: ID of user marking attendance
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Tuple of (success, count_updated, error_key)
     """
-    valid, date_obj, error = validate_saturday(attendance_date)
+    valid, date_obj, error = validate_class_date(attendance_date, class_id)
     if not valid:
         return False, 0, error
 
     try:
-        with get_db() as db:
+        with get_db(db) as db:
             # Get all users in class
-            users = db.query(User).filter_by(class_id=class_id).all()
-
-            count = 0
-            for user in users:
-                # Check if attendance exists
-                existing = (
-                    db.query(Attendance)
-                    .filter(
-                        and_(
-                            Attendance.user_id == user.id,
-                            Attendance.class_id == class_id,
-                            Attendance.date == date_obj,
-                        )
-                    )
-                    .first()
+            user_ids = [
+                user_id
+                for (user_id,) in db.query(User.id).filter_by(class_id=class_id)
+            ]
+
+            now = datetime.utcnow()
+            values = [
+                {
+                    "user_id": user_id,
+                    "class_id": class_id,
+                    "date": date_obj,
+                    "status": status,
+                    "note": None,
+                    "marked_by": marked_by,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for user_id in user_ids
+            ]
+
+            if values:
+                _upsert_attendance(db, values, ("status", "marked_by"))
+                refresh_statistics(
+                    db, [(user_id, class_id, date_obj) for user_id in user_ids]
                 )
 
-                if existing:
-                    existing.status = status
-                    existing.marked_by = marked_by
-                else:
-                    attendance = Attendance(
-                        user_id=user.id,
-                        class_id=class_id,
-                        date=date_obj,
-                        status=status,
-                        marked_by=marked_by,
-                    )
-                    db.add(attendance)
-
-                count += 1
+            return True, len(values), ""
 
-            return True, count, ""
-
-    except Exception as e:
+    except Exception:
+        logger.exception(
+            f"Failed to mark class {class_id} attendance on {attendance_date}"
+        )
         return False, 0, "unknown_error"
 
 
 def get_user_attendance_history(
-    user_id: int, class_id: Optional[int] = None, limit: int = 10
+    user_id: int,
+    class_id: Optional[int] = None,
+    limit: int = 10,
+    db: Optional[Session] = None,
 ) -> List[Attendance]:
     """
     Get attendance history for a user.
@@ -276,11 +579,12 @@ def get_user_attendance_history(
         user_id: User database ID
         class_id: Filter by class (optional)
         limit: Maximum number of records
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of attendance records (most recent first)
     """
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(Attendance).filter_by(user_id=user_id)
 
         if class_id:
@@ -288,15 +592,19 @@ def get_user_attendance_history(
 
         records = query.order_by(Attendance.date.desc()).limit(limit).all()
 
-        # FIX: Expunge all records
+        # FIX: Detach all records
         for record in records:
-            db.expunge(record)
+            detach(db, record)
 
         return records
 
 
 def get_attendance_between_dates(
-    user_id: int, start_date: date, end_date: date, class_id: Optional[int] = None
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    class_id: Optional[int] = None,
+    db: Optional[Session] = None,
 ) -> List[Attendance]:
     """
     Get attendance records between two dates.
@@ -306,11 +614,12 @@ def get_attendance_between_dates(
         start_date: Start date
         end_date: End date
         class_id: Filter by class (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of attendance records
     """
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(Attendance).filter(
             and_(
                 Attendance.user_id == user_id,
@@ -324,9 +633,9 @@ def get_attendance_between_dates(
 
         records = query.order_by(Attendance.date).all()
 
-        # FIX: Expunge all records
+        # FIX: Detach all records
         for record in records:
-            db.expunge(record)
+            detach(db, record)
 
         return records
 
@@ -337,6 +646,7 @@ def count_attendance(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     class_id: Optional[int] = None,
+    db: Optional[Session] = None,
 ) -> int:
     """
     Count attendance records matching criteria.
@@ -347,11 +657,12 @@ def count_attendance(
         start_date: Start date (optional)
         end_date: End date (optional)
         class_id: Filter by class (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Count of matching records
     """
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(Attendance).filter(
             and_(Attendance.user_id == user_id, Attendance.status == status)
         )
@@ -368,18 +679,21 @@ def count_attendance(
         return query.count()
 
 
-def get_consecutive_absences(user_id: int, class_id: int) -> int:
+def get_consecutive_absences(
+    user_id: int, class_id: int, db: Optional[Session] = None
+) -> int:
     """
     Get count of consecutive absences (from most recent Saturday backwards).
 
     Args:
         user_id: User database ID
         class_id: Class ID
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Number of consecutive absences
     """
-    with get_db() as db:
+    with get_db(db) as db:
         # Get recent attendance records, ordered by date descending
         records = (
             db.query(Attendance)
@@ -401,40 +715,145 @@ def get_consecutive_absences(user_id: int, class_id: int) -> int:
 
         return consecutive
 
-def get_attendance_stats_by_class(class_id: int) -> Dict:
+def get_attendance_stats_by_class(
+    class_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    top_n: Optional[int] = None,
+    db: Optional[Session] = None,
+) -> Dict:
     """
     Get attendance statistics for a class, including reason breakdown.
 
+    Counts are aggregated in SQL (backed by the (class_id, status, date)
+    index), so the cost depends on the date window, not on how many
+    records the class has accumulated.
+
     Args:
         class_id: The ID of the class.
+        start_date: First date to include (optional)
+        end_date: Last date to include (optional)
+        top_n: Only return the N most common reasons (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
-        A dictionary containing attendance statistics.
+        A dictionary with total_present, total_absent, total_with_reason and
+        reason_breakdown (reason -> count, most common first).
     """
-    with get_db() as db:
-        # Get all attendance records for the class
-        records = db.query(Attendance).filter_by(class_id=class_id).all()
-
-        total_absent = 0
-        total_with_reason = 0
-        reason_breakdown = {}
+    filters = [Attendance.class_id == class_id]
+    if start_date:
+        filters.append(Attendance.date >= start_date)
+    if end_date:
+        filters.append(Attendance.date <= end_date)
+    has_reason = and_(Attendance.note.isnot(None), Attendance.note != "")
+
+    with get_db(db) as db:
+        totals = {
+            status: (count, with_reason or 0)
+            for status, count, with_reason in db.query(
+                Attendance.status,
+                func.count(Attendance.id),
+                func.sum(case((has_reason, 1), else_=0)),
+            )
+            .filter(*filters)
+            .group_by(Attendance.status)
+        }
 
-        for record in records:
-            if not record.status:
-                total_absent += 1
-                if record.note:
-                    total_with_reason += 1
-                    reason_breakdown[record.note] = reason_breakdown.get(record.note, 0) + 1
+        count = func.count(Attendance.id)
+        reasons = (
+            db.query(Attendance.note, count)
+            .filter(*filters, Attendance.status.is_(False), has_reason)
+            .group_by(Attendance.note)
+            .order_by(count.desc(), Attendance.note)
+        )
+        if top_n:
+            reasons = reasons.limit(top_n)
 
+        total_absent, total_with_reason = totals.get(False, (0, 0))
         return {
+            "total_present": totals.get(True, (0, 0))[0],
             "total_absent": total_absent,
             "total_with_reason": total_with_reason,
-            "reason_breakdown": reason_breakdown,
+            "reason_breakdown": dict(reasons.all()),
+        }
+
+
+def get_class_daily_counts(
+    class_id: int, dates: List[date], db: Optional[Session] = None
+) -> Dict[date, Dict[str, int]]:
+    """
+    Count present, absent and absent-with-reason records per date for a class.
+
+    Args:
+        class_id: Class ID
+        dates: Dates to count
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Dictionary mapping each requested date to
+        {"present": n, "absent": n, "with_reason": n}
+    """
+    return get_daily_counts_by_class([class_id], dates, db=db)[class_id]
+
+
+def get_daily_counts_by_class(
+    class_ids: List[int], dates: List[date], db: Optional[Session] = None
+) -> Dict[int, Dict[date, Dict[str, int]]]:
+    """
+    Count present, absent and absent-with-reason records per class and date.
+
+    All counts come from one grouped query, whatever the number of classes
+    and dates.
+
+    Args:
+        class_ids: Class IDs
+        dates: Dates to count
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Dictionary mapping class_id -> date -> {"present", "absent",
+        "with_reason"}; every requested class and date is present, with
+        zero counts where nothing was marked
+    """
+    counts = {
+        class_id: {
+            day: {"present": 0, "absent": 0, "with_reason": 0} for day in dates
         }
+        for class_id in class_ids
+    }
+    if not class_ids or not dates:
+        return counts
+
+    has_reason = and_(Attendance.note.isnot(None), Attendance.note != "")
+
+    with get_db(db) as db:
+        rows = (
+            db.query(
+                Attendance.class_id,
+                Attendance.date,
+                Attendance.status,
+                func.count(Attendance.id),
+                func.sum(case((has_reason, 1), else_=0)),
+            )
+            .filter(
+                Attendance.class_id.in_(class_ids),
+                Attendance.date.in_(dates),
+            )
+            .group_by(Attendance.class_id, Attendance.date, Attendance.status)
+        )
+        for class_id, day, status, count, with_reason in rows:
+            day_counts = counts[class_id][day]
+            if status:
+                day_counts["present"] += count
+            else:
+                day_counts["absent"] += count
+                day_counts["with_reason"] += with_reason or 0
+
+    return counts
 
 
 def delete_attendance(
-    user_id: int, class_id: int, attendance_date: str
+    user_id: int, class_id: int, attendance_date: str, db: Optional[Session] = None
 ) -> Tuple[bool, str]:
     """
     Delete an attendance record.
@@ -443,16 +862,17 @@ def delete_attendance(
         user_id: User database ID
         class_id: Class ID
         attendance_date: Date string (YYYY-MM-DD)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Tuple of (success, error_key)
     """
-    valid, date_obj, error = validate_saturday(attendance_date)
+    valid, date_obj, error = validate_class_date(attendance_date, class_id)
     if not valid:
         return False, error
 
     try:
-        with get_db() as db:
+        with get_db(db) as db:
             attendance = (
                 db.query(Attendance)
                 .filter(
@@ -469,6 +889,8 @@ def delete_attendance(
                 return False, "attendance_not_found"
 
             db.delete(attendance)
+            db.flush()
+            refresh_statistics(db, [(user_id, class_id, date_obj)])
 
             return True, ""
 
@@ -476,16 +898,22 @@ def delete_attendance(
         return False, "unknown_error"
 
 
-def get_all_attendance_records() -> List[Attendance]:
+def get_all_attendance_records(db: Optional[Session] = None) -> List[Attendance]:
     """
     Get all attendance records from the database.
     
+    Args:
+        db: Optional SQLAlchemy session (defaults to the request session)
+
     Returns:
         List of all Attendance objects
     """
     try:
-        with get_db() as db:
-            return db.query(Attendance).all()
+        with get_db(db) as db:
+            records = db.query(Attendance).all()
+            for record in records:
+                detach(db, record)
+            return records
     except Exception as e:
         return []
 
@@ -0,0 +1,528 @@
+# =============================================================================
+# FILE: database/operations/class_calendar.py
+# DESCRIPTION: Per-class session calendar (class day minus skipped dates)
+# LOCATION: database/operations/class_calendar.py
+# PURPOSE: Answer "does this class meet on this date?" and "how many
+#          sessions in this range?" from memory instead of date arithmetic
+#          against one global class day
+# =============================================================================
+
+"""
+Class session calendar.
+
+Each class meets weekly on Class.class_day (default CLASS_DAY_OF_WEEK),
+except on its ClassSkipDate rows and on holidays (skip dates without a
+class). Before each of its ClassDayChange rows the class met on that row's
+previous_day, so changing the class day keeps the earlier dates (and their
+attendance and statistics) valid. Attendance marked without a class
+(managers/developers) follows CLASS_DAY_OF_WEEK and the holidays.
+
+SessionCalendar keeps every class day, class day change and skip date in
+memory, loaded with three queries by load_session_calendar at startup. A class's meeting dates
+are computed once per year into a sorted tuple and a frozenset, so
+validating a date is a set lookup and counting sessions in a range is two
+binary searches per year. set_class_day, add_skip_date and
+remove_skip_date keep it current (undone if the session rolls back) and
+recompute the stored monthly session totals of the months they change in
+the same transaction.
+
+Usage:
+    valid, date_obj, error = validate_class_date("2025-10-25", class_id)
+    total = session_calendar.count_sessions_in_month(class_id, 2025, 10)
+    set_class_day(class_id, 0, "2025-11-03")  # Mondays from November 3 on
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import CLASS_DAY_OF_WEEK
+from database import Class, ClassDayChange, ClassSkipDate, detach, get_db, on_rollback
+from utils import get_class_days_in_range
+
+# (class_id, year) -> (sorted meeting dates, same dates as a set)
+YearTable = Tuple[Tuple[date, ...], FrozenSet[date]]
+
+# (effective_from, weekday before it) pairs of a class, in date order
+DayChanges = Tuple[Tuple[date, int], ...]
+
+
+class SessionCalendar:
+    """
+    Meeting dates of every class.
+
+    Usage:
+        session_calendar.is_session(class_id, day)
+        session_calendar.count_sessions(class_id, start_date, end_date)
+    """
+
+    def __init__(self):
+        self._class_days: Dict[int, int] = {}
+        self._day_changes: Dict[int, DayChanges] = {}
+        # class_id (None for holidays of every class) -> skipped dates
+        self._skips: Dict[Optional[int], Set[date]] = {}
+        self._years: Dict[Tuple[Optional[int], int], YearTable] = {}
+
+    # -------------------------------------------------------------------------
+    # Loading and updates
+    # -------------------------------------------------------------------------
+
+    def load(
+        self,
+        class_days: Dict[int, int],
+        skips: Iterable[Tuple[Optional[int], date]],
+        day_changes: Iterable[Tuple[int, date, int]] = (),
+    ) -> None:
+        """
+        Replace the calendar.
+
+        Args:
+            class_days: class_id -> current weekday (0=Monday, 6=Sunday)
+            skips: (class_id or None for every class, date) pairs
+            day_changes: (class_id, effective_from, previous weekday) of
+                every class day change
+        """
+        self._class_days = dict(class_days)
+        changes: Dict[int, List[Tuple[date, int]]] = {}
+        for class_id, effective_from, previous_day in day_changes:
+            changes.setdefault(class_id, []).append((effective_from, previous_day))
+        self._day_changes = {
+            class_id: tuple(sorted(pairs)) for class_id, pairs in changes.items()
+        }
+        self._skips = {}
+        for class_id, day in skips:
+            self._skips.setdefault(class_id, set()).add(day)
+        self._years.clear()
+
+    def set_class_day(
+        self, class_id: int, class_day: int, effective_from: Optional[date] = None
+    ) -> DayChanges:
+        """
+        Change the weekday a class meets on from a date on. Changes from
+        that date on are replaced; earlier dates keep their weekday.
+
+        Args:
+            class_id: Class ID
+            class_day: Weekday (0=Monday, 6=Sunday)
+            effective_from: First date of the new weekday (None: every date)
+
+        Returns:
+            The class's day changes afterwards
+        """
+        changes = ()
+        if effective_from is not None:
+            previous = self.class_day(class_id, effective_from - timedelta(days=1))
+            changes = tuple(
+                change
+                for change in self._day_changes.get(class_id, ())
+                if change[0] < effective_from
+            )
+            if previous != class_day:
+                changes += ((effective_from, previous),)
+        self.restore_class_day(class_id, class_day, changes)
+        return changes
+
+    def class_day_history(self, class_id: int) -> Tuple[int, DayChanges]:
+        """Get a class's current weekday and day changes (see restore_class_day)."""
+        return self.class_day(class_id), self._day_changes.get(class_id, ())
+
+    def restore_class_day(
+        self, class_id: int, class_day: int, changes: DayChanges
+    ) -> None:
+        """Set a class's current weekday and day changes as they were."""
+        self._class_days[class_id] = class_day
+        if changes:
+            self._day_changes[class_id] = changes
+        else:
+            self._day_changes.pop(class_id, None)
+        self._drop_years(class_id)
+
+    def add_skip(self, class_id: Optional[int], day: date) -> None:
+        """Skip a date for one class (or for every class if class_id is None)."""
+        self._skips.setdefault(class_id, set()).add(day)
+        self._drop_years(class_id, day.year)
+
+    def remove_skip(self, class_id: Optional[int], day: date) -> None:
+        """Undo add_skip."""
+        self._skips.get(class_id, set()).discard(day)
+        self._drop_years(class_id, day.year)
+
+    def _drop_years(self, class_id: Optional[int], year: Optional[int] = None) -> None:
+        """Forget computed years of a class (of every class for None)."""
+        for key in list(self._years):
+            if (class_id is None or key[0] == class_id) and year in (None, key[1]):
+                del self._years[key]
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def class_day(self, class_id: Optional[int], on: Optional[date] = None) -> int:
+        """
+        Get the weekday a class meets on.
+
+        Args:
+            class_id: Class ID (None for attendance without a class)
+            on: Date (default: the current weekday)
+
+        Returns:
+            Weekday (0=Monday, 6=Sunday)
+        """
+        if on is not None:
+            for effective_from, previous_day in self._day_changes.get(class_id, ()):
+                if on < effective_from:
+                    return previous_day
+        return self._class_days.get(class_id, CLASS_DAY_OF_WEEK)
+
+    def _weekday_periods(
+        self, class_id: Optional[int], start_date: date, end_date: date
+    ) -> List[Tuple[date, date, int]]:
+        """Split a date range into (start, end, weekday) periods of a class."""
+        periods = []
+        for effective_from, previous_day in self._day_changes.get(class_id, ()):
+            if effective_from > start_date:
+                last_day = min(end_date, effective_from - timedelta(days=1))
+                periods.append((start_date, last_day, previous_day))
+                start_date = effective_from
+            if start_date > end_date:
+                return periods
+        periods.append((start_date, end_date, self.class_day(class_id)))
+        return periods
+
+    def _year(self, class_id: Optional[int], year: int) -> YearTable:
+        """Get (computing once) a class's meeting dates in a year."""
+        key = (class_id, year)
+        table = self._years.get(key)
+        if table is None:
+            skipped = self._skips.get(None, set())
+            if class_id is not None:
+                skipped = skipped | self._skips.get(class_id, set())
+            days = tuple(
+                day
+                for start, end, weekday in self._weekday_periods(
+                    class_id, date(year, 1, 1), date(year, 12, 31)
+                )
+                for day in get_class_days_in_range(start, end, weekday)
+                if day not in skipped
+            )
+            table = self._years[key] = (days, frozenset(days))
+        return table
+
+    def is_session(self, class_id: Optional[int], day: date) -> bool:
+        """
+        Check whether a class meets on a date.
+
+        Args:
+            class_id: Class ID (None for attendance without a class)
+            day: Date to check
+
+        Returns:
+            True if the date is one of the class's meeting dates
+        """
+        return day in self._year(class_id, day.year)[1]
+
+    def is_skipped(self, class_id: Optional[int], day: date) -> bool:
+        """Check whether a date is skipped for a class (or a holiday)."""
+        return day in self._skips.get(None, ()) or (
+            class_id is not None and day in self._skips.get(class_id, ())
+        )
+
+    def sessions_in_range(
+        self, class_id: Optional[int], start_date: date, end_date: date
+    ) -> List[date]:
+        """
+        Get a class's meeting dates between two dates (inclusive).
+
+        Args:
+            class_id: Class ID (None for attendance without a class)
+            start_date: Start date
+            end_date: End date
+
+        Returns:
+            List of dates in order
+        """
+        sessions = []
+        for year in range(start_date.year, end_date.year + 1):
+            days = self._year(class_id, year)[0]
+            sessions.extend(
+                days[bisect_left(days, start_date) : bisect_right(days, end_date)]
+            )
+        return sessions
+
+    def count_sessions(
+        self, class_id: Optional[int], start_date: date, end_date: date
+    ) -> int:
+        """
+        Count a class's meeting dates between two dates (inclusive).
+
+        Args:
+            class_id: Class ID (None for attendance without a class)
+            start_date: Start date
+            end_date: End date
+
+        Returns:
+            Number of sessions
+        """
+        count = 0
+        for year in range(start_date.year, end_date.year + 1):
+            days = self._year(class_id, year)[0]
+            count += bisect_right(days, end_date) - bisect_left(days, start_date)
+        return count
+
+    def count_sessions_in_month(self, class_id: Optional[int], year: int, month: int) -> int:
+        """Count a class's meeting dates in a month."""
+        days = self._year(class_id, year)[0]
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        return bisect_left(days, end) - bisect_left(days, start)
+
+    def last_session(self, class_id: Optional[int], from_date: date) -> Optional[date]:
+        """
+        Get the latest meeting date on or before from_date.
+
+        Returns:
+            Date, or None if the class has not met in the last two years
+        """
+        for year in range(from_date.year, from_date.year - 3, -1):
+            days = self._year(class_id, year)[0]
+            index = bisect_right(days, from_date)
+            if index:
+                return days[index - 1]
+        return None
+
+    def next_session(self, class_id: Optional[int], from_date: date) -> Optional[date]:
+        """
+        Get the earliest meeting date after from_date.
+
+        Returns:
+            Date, or None if the class does not meet in the next two years
+        """
+        for year in range(from_date.year, from_date.year + 3):
+            days = self._year(class_id, year)[0]
+            index = bisect_right(days, from_date)
+            if index < len(days):
+                return days[index]
+        return None
+
+
+# Shared calendar for all classes
+session_calendar = SessionCalendar()
+
+
+def load_session_calendar(db: Optional[Session] = None) -> int:
+    """
+    Load class days, class day changes and skip dates into session_calendar
+    (at startup).
+
+    Args:
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Number of classes loaded
+    """
+    with get_db(db) as db:
+        class_days = {
+            class_id: class_day
+            for class_id, class_day in db.query(Class.id, Class.class_day)
+            if class_day is not None
+        }
+        skips = db.query(ClassSkipDate.class_id, ClassSkipDate.date).all()
+        day_changes = db.query(
+            ClassDayChange.class_id,
+            ClassDayChange.effective_from,
+            ClassDayChange.previous_day,
+        ).all()
+    session_calendar.load(class_days, skips, day_changes)
+    return len(class_days)
+
+
+def validate_class_date(
+    date_str: str, class_id: Optional[int] = None
+) -> Tuple[bool, Optional[date], str]:
+    """
+    Validate that a date string is a meeting date of a class.
+
+    Args:
+        date_str: Date string in format YYYY-MM-DD
+        class_id: Class ID (None for attendance without a class)
+
+    Returns:
+        Tuple of (is_valid, date_object, error_key)
+        - error_key is "not_class_day" for the wrong weekday and
+          "class_skipped" for a skipped date or holiday
+    """
+    try:
+        parsed_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return False, None, "invalid_date_format"
+
+    if not session_calendar.is_session(class_id, parsed_date):
+        if session_calendar.is_skipped(class_id, parsed_date):
+            return False, parsed_date, "class_skipped"
+        return False, parsed_date, "not_class_day"
+
+    return True, parsed_date, ""
+
+
+def set_class_day(
+    class_id: int,
+    class_day: int,
+    effective_from: Optional[str] = None,
+    db: Optional[Session] = None,
+) -> Tuple[bool, str]:
+    """
+    Change the weekday a class meets on from a date on. Earlier dates keep
+    the weekday they had, so their attendance stays valid; a later change
+    already scheduled is replaced.
+
+    Args:
+        class_id: Class ID
+        class_day: Weekday (0=Monday, 6=Sunday)
+        effective_from: First date of the new weekday (YYYY-MM-DD,
+            default: today)
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Tuple of (success, error_key)
+    """
+    # Import here to avoid circular imports
+    from database.operations.statistics import refresh_session_totals
+
+    if not 0 <= class_day <= 6:
+        return False, "invalid_class_day"
+
+    if effective_from is None:
+        start = date.today()
+    else:
+        try:
+            start = datetime.strptime(effective_from, "%Y-%m-%d").date()
+        except ValueError:
+            return False, "invalid_date_format"
+
+    try:
+        with get_db(db) as db:
+            class_obj = db.query(Class).filter_by(id=class_id).first()
+            if not class_obj:
+                return False, "class_not_found"
+            class_obj.class_day = class_day
+
+            previous = session_calendar.class_day_history(class_id)
+            changes = session_calendar.set_class_day(class_id, class_day, start)
+            on_rollback(
+                db, lambda: session_calendar.restore_class_day(class_id, *previous)
+            )
+
+            # Mirror the calendar: changes from `start` on are replaced
+            db.query(ClassDayChange).filter(
+                ClassDayChange.class_id == class_id,
+                ClassDayChange.effective_from >= start,
+            ).delete(synchronize_session=False)
+            if changes and changes[-1][0] == start:
+                db.add(
+                    ClassDayChange(
+                        class_id=class_id,
+                        effective_from=start,
+                        previous_day=changes[-1][1],
+                    )
+                )
+            db.flush()
+
+            # Session counts change from the month of `start` on
+            refresh_session_totals(db, class_id, since=start)
+
+        return True, ""
+
+    except Exception as e:
+        return False, "unknown_error"
+
+
+def add_skip_date(
+    skip_date: str,
+    class_id: Optional[int] = None,
+    reason: Optional[str] = None,
+    db: Optional[Session] = None,
+) -> Tuple[bool, Optional[ClassSkipDate], str]:
+    """
+    Cancel a class's session on a date (a holiday for every class if
+    class_id is None).
+
+    Args:
+        skip_date: Date string (YYYY-MM-DD), a meeting date of the class
+        class_id: Class ID, or None for a holiday
+        reason: Optional reason
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Tuple of (success, skip_date_object, error_key)
+    """
+    # Import here to avoid circular imports
+    from database.operations.statistics import refresh_session_totals
+
+    valid, date_obj, error = validate_class_date(skip_date, class_id)
+    if not valid:
+        return False, None, error
+
+    try:
+        with get_db(db) as db:
+            skip = ClassSkipDate(class_id=class_id, date=date_obj, reason=reason)
+            db.add(skip)
+            db.flush()
+
+            session_calendar.add_skip(class_id, date_obj)
+            on_rollback(db, lambda: session_calendar.remove_skip(class_id, date_obj))
+            refresh_session_totals(db, class_id, date_obj)
+            detach(db, skip)
+
+        return True, skip, ""
+
+    except Exception as e:
+        return False, None, "unknown_error"
+
+
+def remove_skip_date(
+    skip_date: str, class_id: Optional[int] = None, db: Optional[Session] = None
+) -> Tuple[bool, str]:
+    """
+    Restore a skipped session (or holiday if class_id is None).
+
+    Args:
+        skip_date: Date string (YYYY-MM-DD)
+        class_id: Class ID, or None for a holiday
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Tuple of (success, error_key)
+    """
+    # Import here to avoid circular imports
+    from database.operations.statistics import refresh_session_totals
+
+    try:
+        date_obj = datetime.strptime(skip_date, "%Y-%m-%d").date()
+    except ValueError:
+        return False, "invalid_date_format"
+
+    try:
+        with get_db(db) as db:
+            same_class = (
+                ClassSkipDate.class_id.is_(None)
+                if class_id is None
+                else ClassSkipDate.class_id == class_id
+            )
+            deleted = (
+                db.query(ClassSkipDate)
+                .filter(same_class, ClassSkipDate.date == date_obj)
+                .delete(synchronize_session=False)
+            )
+            if not deleted:
+                return False, "skip_date_not_found"
+
+            session_calendar.remove_skip(class_id, date_obj)
+            on_rollback(db, lambda: session_calendar.add_skip(class_id, date_obj))
+            refresh_session_totals(db, class_id, date_obj)
+
+        return True, ""
+
+    except Exception as e:
+        return False, "unknown_error"
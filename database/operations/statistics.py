@@ -0,0 +1,454 @@
+# =============================================================================
+# FILE: database/operations/statistics.py
+# DESCRIPTION: Monthly attendance statistics (materialized per user and class)
+# LOCATION: database/operations/statistics.py
+# PURPOSE: Keep AttendanceStatistics in step with Attendance and read it
+# USAGE: python -m database.operations.statistics [--rebuild]
+# =============================================================================
+
+"""
+Attendance statistics operations.
+
+AttendanceStatistics holds one row per (user, class, month) with present and
+absent counts, the sessions the class held that month, the attendance
+percentage (present out of the sessions held, so unmarked sessions count
+against it) and the run of consecutive absences at the end of that month. Attendance writes call refresh_statistics in the
+same transaction, so the stats screens can read these rows instead of
+scanning Attendance.
+
+Run this module to compare the table with a full recomputation, or with
+--rebuild to recompute it from scratch.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from database import Attendance, AttendanceStatistics, get_db
+from database.operations.class_calendar import session_calendar
+
+# Users per IN (...) clause
+STATS_CHUNK_SIZE = 500
+
+# (user_id, class_id, month)
+StatsKey = Tuple[int, Optional[int], date]
+
+
+def month_start(day: date) -> date:
+    """Get the first day of the month containing day."""
+    return day.replace(day=1)
+
+
+def _percentage(present_count: int, absent_count: int, total_sessions: int) -> float:
+    """
+    Get the attendance percentage of a month: present out of the sessions
+    held (all of the month's sessions, also for the current month). Records
+    on a date that was skipped afterwards still count as held, so the
+    result never exceeds 100.
+    """
+    held = max(total_sessions, present_count + absent_count)
+    return round(present_count / held * 100, 1) if held else 0.0
+
+
+def _compute_months(
+    records: Iterable[Tuple[date, bool]],
+    class_id: Optional[int],
+    streak: int = 0,
+) -> Dict[date, Dict]:
+    """
+    Compute monthly figures from one user's records in one class.
+
+    Args:
+        records: (date, status) pairs in date order
+        class_id: Class of the records (None for attendance without a class)
+        streak: Consecutive absences carried in from before the first record
+
+    Returns:
+        Dictionary mapping month -> column values for AttendanceStatistics
+    """
+    months = {}
+    for day, status in records:
+        month = month_start(day)
+        row = months.setdefault(month, {"present_count": 0, "absent_count": 0})
+        if status:
+            row["present_count"] += 1
+            streak = 0
+        else:
+            row["absent_count"] += 1
+            streak += 1
+        row["consecutive_absences"] = streak
+
+    for month, row in months.items():
+        # Sessions the class held that month (class day minus skipped dates)
+        row["total_sessions"] = session_calendar.count_sessions_in_month(
+            class_id, month.year, month.month
+        )
+        row["attendance_percentage"] = _percentage(
+            row["present_count"], row["absent_count"], row["total_sessions"]
+        )
+    return months
+
+
+def _apply_months(
+    db: Session,
+    user_id: int,
+    class_id: Optional[int],
+    computed: Dict[date, Dict],
+    stored: Dict[date, AttendanceStatistics],
+) -> None:
+    """Write computed months over the stored rows they replace."""
+    now = datetime.utcnow()
+    for month, row in stored.items():
+        if month not in computed:
+            db.delete(row)
+
+    for month, values in computed.items():
+        row = stored.get(month)
+        if row is None:
+            row = AttendanceStatistics(user_id=user_id, class_id=class_id, month=month)
+            db.add(row)
+        for column, value in values.items():
+            setattr(row, column, value)
+        row.updated_at = now
+
+
+def refresh_statistics(db: Session, keys: Iterable[StatsKey]) -> None:
+    """
+    Recompute the statistics rows affected by attendance changes.
+
+    For every (user, class) the months from the earliest changed month
+    onwards are recomputed, since a change can extend or break the run of
+    consecutive absences carried into later months. Call this inside the
+    transaction that changed Attendance, after flushing ORM changes.
+
+    Args:
+        db: SQLAlchemy session
+        keys: (user_id, class_id, month) of changed attendance records
+    """
+    # Earliest changed month per (user, class)
+    first_month: Dict[Tuple[int, Optional[int]], date] = {}
+    for user_id, class_id, month in keys:
+        pair = (user_id, class_id)
+        month = month_start(month)
+        if pair not in first_month or month < first_month[pair]:
+            first_month[pair] = month
+
+    if not first_month:
+        return
+
+    since = min(first_month.values())
+    user_ids = sorted({user_id for user_id, _ in first_month})
+    records: Dict[Tuple[int, Optional[int]], List[Tuple[date, bool]]] = {}
+    stored: Dict[Tuple[int, Optional[int]], Dict[date, AttendanceStatistics]] = {}
+
+    for start in range(0, len(user_ids), STATS_CHUNK_SIZE):
+        chunk = user_ids[start : start + STATS_CHUNK_SIZE]
+
+        rows = (
+            db.query(
+                Attendance.user_id,
+                Attendance.class_id,
+                Attendance.date,
+                Attendance.status,
+            )
+            .filter(Attendance.user_id.in_(chunk), Attendance.date >= since)
+            .order_by(Attendance.date)
+        )
+        for user_id, class_id, day, status in rows:
+            pair = (user_id, class_id)
+            if pair in first_month and day >= first_month[pair]:
+                records.setdefault(pair, []).append((day, status))
+
+        # Rows from `since` on, plus each pair's latest row before it (which
+        # carries the run of absences into the recomputed months)
+        latest_before = (
+            db.query(
+                AttendanceStatistics.user_id,
+                AttendanceStatistics.class_id,
+                func.max(AttendanceStatistics.month).label("month"),
+            )
+            .filter(
+                AttendanceStatistics.user_id.in_(chunk),
+                AttendanceStatistics.month < since,
+            )
+            .group_by(AttendanceStatistics.user_id, AttendanceStatistics.class_id)
+            .subquery()
+        )
+        stats = db.query(AttendanceStatistics).filter(
+            AttendanceStatistics.user_id.in_(chunk),
+            or_(
+                AttendanceStatistics.month >= since,
+                AttendanceStatistics.id.in_(
+                    db.query(AttendanceStatistics.id).join(
+                        latest_before,
+                        and_(
+                            AttendanceStatistics.user_id == latest_before.c.user_id,
+                            AttendanceStatistics.month == latest_before.c.month,
+                            or_(
+                                AttendanceStatistics.class_id
+                                == latest_before.c.class_id,
+                                and_(
+                                    AttendanceStatistics.class_id.is_(None),
+                                    latest_before.c.class_id.is_(None),
+                                ),
+                            ),
+                        ),
+                    )
+                ),
+            ),
+        )
+        for row in stats:
+            stored.setdefault((row.user_id, row.class_id), {})[row.month] = row
+
+    for pair, month in first_month.items():
+        pair_rows = stored.get(pair, {})
+        earlier = [m for m in pair_rows if m < month]
+        streak = pair_rows[max(earlier)].consecutive_absences if earlier else 0
+
+        computed = _compute_months(records.get(pair, []), pair[1], streak)
+        _apply_months(
+            db,
+            pair[0],
+            pair[1],
+            computed,
+            {m: row for m, row in pair_rows.items() if m >= month},
+        )
+
+
+def refresh_session_totals(
+    db: Session,
+    class_id: Optional[int] = None,
+    month: Optional[date] = None,
+    since: Optional[date] = None,
+) -> None:
+    """
+    Recompute total_sessions (sessions held in the month) and the attendance
+    percentage after a class calendar changed. Call inside the transaction
+    that changed it, after updating session_calendar.
+
+    Args:
+        db: SQLAlchemy session
+        class_id: Class whose calendar changed, or None for a holiday
+            (which changes every class and attendance without a class)
+        month: Only the month containing this date (default: every month)
+        since: Only the months from the one containing this date on
+    """
+    filters = []
+    if class_id is not None:
+        filters.append(AttendanceStatistics.class_id == class_id)
+    if month is not None:
+        filters.append(AttendanceStatistics.month == month_start(month))
+    if since is not None:
+        filters.append(AttendanceStatistics.month >= month_start(since))
+
+    # (class_id, month) -> sessions held
+    totals: Dict[Tuple[Optional[int], date], int] = {}
+    for row in db.query(AttendanceStatistics).filter(*filters):
+        key = (row.class_id, row.month)
+        if key not in totals:
+            totals[key] = session_calendar.count_sessions_in_month(
+                row.class_id, row.month.year, row.month.month
+            )
+        row.total_sessions = totals[key]
+        row.attendance_percentage = _percentage(
+            row.present_count, row.absent_count, row.total_sessions
+        )
+    db.flush()
+
+
+def rebuild_statistics(db: Optional[Session] = None) -> int:
+    """
+    Recompute the whole AttendanceStatistics table from Attendance.
+
+    Args:
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Number of statistics rows written
+    """
+    with get_db(db) as db:
+        db.query(AttendanceStatistics).delete(synchronize_session=False)
+        computed = _compute_all(db)
+        db.add_all(
+            AttendanceStatistics(
+                user_id=user_id, class_id=class_id, month=month, **values
+            )
+            for (user_id, class_id, month), values in computed.items()
+        )
+        return len(computed)
+
+
+def find_statistics_mismatches(db: Optional[Session] = None) -> List[str]:
+    """
+    Compare AttendanceStatistics with a full recomputation.
+
+    Args:
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        List of human-readable differences (empty if the table is correct)
+    """
+    columns = (
+        "total_sessions",
+        "present_count",
+        "absent_count",
+        "attendance_percentage",
+        "consecutive_absences",
+    )
+    with get_db(db) as db:
+        expected = _compute_all(db)
+        actual = {
+            (row.user_id, row.class_id, row.month): {
+                column: getattr(row, column) for column in columns
+            }
+            for row in db.query(AttendanceStatistics)
+        }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        if key not in actual:
+            mismatches.append(f"{key}: missing")
+        elif key not in expected:
+            mismatches.append(f"{key}: no attendance records")
+        else:
+            for column in columns:
+                stored = actual[key][column]
+                if stored != expected[key][column]:
+                    mismatches.append(
+                        f"{key}: {column} is {stored}, expected {expected[key][column]}"
+                    )
+    return mismatches
+
+
+def get_user_statistics(
+    user_id: int, since_month: date, db: Optional[Session] = None
+) -> Dict:
+    """
+    Sum a user's monthly statistics from since_month onwards (all classes).
+
+    Args:
+        user_id: User database ID
+        since_month: First month to include
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Dictionary with present, absent, total (marked), sessions (held),
+        percentage and consecutive_absences (as of the latest month)
+    """
+    with get_db(db) as db:
+        rows = (
+            db.query(AttendanceStatistics)
+            .filter(
+                AttendanceStatistics.user_id == user_id,
+                AttendanceStatistics.month >= month_start(since_month),
+            )
+            .order_by(AttendanceStatistics.month)
+            .all()
+        )
+        summary = _summarize(rows)
+        summary["consecutive_absences"] = rows[-1].consecutive_absences if rows else 0
+        return summary
+
+
+def get_class_statistics(
+    class_id: int, since_month: date, db: Optional[Session] = None
+) -> Dict:
+    """
+    Sum the monthly statistics of every member of a class.
+
+    Args:
+        class_id: Class ID
+        since_month: First month to include
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Dictionary with present, absent, total (marked), sessions (held per
+        member, summed) and percentage, plus students_at_risk: members whose latest month ends with 3+ absences
+    """
+    with get_db(db) as db:
+        rows = (
+            db.query(AttendanceStatistics)
+            .filter(
+                AttendanceStatistics.class_id == class_id,
+                AttendanceStatistics.month >= month_start(since_month),
+            )
+            .order_by(AttendanceStatistics.month)
+            .all()
+        )
+
+        summary = _summarize(rows)
+        latest = {row.user_id: row.consecutive_absences for row in rows}
+        summary["students_at_risk"] = sum(
+            1 for streak in latest.values() if streak >= 3
+        )
+        return summary
+
+
+def _sessions_held(row: AttendanceStatistics, today: date) -> int:
+    """Get the sessions of a statistics row's month held by today."""
+    if row.month.year == today.year and row.month.month == today.month:
+        # total_sessions also counts the rest of the month
+        held = session_calendar.count_sessions(row.class_id, row.month, today)
+    else:
+        held = row.total_sessions or 0
+    return max(held, row.present_count + row.absent_count)
+
+
+def _summarize(rows: List[AttendanceStatistics]) -> Dict:
+    """
+    Add up the counts of statistics rows. The percentage is present out of
+    the sessions held, like the stored one, but only counts the sessions of
+    the current month held so far.
+    """
+    today = date.today()
+    present = sum(row.present_count for row in rows)
+    absent = sum(row.absent_count for row in rows)
+    sessions = sum(_sessions_held(row, today) for row in rows)
+    return {
+        "present": present,
+        "absent": absent,
+        "total": present + absent,
+        "sessions": sessions,
+        "percentage": (present / sessions * 100) if sessions else 0.0,
+    }
+
+
+def _compute_all(db: Session) -> Dict[StatsKey, Dict]:
+    """Compute every statistics row from the Attendance table."""
+    rows = db.query(
+        Attendance.user_id, Attendance.class_id, Attendance.date, Attendance.status
+    ).order_by(Attendance.user_id, Attendance.class_id, Attendance.date)
+
+    records: Dict[Tuple[int, Optional[int]], List[Tuple[date, bool]]] = {}
+    for user_id, class_id, day, status in rows:
+        records.setdefault((user_id, class_id), []).append((day, status))
+
+    computed = {}
+    for (user_id, class_id), pair_records in records.items():
+        for month, values in _compute_months(pair_records, class_id).items():
+            computed[(user_id, class_id, month)] = values
+    return computed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check or rebuild attendance statistics")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Recompute the table from scratch"
+    )
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"✅ Rebuilt {rebuild_statistics()} statistics rows")
+    else:
+        mismatches = find_statistics_mismatches()
+        for mismatch in mismatches:
+            print(f"❌ {mismatch}")
+        print(
+            f"{len(mismatches)} mismatches"
+            if mismatches
+            else "✅ Attendance statistics match the attendance records"
+        )
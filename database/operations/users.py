@@ -10,13 +10,16 @@ User database operations.
 """
 
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from database import User, get_db
+from config import DEFAULT_LANGUAGE, KNOWN_USERS_MAX, USER_CACHE_SIZE, USER_CACHE_TTL
+from database import User, detach, get_db, on_rollback
 from utils import (
+    TTLCache,
     normalize_phone_number,
     validate_birthday,
     validate_name,
@@ -24,6 +27,150 @@ from utils import (
     validate_telegram_id,
 )
 
+# Column snapshots of recently used users, stored under both
+# ("telegram_id", telegram_id) and ("id", user_id)
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+# Telegram IDs known to have a user row, so the per-update registration
+# check needs no lookup. Only positive answers are trusted: an ID that is
+# missing (not seen yet, or beyond KNOWN_USERS_MAX) still gets looked up.
+_known_users: Set[int] = set()
+
+# Language preference of known users, kept compact by only storing the
+# ones that differ from DEFAULT_LANGUAGE (most users never change it)
+_user_languages: Dict[int, str] = {}
+
+
+def _cache_user(user: User, db: Optional[Session] = None) -> None:
+    """
+    Store a column snapshot of user under both of its keys. When the write
+    happened in a shared session that may still roll back, the entry is
+    dropped again on rollback.
+    """
+    snapshot = {column: getattr(user, column) for column in _USER_COLUMNS}
+    _user_cache.set(("telegram_id", user.telegram_id), snapshot)
+    _user_cache.set(("id", user.id), snapshot)
+    if db is not None:
+        on_rollback(
+            db, lambda: _forget_user(snapshot["telegram_id"], snapshot["id"])
+        )
+
+
+def _user_from_snapshot(snapshot: Dict) -> User:
+    """Build a fresh detached User from a cached snapshot."""
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+def _forget_user(telegram_id: int, user_id: Optional[int] = None) -> None:
+    """Drop a user from the cache so the next lookup hits the database."""
+    snapshot = _user_cache.pop(("telegram_id", telegram_id))
+    if snapshot:
+        _user_cache.pop(("id", snapshot["id"]))
+    if user_id is not None:
+        _user_cache.pop(("id", user_id))
+
+
+def _store_language(telegram_id: int, language: Optional[str]) -> None:
+    if language and language != DEFAULT_LANGUAGE:
+        _user_languages[telegram_id] = language
+    else:
+        _user_languages.pop(telegram_id, None)
+
+
+def _remember_user(
+    telegram_id: int, language: Optional[str], db: Optional[Session] = None
+) -> None:
+    """
+    Record a registered user and their language preference (undone if db
+    rolls back).
+    """
+    was_known = telegram_id in _known_users
+    if not was_known and len(_known_users) >= KNOWN_USERS_MAX:
+        return
+    previous_language = _user_languages.get(telegram_id)
+    _known_users.add(telegram_id)
+    _store_language(telegram_id, language)
+
+    if db is not None:
+
+        def undo():
+            if not was_known:
+                _known_users.discard(telegram_id)
+            _user_languages.pop(telegram_id, None)
+            _store_language(telegram_id, previous_language)
+
+        on_rollback(db, undo)
+
+
+def load_known_users(db: Optional[Session] = None) -> int:
+    """
+    Seed the known-registered set and language map from the users table
+    with one query (at startup).
+
+    Args:
+        db: Optional SQLAlchemy session (defaults to the request session)
+
+    Returns:
+        Number of Telegram IDs in the set
+    """
+    with get_db(db) as db:
+        rows = (
+            db.query(User.telegram_id, User.language_preference)
+            .limit(KNOWN_USERS_MAX)
+            .all()
+        )
+    for telegram_id, language in rows:
+        _known_users.add(telegram_id)
+        _store_language(telegram_id, language)
+    return len(_known_users)
+
+
+def is_known_user(telegram_id: int) -> bool:
+    """
+    Check without a query whether a user is known to be registered.
+
+    Args:
+        telegram_id: Telegram user ID
+
+    Returns:
+        True if the user has a database row; False means "unknown", not
+        "not registered"
+    """
+    return telegram_id in _known_users
+
+
+def get_known_language(telegram_id: int) -> Optional[str]:
+    """
+    Get a known user's language preference without a query.
+
+    Args:
+        telegram_id: Telegram user ID
+
+    Returns:
+        Language code, or None if the user is not known (look them up)
+    """
+    if telegram_id not in _known_users:
+        return None
+    return _user_languages.get(telegram_id, DEFAULT_LANGUAGE)
+
+
+def get_user_cache_stats() -> Dict:
+    """
+    Get user cache size and hit/miss counters.
+
+    Returns:
+        Dictionary with size, maxsize, hits, misses and hit_rate
+    """
+    return _user_cache.stats()
+
+
+def clear_user_cache() -> None:
+    """Drop every cached user (e.g. after editing the database by hand)."""
+    _user_cache.clear()
+
 
 def create_user(
     telegram_id: int,
@@ -34,6 +181,7 @@ def create_user(
     address: Optional[str] = None,
     birthday: Optional[str] = None,
     language_preference: str = "ar",
+    db: Optional[Session] = None,
 ) -> Tuple[bool, Optional[User], str]:
     """
     Create a new user with validation.
@@ -47,6 +195,7 @@ def create_user(
         address: Address (optional)
         birthday: Birthday in YYYY-MM-DD format (optional)
         language_preference: Language preference ('ar' or 'en')
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Tuple of (success, user_object, error_key)
@@ -76,7 +225,7 @@ def create_user(
             return False, None, error
 
     try:
-        with get_db() as db:
+        with get_db(db) as db:
             # Check if user already exists
             existing = db.query(User).filter_by(telegram_id=telegram_id).first()
             if existing:
@@ -100,10 +249,12 @@ def create_user(
             db.add(user)
             db.flush()  # Get the ID
 
-            # FIX: Expunge object to make it independent of session
-            db.expunge(user)
+            # FIX: Detach object to make it independent of session
+            detach(db, user)
 
-            return True, user, ""
+        _cache_user(user, db)
+        _remember_user(telegram_id, language_preference, db)
+        return True, user, ""
 
     except IntegrityError as e:
         return False, None, "database_error"
@@ -111,39 +262,54 @@ def create_user(
         return False, None, "unknown_error"
 
 
-def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
+def get_user_by_telegram_id(
+    telegram_id: int, db: Optional[Session] = None
+) -> Optional[User]:
     """
     Get user by Telegram ID.
 
     Args:
         telegram_id: Telegram user ID
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         User object or None
     """
-    with get_db() as db:
+    snapshot = _user_cache.get(("telegram_id", telegram_id))
+    if snapshot:
+        return _user_from_snapshot(snapshot)
+
+    with get_db(db) as db:
         user = db.query(User).filter_by(telegram_id=telegram_id).first()
         if user:
-            # FIX: Expunge to detach from session
-            db.expunge(user)
+            # FIX: Detach from session
+            detach(db, user)
+            _cache_user(user)
+            _remember_user(user.telegram_id, user.language_preference)
         return user
 
 
-def get_user_by_id(user_id: int) -> Optional[User]:
+def get_user_by_id(user_id: int, db: Optional[Session] = None) -> Optional[User]:
     """
     Get user by database ID.
 
     Args:
         user_id: Database user ID
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         User object or None
     """
-    with get_db() as db:
+    snapshot = _user_cache.get(("id", user_id))
+    if snapshot:
+        return _user_from_snapshot(snapshot)
+
+    with get_db(db) as db:
         user = db.query(User).filter_by(id=user_id).first()
         if user:
-            # FIX: Expunge to detach from session
-            db.expunge(user)
+            # FIX: Detach from session
+            detach(db, user)
+            _cache_user(user)
         return user
 
 
@@ -155,6 +321,7 @@ def update_user(
     birthday: Optional[str] = None,
     class_id: Optional[int] = None,
     language_preference: Optional[str] = None,
+    db: Optional[Session] = None,
 ) -> Tuple[bool, Optional[User], str]:
     """
     Update user information.
@@ -167,12 +334,16 @@ def update_user(
         birthday: New birthday (optional)
         class_id: New class ID (optional)
         language_preference: New language preference (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Tuple of (success, user_object, error_key)
     """
+    # Drop the cached copy first; it is refreshed once the update commits
+    _forget_user(telegram_id)
+
     try:
-        with get_db() as db:
+        with get_db(db) as db:
             user = db.query(User).filter_by(telegram_id=telegram_id).first()
 
             if not user:
@@ -213,32 +384,40 @@ def update_user(
 
             user.updated_at = datetime.utcnow()
 
-            # FIX: Expunge before returning
-            db.expunge(user)
+            # Flush before expunging, otherwise the changes are discarded
+            db.flush()
 
-            return True, user, ""
+            # FIX: Detach before returning
+            detach(db, user)
+
+        _cache_user(user, db)
+        _remember_user(telegram_id, user.language_preference, db)
+        return True, user, ""
 
     except Exception as e:
         return False, None, "unknown_error"
 
 
-def delete_user(telegram_id: int) -> Tuple[bool, str]:
+def delete_user(telegram_id: int, db: Optional[Session] = None) -> Tuple[bool, str]:
     """
     Delete a user.
 
     Args:
         telegram_id: Telegram user ID
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Tuple of (success, error_key)
     """
     try:
-        with get_db() as db:
+        with get_db(db) as db:
             user = db.query(User).filter_by(telegram_id=telegram_id).first()
 
             if not user:
                 return False, "user_not_found"
 
+            _forget_user(telegram_id, user.id)
+            _known_users.discard(telegram_id)
             db.delete(user)
 
             return True, ""
@@ -247,58 +426,65 @@ def delete_user(telegram_id: int) -> Tuple[bool, str]:
         return False, "unknown_error"
 
 
-def get_users_by_role(role: int) -> List[User]:
+def get_users_by_role(role: int, db: Optional[Session] = None) -> List[User]:
     """
     Get all users with a specific role.
 
     Args:
         role: Role number (1-5)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of users
     """
-    with get_db() as db:
+    with get_db(db) as db:
         users = db.query(User).filter_by(role=role).all()
-        # FIX: Expunge all users
+        # FIX: Detach all users
         for user in users:
-            db.expunge(user)
+            detach(db, user)
         return users
 
 
-def get_users_by_class(class_id: int, role: Optional[int] = None) -> List[User]:
+def get_users_by_class(
+    class_id: int, role: Optional[int] = None, db: Optional[Session] = None
+) -> List[User]:
     """
     Get all users in a specific class, with an optional role filter.
 
     Args:
         class_id: Class ID
         role: Role ID to filter by (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of users
     """
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(User).filter_by(class_id=class_id)
         if role is not None:
             query = query.filter_by(role=role)
         users = query.all()
-        # FIX: Expunge all users
+        # FIX: Detach all users
         for user in users:
-            db.expunge(user)
+            detach(db, user)
         return users
 
 
-def search_users(query: str, class_id: Optional[int] = None) -> List[User]:
+def search_users(
+    query: str, class_id: Optional[int] = None, db: Optional[Session] = None
+) -> List[User]:
     """
     Search users by name, phone, or telegram ID.
 
     Args:
         query: Search query
         class_id: Filter by class (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of matching users
     """
-    with get_db() as db:
+    with get_db(db) as db:
         # Build base query
         base_query = db.query(User)
 
@@ -314,72 +500,89 @@ def search_users(query: str, class_id: Optional[int] = None) -> List[User]:
         )
 
         users = base_query.filter(search_filter).all()
-        # FIX: Expunge all users
+        # FIX: Detach all users
         for user in users:
-            db.expunge(user)
+            detach(db, user)
         return users
 
 
-def update_last_active(telegram_id: int) -> bool:
+def update_last_active(telegram_id: int, db: Optional[Session] = None) -> bool:
     """
     Update user's last active timestamp.
 
     Args:
         telegram_id: Telegram user ID
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         True if successful
     """
     try:
-        with get_db() as db:
-            user = db.query(User).filter_by(telegram_id=telegram_id).first()
-
-            if user:
-                user.last_active = datetime.utcnow()
-                return True
+        now = datetime.utcnow()
+        with get_db(db) as db:
+            updated = (
+                db.query(User)
+                .filter_by(telegram_id=telegram_id)
+                .update({User.last_active: now}, synchronize_session=False)
+            )
 
+        if not updated:
             return False
 
+        # Refresh the cached copy in place instead of dropping it
+        snapshot = _user_cache.get(("telegram_id", telegram_id))
+        if snapshot:
+            snapshot["last_active"] = now
+        return True
+
     except Exception:
         return False
 
 
-def get_all_users(limit: Optional[int] = None, offset: int = 0) -> List[User]:
+def get_all_users(
+    limit: Optional[int] = None, offset: int = 0, db: Optional[Session] = None
+) -> List[User]:
     """
     Get all users with pagination.
 
     Args:
         limit: Maximum number of users to return (optional)
         offset: Number of users to skip
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of users
     """
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(User).offset(offset)
 
         if limit:
             query = query.limit(limit)
 
         users = query.all()
-        # FIX: Expunge all users
+        # FIX: Detach all users
         for user in users:
-            db.expunge(user)
+            detach(db, user)
         return users
 
 
-def count_users(role: Optional[int] = None, class_id: Optional[int] = None) -> int:
+def count_users(
+    role: Optional[int] = None,
+    class_id: Optional[int] = None,
+    db: Optional[Session] = None,
+) -> int:
     """
     Count users with optional filters.
 
     Args:
         role: Filter by role (optional)
         class_id: Filter by class (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Count of users
     """
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(User)
 
         if role is not None:
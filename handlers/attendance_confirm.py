@@ -11,57 +11,57 @@ Confirmation handlers for bulk attendance operations.
 
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
-from middleware.auth import require_role, get_user_lang
-from utils import get_translation
+from middleware.auth import require_role, get_user_lang, get_current_user
+from utils import get_translation, callback_codec, encode_callback
 from config import ROLE_TEACHER
-from database.operations import get_user_by_telegram_id, get_users_by_class, get_users_by_role
+from database.operations import aio
 
 logger = logging.getLogger(__name__)
 
 
 @require_role(ROLE_TEACHER)
-async def confirm_bulk_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def confirm_bulk_action(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str, group: str, date_str: str):
     """
     Show confirmation dialog for bulk attendance actions.
-    Callback: att_confirm_ACTION_GROUP_DATE
+    Callback: att_confirm(action, group, date) with action "present" or "absent"
     """
     query = update.callback_query
     await query.answer()
 
     lang = get_user_lang(context)
-    parts = query.data.split("_")
-    action = parts[2]  # "present" or "absent"
-    group = parts[3]
-    date_str = "_".join(parts[4:])
 
-    # Get user and users list
-    user_id = context.user_data.get("telegram_id")
-    user = get_user_by_telegram_id(user_id)
-    if group == "students":
-        users = get_users_by_class(user.class_id)
+    # Count the users on the attendance interface
+    roster = context.user_data.get("attendance_roster")
+    if roster and roster["date"] == date_str and roster["group"] == group:
+        count = roster["total"]
     else:
-        target_role = user.role - 1
-        users = get_users_by_role(target_role)
+        user = await get_current_user(context)
+        if group == "students":
+            users = await aio.get_users_by_class(user.class_id)
+        else:
+            target_role = user.role - 1
+            users = await aio.get_users_by_role(target_role)
+        count = len(users)
 
     # Build confirmation message
     message = f"⚠️ {get_translation(lang, 'confirm_action')}\n\n"
     if action == "present":
-        message += get_translation(lang, 'confirm_mark_all_present').format(count=len(users))
+        message += get_translation(lang, 'confirm_mark_all_present').format(count=count)
     else:
-        message += get_translation(lang, 'confirm_mark_all_absent').format(count=len(users))
+        message += get_translation(lang, 'confirm_mark_all_absent').format(count=count)
 
     # Build keyboard
     keyboard = [
         [
             InlineKeyboardButton(
                 f"✅ {get_translation(lang, 'yes')}",
-                callback_data=f"att_all_{action}_{group}_{date_str}"
+                callback_data=encode_callback(f"att_all_{action}", group, date_str)
             ),
             InlineKeyboardButton(
                 f"❌ {get_translation(lang, 'no')}",
-                callback_data=f"att_date_{date_str}"
+                callback_data=encode_callback("att_date", date_str)
             ),
         ]
     ]
@@ -79,9 +79,6 @@ def register_attendance_confirm_handlers(application):
     Args:
         application: Telegram Application instance
     """
-    application.add_handler(CallbackQueryHandler(
-        confirm_bulk_action,
-        pattern="^att_confirm_(present|absent)_(students|teachers)_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
+    callback_codec.register_handler("att_confirm", confirm_bulk_action)
 
     logger.info("Attendance confirmation handlers registered")
@@ -2,7 +2,7 @@
 # FILE: handlers/attendance_date.py
 # DESCRIPTION: Date selection for attendance marking
 # LOCATION: handlers/attendance_date.py
-# PURPOSE: Saturday date picker for attendance system
+# PURPOSE: Class date picker for attendance system
 # =============================================================================
 
 """
@@ -10,19 +10,21 @@ Date selection handlers for attendance marking.
 """
 
 import logging
-from datetime import date, timedelta
+from datetime import date
+from typing import Optional
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import ContextTypes, CallbackQueryHandler, ConversationHandler, MessageHandler, filters
+from telegram.ext import ContextTypes, ConversationHandler, MessageHandler, filters
 
-from config import ROLE_STUDENT
-from middleware.auth import require_role, get_user_lang, get_user_by_telegram_id
+from config import ROLE_MANAGER, ROLE_STUDENT
+from database.operations import session_calendar, validate_class_date
+from middleware.auth import require_role, get_user_lang, get_current_user
 from utils import (
     get_translation,
-    get_last_saturday,
-    get_next_saturday,
-    validate_saturday,
     format_date_with_day,
-    is_saturday
+    callback_codec,
+    encode_callback,
+    callback_router,
 )
 
 logger = logging.getLogger(__name__)
@@ -31,6 +33,16 @@ logger = logging.getLogger(__name__)
 WAITING_FOR_DATE = 1
 
 
+def _calendar_class_id(user) -> Optional[int]:
+    """
+    Get the class whose calendar applies to the user's attendance screen
+    (managers and developers mark attendance without a class).
+    """
+    if user is None or user.role >= ROLE_MANAGER:
+        return None
+    return user.class_id
+
+
 @require_role(ROLE_STUDENT + 1)
 async def start_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -43,8 +55,7 @@ async def start_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     lang = get_user_lang(context)
     
     # Get user
-    user_id = context.user_data.get("telegram_id")
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
     
     if not user:
         await query.edit_message_text(
@@ -52,44 +63,40 @@ async def start_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Get Saturday dates
+    # Get the class's session dates (class day minus skipped dates)
+    class_id = _calendar_class_id(user)
     today = date.today()
-    last_sat = get_last_saturday(today)
-    
-    # Check if today is Saturday
-    if is_saturday(today):
-        this_sat = today
-        next_sat = get_next_saturday(today)
-    else:
-        this_sat = get_next_saturday(today)
-        next_sat = this_sat + timedelta(days=7)
+    is_session_today = session_calendar.is_session(class_id, today)
+    last_session = session_calendar.last_session(class_id, today)
+    this_session = today if is_session_today else session_calendar.next_session(class_id, today)
     
     # Build message
     if user.role == 1:  # Student
         message = f"👁️ {get_translation(lang, 'my_attendance')}\n\n"
     else:
         message = f"✏️ {get_translation(lang, 'edit_attendance')}\n\n"
-    message += f"📅 {get_translation(lang, 'select_saturday')}"
+    message += f"📅 {get_translation(lang, 'select_class_date')}"
     
     # Build keyboard with quick date options
     keyboard = []
     
-    # Last Saturday button
-    keyboard.append([InlineKeyboardButton(
-        f"{get_translation(lang, 'btn_last_saturday')} ({last_sat.strftime('%Y-%m-%d')})",
-        callback_data=f"att_date_{last_sat.strftime('%Y-%m-%d')}"
-    )])
+    # Last class button
+    if last_session:
+        keyboard.append([InlineKeyboardButton(
+            f"{get_translation(lang, 'btn_last_class')} ({last_session.strftime('%Y-%m-%d')})",
+            callback_data=encode_callback("att_date", last_session)
+        )])
     
-    # This Saturday (if it's today or upcoming)
-    if is_saturday(today):
+    # Today's class, or the next one
+    if is_session_today:
         keyboard.append([InlineKeyboardButton(
-            f"{get_translation(lang, 'btn_this_saturday')} ({this_sat.strftime('%Y-%m-%d')})",
-            callback_data=f"att_date_{this_sat.strftime('%Y-%m-%d')}"
+            f"{get_translation(lang, 'btn_today_class')} ({this_session.strftime('%Y-%m-%d')})",
+            callback_data=encode_callback("att_date", this_session)
         )])
-    else:
+    elif this_session:
         keyboard.append([InlineKeyboardButton(
-            f"{get_translation(lang, 'btn_next_saturday')} ({this_sat.strftime('%Y-%m-%d')})",
-            callback_data=f"att_date_{this_sat.strftime('%Y-%m-%d')}"
+            f"{get_translation(lang, 'btn_next_class')} ({this_session.strftime('%Y-%m-%d')})",
+            callback_data=encode_callback("att_date", this_session)
         )])
     
     # Manual date entry button
@@ -111,21 +118,19 @@ async def start_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 @require_role(ROLE_STUDENT + 1)
-async def date_selected(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def date_selected(update: Update, context: ContextTypes.DEFAULT_TYPE, date_str: str):
     """
     Handle date selection.
-    Callback: att_date_YYYY-MM-DD
+    Callback: att_date(date)
     """
     query = update.callback_query
     await query.answer()
     
     lang = get_user_lang(context)
     
-    # Extract date from callback data
-    date_str = query.data.split("_", 2)[2]  # att_date_YYYY-MM-DD
-    
-    # Validate it's a Saturday
-    valid, date_obj, error = validate_saturday(date_str)
+    # Validate it's a session date of the user's class
+    user = await get_current_user(context)
+    valid, date_obj, error = validate_class_date(date_str, _calendar_class_id(user))
     
     if not valid:
         await query.answer(
@@ -147,7 +152,7 @@ async def date_selected(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from handlers.attendance_mark import show_attendance_interface
     
     # Show attendance marking interface
-    await show_attendance_interface(update, context, date_str)
+    await show_attendance_interface(update, context, date_str, reload=True)
 
 
 @require_role(ROLE_STUDENT + 1)
@@ -165,7 +170,7 @@ async def manual_date_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message = f"📅 {get_translation(lang, 'choose_date')}\n\n"
     message += get_translation(lang, 'birthday_format') + "\n"
     message += get_translation(lang, 'birthday_example') + "\n\n"
-    message += "⚠️ " + get_translation(lang, 'select_saturday')
+    message += "⚠️ " + get_translation(lang, 'select_class_date')
     
     keyboard = [[InlineKeyboardButton(
         f"❌ {get_translation(lang, 'cancel')}",
@@ -194,8 +199,9 @@ async def receive_manual_date(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     date_input = update.message.text.strip()
     
-    # Validate Saturday
-    valid, date_obj, error = validate_saturday(date_input)
+    # Validate it's a session date of the user's class
+    user = await get_current_user(context)
+    valid, date_obj, error = validate_class_date(date_input, _calendar_class_id(user))
     
     if not valid:
         # Send error message
@@ -235,7 +241,7 @@ async def receive_manual_date(update: Update, context: ContextTypes.DEFAULT_TYPE
         'effective_user': update.effective_user
     })()
 
-    await show_attendance_interface(pseudo_update, context, date_input)
+    await show_attendance_interface(pseudo_update, context, date_input, reload=True)
 
 
 def register_attendance_date_handlers(application):
@@ -246,22 +252,13 @@ def register_attendance_date_handlers(application):
         application: Telegram Application instance
     """
     # Date selection start
-    application.add_handler(CallbackQueryHandler(
-        start_attendance,
-        pattern="^attendance_start$"
-    ))
+    callback_router.add("attendance_start", start_attendance)
     
     # Quick date selection
-    application.add_handler(CallbackQueryHandler(
-        date_selected,
-        pattern="^att_date_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
+    callback_codec.register_handler("att_date", date_selected)
     
     # Manual date entry
-    application.add_handler(CallbackQueryHandler(
-        manual_date_entry,
-        pattern="^att_date_manual$"
-    ))
+    callback_router.add("att_date_manual", manual_date_entry)
     
     # Receive manual date input
     application.add_handler(MessageHandler(
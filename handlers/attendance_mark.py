@@ -10,22 +10,57 @@ Attendance marking handlers with toggle button interface and absence reasons.
 """
 
 import logging
+from typing import Optional
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes, CallbackQueryHandler
 from telegram.error import BadRequest
 
-from config import ROLE_STUDENT
-from middleware.auth import require_role, get_user_lang
-from utils import get_translation, format_date_with_day
-from database.operations import get_user_by_telegram_id, get_users_by_class, get_users_by_role, get_attendance, mark_attendance
+from config import ROLE_STUDENT, STUDENTS_PER_PAGE
+from middleware.auth import require_role, get_user_lang, get_current_user
+from utils import (
+    get_translation,
+    format_date_with_day,
+    get_page_bounds,
+    build_page_buttons,
+    edit_coalescer,
+    callback_codec,
+    encode_callback,
+)
+from database.operations import aio
 
 logger = logging.getLogger(__name__)
 
 
-async def show_attendance_interface(update: Update, context: ContextTypes.DEFAULT_TYPE, date_str: str, group: str = "students"):
+def _seed_changes(context: ContextTypes.DEFAULT_TYPE, roster: dict, rows: list):
     """
-    Show attendance marking interface with role-based access control.
-    
+    Record the saved status of loaded users and seed their pending changes.
+
+    roster["baseline"] keeps the saved status of every user loaded so far,
+    which lets the counter line combine the roster-wide present total with
+    the pending changes without loading every page.
+    """
+    changes = context.user_data.setdefault("attendance_changes", {})
+    for member, attendance in rows:
+        saved = {
+            'status': attendance.status if attendance else False,  # Default to absent
+            'note': attendance.note if attendance else None,
+        }
+        roster["baseline"][member.id] = saved['status']
+        if member.id not in changes:
+            changes[member.id] = saved
+
+
+async def load_attendance_roster(context: ContextTypes.DEFAULT_TYPE, date_str: str, group: str = "students", page: Optional[int] = None, reload: bool = False):
+    """
+    Get the roster snapshot for the attendance interface.
+
+    One page of users (STUDENTS_PER_PAGE), their existing records and the
+    roster totals are loaded in one query and kept in
+    context.user_data["attendance_roster"], so re-rendering the interface
+    (toggles, reasons) does not touch the database until the date, group
+    or page changes.
+
     Role-based permissions:
     - Students: view own attendance only (read-only)
     - Teachers: edit their class students
@@ -34,80 +69,161 @@ async def show_attendance_interface(update: Update, context: ContextTypes.DEFAUL
     - Developers: edit any member attendance
 
     Args:
-        update: Telegram update
         context: Bot context
         date_str: Date string (YYYY-MM-DD)
         group: "students" or "teachers" (for tab navigation)
+        page: Page to show (0-based; default: the current page)
+        reload: Load from the database even if a snapshot exists
+
+    Returns:
+        Tuple of (roster, error_key); roster is None on error
     """
-    lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
+    roster = context.user_data.get("attendance_roster")
+    same_view = (
+        not reload
+        and roster
+        and roster["date"] == date_str
+        and roster["group"] == group
+    )
+    if same_view and page in (None, roster["page"]):
+        return roster, None
+    if page is None:
+        page = 0
 
     # Get user
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
 
     if not user:
-        await update.callback_query.edit_message_text(
-            get_translation(lang, "access_denied")
-        )
-        return
+        return None, "access_denied"
 
     # Role-based access control
+    filters = {}
     if user.role == ROLE_STUDENT:
         # Students can only view their own attendance
-        if group == "students":
-            students = [user]  # Only show their own record
-            class_id = user.class_id
-        else:
-            await update.callback_query.edit_message_text(
-                get_translation(lang, "access_denied")
-            )
-            return
-    elif user.role == 2:  # Teacher
-        # Teachers can edit their class students
-        if not user.class_id:
-            await update.callback_query.edit_message_text(
-                get_translation(lang, "no_class_assigned")
-            )
-            return
-        students = get_users_by_class(user.class_id, role=ROLE_STUDENT)
+        if group != "students":
+            return None, "access_denied"
+        existing = await aio.get_attendance(user.id, user.class_id, date_str)
+        rows = [(user, existing)]  # Only show their own record
+        total, present_total = 1, int(bool(existing and existing.status))
         class_id = user.class_id
-    elif user.role == 3:  # Leader
-        # Leaders can edit their class members (excluding themselves)
-        if not user.class_id:
-            await update.callback_query.edit_message_text(
-                get_translation(lang, "no_class_assigned")
-            )
-            return
-        all_class_members = get_users_by_class(user.class_id)
-        # Exclude the leader themselves from the list
-        students = [member for member in all_class_members if member.id != user.id]
-        class_id = user.class_id
-    elif user.role in [4, 5]:  # Manager, Developer
-        # Can edit any member attendance
-        if group == "students":
-            # Show all students (can be filtered by role if needed)
-            students = get_users_by_role(ROLE_STUDENT)
+        page = 0
+    else:
+        if user.role == 2:  # Teacher
+            # Teachers can edit their class students
+            if not user.class_id:
+                return None, "no_class_assigned"
+            class_id = user.class_id
+            filters = {"role": ROLE_STUDENT}
+        elif user.role == 3:  # Leader
+            # Leaders can edit their class members (excluding themselves)
+            if not user.class_id:
+                return None, "no_class_assigned"
+            class_id = user.class_id
+            filters = {"exclude_user_id": user.id}
+        elif user.role in [4, 5]:  # Manager, Developer
+            # Can edit any member attendance
             class_id = None
+            if group == "students":
+                # Show all students (can be filtered by role if needed)
+                filters = {"role": ROLE_STUDENT}
+            else:
+                # Show all teachers/staff
+                filters = {"role": user.role - 1}
         else:
-            # Show all teachers/staff
-            target_role = user.role - 1
-            students = get_users_by_role(target_role)
-            class_id = None
-    else:
+            return None, "access_denied"
+
+        rows, total, present_total = await aio.get_attendance_roster(
+            class_id, date_str, limit=STUDENTS_PER_PAGE,
+            offset=page * STUDENTS_PER_PAGE, **filters
+        )
+        if not rows and page > 0:
+            # The roster shrank since the page was shown; start over
+            page = 0
+            rows, total, present_total = await aio.get_attendance_roster(
+                class_id, date_str, limit=STUDENTS_PER_PAGE, **filters
+            )
+
+    page, pages = get_page_bounds(page, total)
+    roster = {
+        "date": date_str,
+        "group": group,
+        "page": page,
+        "pages": pages,
+        "total": total,
+        "present_total": present_total,
+        "viewer_role": user.role,
+        "viewer_class_id": user.class_id,
+        "class_id": class_id,
+        "filters": filters,
+        "members": [(member.id, member.name) for member, _ in rows],
+        "existing": {
+            member.id: {'status': attendance.status, 'note': attendance.note}
+            for member, attendance in rows
+            if attendance
+        },
+        # Saved status of every user loaded for this date and group
+        "baseline": dict(roster["baseline"]) if same_view else {},
+    }
+    if user.role > ROLE_STUDENT:
+        _seed_changes(context, roster, rows)
+    context.user_data["attendance_roster"] = roster
+    return roster, None
+
+
+async def load_full_roster(context: ContextTypes.DEFAULT_TYPE, roster: dict):
+    """
+    Seed pending changes for users on pages that were never shown.
+
+    Used before actions that apply to the whole roster (mark all, save).
+
+    Args:
+        context: Bot context
+        roster: Roster snapshot from load_attendance_roster
+    """
+    if roster["pages"] <= 1 or roster["viewer_role"] <= ROLE_STUDENT:
+        return  # Every user was seeded when the page was shown
+    rows, _, _ = await aio.get_attendance_roster(
+        roster["class_id"], roster["date"], **roster["filters"]
+    )
+    _seed_changes(context, roster, rows)
+
+
+async def show_attendance_interface(update: Update, context: ContextTypes.DEFAULT_TYPE, date_str: str, group: str = "students", page: Optional[int] = None, reload: bool = False):
+    """
+    Show attendance marking interface with role-based access control.
+
+    See load_attendance_roster for who can see and edit which users.
+
+    Args:
+        update: Telegram update
+        context: Bot context
+        date_str: Date string (YYYY-MM-DD)
+        group: "students" or "teachers" (for tab navigation)
+        page: Page to show (0-based; default: the current page)
+        reload: Reload the roster from the database (when the date is opened)
+    """
+    lang = get_user_lang(context)
+
+    roster, error = await load_attendance_roster(context, date_str, group, page, reload)
+    if error:
         await update.callback_query.edit_message_text(
-            get_translation(lang, "access_denied")
+            get_translation(lang, error)
         )
         return
 
+    role = roster["viewer_role"]
+    students = roster["members"]
+    existing = roster["existing"]
+
     # Store current group and class_id
     context.user_data["current_group"] = group
-    context.user_data["current_class_id"] = class_id
+    context.user_data["current_class_id"] = roster["class_id"]
     
     if not students:
         message = f"✏️ {get_translation(lang, 'edit_attendance')}\n"
         message += f"📅 {format_date_with_day(date_str, lang)}\n"
-        if user.role in [2, 3]:  # Teacher or Leader
-            message += f"🏫 {get_translation(lang, 'class')}: {user.class_id}\n"
+        if role in [2, 3]:  # Teacher or Leader
+            message += f"🏫 {get_translation(lang, 'class')}: {roster['viewer_class_id']}\n"
         message += "=" * 30 + "\n\n"
         message += get_translation(lang, "no_students_in_class")
 
@@ -121,74 +237,35 @@ async def show_attendance_interface(update: Update, context: ContextTypes.DEFAUL
         )
         return
 
-    # Initialize attendance changes if not exists (only for users who can edit)
-    if user.role > ROLE_STUDENT:
-        if "attendance_changes" not in context.user_data:
-            context.user_data["attendance_changes"] = {}
-
-        # Load existing attendance if available
-        for student in students:
-            if student.id not in context.user_data["attendance_changes"]:
-                # Check if attendance already marked for this date
-                existing = get_attendance(student.id, class_id, date_str)
-                if existing:
-                    context.user_data["attendance_changes"][student.id] = {
-                        'status': existing.status,
-                        'note': existing.note
-                    }
-                else:
-                    # Default to absent
-                    context.user_data["attendance_changes"][student.id] = {
-                        'status': False,
-                        'note': None
-                    }
-
-    # Build message
-    if user.role == ROLE_STUDENT:
-        message = f"👁️ {get_translation(lang, 'my_attendance')}\n"
+    # Build message (the counter line goes between head and tail so that
+    # toggles can patch it, see _patch_member_row)
+    if role == ROLE_STUDENT:
+        head = f"👁️ {get_translation(lang, 'my_attendance')}\n"
     else:
-        message = f"✏️ {get_translation(lang, 'edit_attendance')}\n"
+        head = f"✏️ {get_translation(lang, 'edit_attendance')}\n"
     
-    message += f"📅 {format_date_with_day(date_str, lang)}\n"
+    head += f"📅 {format_date_with_day(date_str, lang)}\n"
     
-    if user.role in [2, 3]:  # Teacher or Leader
-        message += f"🏫 {get_translation(lang, 'class')}: {user.class_id}\n"
-    elif user.role in [4, 5]:  # Manager or Developer
-        target_role = user.role - 1
+    if role in [2, 3]:  # Teacher or Leader
+        head += f"🏫 {get_translation(lang, 'class')}: {roster['viewer_class_id']}\n"
+    elif role in [4, 5]:  # Manager or Developer
+        target_role = role - 1
         role_plurals = ['students', 'teachers', 'leaders', 'managers', 'developers']
-        message += f"👨‍🏫 {get_translation(lang, role_plurals[target_role - 1])}\n"
-    
-    message += "=" * 30 + "\n\n"
-    
-    # Count statistics
-    if user.role > ROLE_STUDENT:
-        # For editors, count from changes
-        present_count = sum(1 for s in students 
-                           if context.user_data["attendance_changes"].get(s.id, {}).get('status', False))
-    else:
-        # For students, count from actual attendance
-        present_count = 0
-        for student in students:
-            existing = get_attendance(student.id, class_id, date_str)
-            if existing and existing.status:
-                present_count += 1
-    
-    absent_count = len(students) - present_count
-    total = len(students)
+        head += f"👨‍🏫 {get_translation(lang, role_plurals[target_role - 1])}\n"
     
-    message += f"📊 {present_count}/{total} " + get_translation(lang, 'present')
-    message += f" | {absent_count} " + get_translation(lang, 'absent') + "\n\n"
+    head += "=" * 30 + "\n\n"
     
     # Instructions
-    if user.role > ROLE_STUDENT:
-        message += "💡 " + get_translation(lang, 'att_instructions') + "\n"
-        message += "📝 " + get_translation(lang, 'click_absent_for_reason') + "\n\n"
+    tail = ""
+    if role > ROLE_STUDENT:
+        tail += "💡 " + get_translation(lang, 'att_instructions') + "\n"
+        tail += "📝 " + get_translation(lang, 'click_absent_for_reason') + "\n\n"
     
-    # Build keyboard with tab buttons first
+    # Build keyboard model, rows of (text, callback_data), with tab buttons first
     keyboard = []
 
     # Tab buttons (only show tabs for users who can edit)
-    if user.role > ROLE_STUDENT:
+    if role > ROLE_STUDENT:
         # Tab buttons
         role_plurals = ['students', 'teachers', 'leaders', 'managers', 'developers']
         
@@ -200,98 +277,149 @@ async def show_attendance_interface(update: Update, context: ContextTypes.DEFAUL
         else:
             teachers_text = f"✅ {teachers_text}"
 
-        tab_buttons = [InlineKeyboardButton(students_text, callback_data=f"att_tab_students_{date_str}")]
-        if user.role > 2:  # Only leaders and above can access staff tab
-            target_role = user.role - 1
+        tab_buttons = [(students_text, encode_callback("att_tab", "students", date_str))]
+        if role > 2:  # Only leaders and above can access staff tab
+            target_role = role - 1
             staff_text = get_translation(lang, role_plurals[target_role - 1])
             if group == "teachers":
                 staff_text = f"✅ {staff_text}"
-            tab_buttons.append(InlineKeyboardButton(staff_text, callback_data=f"att_tab_teachers_{date_str}"))
+            tab_buttons.append((staff_text, encode_callback("att_tab", "teachers", date_str)))
 
         keyboard.append(tab_buttons)
 
     # Build student/teacher list
-    for student in students:
-        if user.role > ROLE_STUDENT:
+    member_rows = {}
+    for student_id, student_name in students:
+        if role > ROLE_STUDENT:
             # Edit mode
-            student_data = context.user_data["attendance_changes"].get(student.id, {})
-            student_status = student_data.get('status', False)
-            student_note = student_data.get('note')
+            student_data = context.user_data["attendance_changes"].get(student_id, {})
         else:
             # View mode (students can only see their own record)
-            existing = get_attendance(student.id, class_id, date_str)
-            student_status = existing.status if existing else False
-            student_note = existing.note if existing else None
-        
-        if student_status:
-            # Present - show checkmark
-            button_text = f"✅ {student.name}"
-        else:
-            # Absent - show X and reason if exists
-            if student_note:
-                # Truncate long reasons for button display
-                short_note = student_note[:15] + "..." if len(student_note) > 15 else student_note
-                button_text = f"❌ {student.name} • {short_note}"
-            else:
-                button_text = f"❌ {student.name}"
-        
-        if user.role > ROLE_STUDENT:
-            # Edit mode - show interactive buttons
-            if student_status:
-                # Present - single toggle button
-                keyboard.append([InlineKeyboardButton(
-                    button_text,
-                    callback_data=f"att_toggle_{student.id}_{date_str}"
-                )])
-            else:
-                # If absent, two buttons in same row
-                keyboard.append([
-                    InlineKeyboardButton(
-                        button_text,
-                        callback_data=f"att_toggle_{student.id}_{date_str}"
-                    ),
-                    InlineKeyboardButton(
-                        get_translation(lang, 'btn_edit_reason'),
-                        callback_data=f"att_reason_{student.id}_{date_str}"
-                    )
-                ])
-        else:
-            # View mode - show read-only buttons
-            keyboard.append([InlineKeyboardButton(
-                button_text,
-                callback_data="menu_main"  # Just go back to main menu
-            )])
-        # Add bulk action buttons (only for editors)
-    if user.role > ROLE_STUDENT:
+            student_data = existing.get(student_id, {})
+        member_rows[student_id] = len(keyboard)
+        keyboard.append(
+            _member_row(lang, student_id, student_name, student_data, date_str, role > ROLE_STUDENT)
+        )
+
+    # Page navigation
+    page_buttons = build_page_buttons(
+        lang,
+        lambda number: encode_callback("att_page", group, date_str, number),
+        roster["page"],
+        roster["pages"],
+    )
+    if page_buttons:
+        keyboard.append([(button.text, button.callback_data) for button in page_buttons])
+
+    # Add bulk action buttons (only for editors)
+    if role > ROLE_STUDENT:
         keyboard.append([
-            InlineKeyboardButton(
+            (
                 get_translation(lang, 'btn_mark_all_present'),
-                callback_data=f"att_confirm_present_{group}_{date_str}"
+                encode_callback("att_confirm", "present", group, date_str)
             ),
-            InlineKeyboardButton(
+            (
                 get_translation(lang, 'btn_mark_all_absent'),
-                callback_data=f"att_confirm_absent_{group}_{date_str}"
+                encode_callback("att_confirm", "absent", group, date_str)
             )
         ])
 
         # Add save and cancel buttons
         keyboard.append([
-            InlineKeyboardButton(
+            (
                 get_translation(lang, 'btn_save'),
-                callback_data=f"att_save_{group}_{date_str}"
+                encode_callback("att_save", group, date_str)
             ),
-            InlineKeyboardButton(
+            (
                 get_translation(lang, 'btn_cancel'),
-                callback_data="attendance_start"
+                "attendance_start"
             )
         ])
     else:
         # For students, just show back button
-        keyboard.append([InlineKeyboardButton(
+        keyboard.append([(
             get_translation(lang, 'btn_back'),
-            callback_data="menu_main"
+            "menu_main"
         )])
+
+    # Keep the rendered view with the roster for toggles on this message
+    roster["view"] = {
+        "message": _message_key(update),
+        "lang": lang,
+        "head": head,
+        "tail": tail,
+        "keyboard": keyboard,
+        "member_rows": member_rows,
+    }
+    await _send_view(update, context, roster)
+
+
+def _member_row(lang: str, student_id: int, student_name: str, student_data: dict, date_str: str, editable: bool) -> list:
+    """Build one user's keyboard row as (text, callback_data) pairs."""
+    student_status = student_data.get('status', False)
+    student_note = student_data.get('note')
+
+    if student_status:
+        # Present - show checkmark
+        button_text = f"✅ {student_name}"
+    else:
+        # Absent - show X and reason if exists
+        if student_note:
+            # Truncate long reasons for button display
+            short_note = student_note[:15] + "..." if len(student_note) > 15 else student_note
+            button_text = f"❌ {student_name} • {short_note}"
+        else:
+            button_text = f"❌ {student_name}"
+
+    if not editable:
+        # View mode - show read-only buttons
+        return [(button_text, "menu_main")]  # Just go back to main menu
+
+    # Edit mode - show interactive buttons
+    row = [(button_text, encode_callback("att_toggle", student_id, date_str))]
+    if not student_status:
+        # If absent, two buttons in same row
+        row.append((
+            get_translation(lang, 'btn_edit_reason'),
+            encode_callback("att_reason", student_id, date_str)
+        ))
+    return row
+
+
+def _counter_line(context: ContextTypes.DEFAULT_TYPE, roster: dict, lang: str) -> str:
+    """Count present/absent over the whole roster, including pending changes."""
+    present_count = roster["present_total"]
+    if roster["viewer_role"] > ROLE_STUDENT:
+        # For editors, apply pending changes to the saved totals
+        changes = context.user_data["attendance_changes"]
+        for student_id, saved_status in roster["baseline"].items():
+            present_count += changes.get(student_id, {}).get('status', saved_status) - saved_status
     
+    total = roster["total"]
+    absent_count = total - present_count
+
+    line = f"📊 {present_count}/{total} " + get_translation(lang, 'present')
+    line += f" | {absent_count} " + get_translation(lang, 'absent') + "\n\n"
+    return line
+
+
+def _message_key(update: Update) -> Optional[list]:
+    """Get [chat_id, message_id] of the message the interface is shown in."""
+    message = getattr(update.callback_query, "message", None)
+    if message is None:
+        return None
+    return [message.chat_id, message.message_id]
+
+
+async def _send_view(update: Update, context: ContextTypes.DEFAULT_TYPE, roster: dict):
+    """Edit the message to show the roster's rendered view."""
+    view = roster["view"]
+    message = view["head"] + _counter_line(context, roster, view["lang"]) + view["tail"]
+    keyboard = [
+        [InlineKeyboardButton(text, callback_data=data) for text, data in row]
+        for row in view["keyboard"]
+    ]
+
     try:
         await update.callback_query.edit_message_text(
             message,
@@ -304,23 +432,52 @@ async def show_attendance_interface(update: Update, context: ContextTypes.DEFAUL
             raise
 
 
+async def _patch_member_row(update: Update, context: ContextTypes.DEFAULT_TYPE, student_id: int, date_str: str) -> bool:
+    """
+    Re-render one user's row of the shown view and send it.
+
+    Returns:
+        False if the message does not show a cached view for this date,
+        in which case the whole interface has to be rendered
+    """
+    roster = context.user_data.get("attendance_roster")
+    view = roster.get("view") if roster else None
+    if (
+        not view
+        or roster["date"] != date_str
+        or view["message"] != _message_key(update)
+        or view["lang"] != get_user_lang(context)
+        or student_id not in view["member_rows"]
+    ):
+        return False
+
+    index = view["member_rows"][student_id]
+    student_name = dict(roster["members"])[student_id]
+    view["keyboard"][index] = _member_row(
+        view["lang"],
+        student_id,
+        student_name,
+        context.user_data["attendance_changes"][student_id],
+        date_str,
+        editable=True,
+    )
+    # Rapid taps on the same message are coalesced into one edit per window
+    await edit_coalescer.edit(
+        tuple(view["message"]), lambda: _send_view(update, context, roster)
+    )
+    return True
+
+
 @require_role(ROLE_STUDENT + 1)
-async def toggle_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def toggle_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE, student_id: int, date_str: str):
     """
     Toggle individual student attendance status.
     If toggling to absent, optionally show reason menu.
-    Callback: att_toggle_STUDENT_ID_DATE
+    Callback: att_toggle(student_id, date)
     """
     query = update.callback_query
     await query.answer()
     
-    lang = get_user_lang(context)
-    
-    # Parse callback data
-    parts = query.data.split("_")
-    student_id = int(parts[2])
-    date_str = parts[3]
-    
     # Toggle status
     if "attendance_changes" not in context.user_data:
         context.user_data["attendance_changes"] = {}
@@ -347,39 +504,30 @@ async def toggle_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if new_status:
         context.user_data["attendance_changes"][student_id]['note'] = None
     
-    # Refresh the interface
+    # Refresh the toggled row, or the whole interface if it is not cached
+    if await _patch_member_row(update, context, student_id, date_str):
+        return
     group = context.user_data.get("current_group", "students")
     await show_attendance_interface(update, context, date_str, group)
 
 
-async def mark_all_present(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def mark_all_present(update: Update, context: ContextTypes.DEFAULT_TYPE, group: str, date_str: str):
     """
     Mark all students as present.
-    Callback: att_all_present_GROUP_DATE
+    Callback: att_all_present(group, date)
     """
     query = update.callback_query
     await query.answer()
 
-    parts = query.data.split("_")
-    group = parts[3]
-    date_str = "_".join(parts[4:])
-    user_id = context.user_data.get("telegram_id")
-
-    # Get user
-    user = get_user_by_telegram_id(user_id)
-
-    # Get users based on group
-    if group == "students":
-        students = get_users_by_class(user.class_id)
-    else:
-        if user.role <= 2:
-            return
-        target_role = user.role - 1
-        students = get_users_by_role(target_role)
+    # Users on the interface, from the roster snapshot
+    roster, error = await load_attendance_roster(context, date_str, group)
+    if error or roster["viewer_role"] <= ROLE_STUDENT:
+        return
+    await load_full_roster(context, roster)
 
     # Mark all present (clear reasons)
-    for student in students:
-        context.user_data["attendance_changes"][student.id] = {
+    for student_id in roster["baseline"]:
+        context.user_data["attendance_changes"][student_id] = {
             'status': True,
             'note': None
         }
@@ -388,62 +536,47 @@ async def mark_all_present(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await show_attendance_interface(update, context, date_str, group)
 
 
-async def mark_all_absent(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def mark_all_absent(update: Update, context: ContextTypes.DEFAULT_TYPE, group: str, date_str: str):
     """
     Mark all students as absent.
-    Callback: att_all_absent_GROUP_DATE
+    Callback: att_all_absent(group, date)
     """
     query = update.callback_query
     await query.answer()
 
-    parts = query.data.split("_")
-    group = parts[3]
-    date_str = "_".join(parts[4:])
-    user_id = context.user_data.get("telegram_id")
-
-    # Get user
-    user = get_user_by_telegram_id(user_id)
-
-    # Get users based on group
-    if group == "students":
-        students = get_users_by_class(user.class_id)
-    else:
-        if user.role <= 2:
-            return
-        target_role = user.role - 1
-        students = get_users_by_role(target_role)
+    # Users on the interface, from the roster snapshot
+    roster, error = await load_attendance_roster(context, date_str, group)
+    if error or roster["viewer_role"] <= ROLE_STUDENT:
+        return
+    await load_full_roster(context, roster)
 
     # Mark all absent (keep existing reasons)
-    for student in students:
-        if student.id not in context.user_data["attendance_changes"]:
-            context.user_data["attendance_changes"][student.id] = {
+    for student_id in roster["baseline"]:
+        if student_id not in context.user_data["attendance_changes"]:
+            context.user_data["attendance_changes"][student_id] = {
                 'status': False,
                 'note': None
             }
         else:
-            context.user_data["attendance_changes"][student.id]['status'] = False
+            context.user_data["attendance_changes"][student_id]['status'] = False
 
     # Refresh interface
     await show_attendance_interface(update, context, date_str, group)
 
 
-async def save_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def save_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE, group: str, date_str: str):
     """
     Save all attendance changes to database.
     Now includes absence reasons.
-    Callback: att_save_GROUP_DATE
+    Callback: att_save(group, date)
     """
     query = update.callback_query
     await query.answer()
 
     lang = get_user_lang(context)
-    parts = query.data.split("_")
-    group = parts[2]
-    date_str = "_".join(parts[3:])
-    user_id = context.user_data.get("telegram_id")
 
     # Get user
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
 
     if not user:
         await query.edit_message_text(
@@ -454,6 +587,11 @@ async def save_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Get class_id from context
     class_id = context.user_data.get("current_class_id")
 
+    # Users on pages that were never shown are saved with their current state
+    roster = context.user_data.get("attendance_roster")
+    if roster and roster["date"] == date_str and roster["group"] == group:
+        await load_full_roster(context, roster)
+
     # Get attendance changes
     changes = context.user_data.get("attendance_changes", {})
 
@@ -464,28 +602,43 @@ async def save_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    # Save each attendance record
-    saved_count = 0
-    error_count = 0
-
-    for student_id, data in changes.items():
-        success, attendance, error = mark_attendance(
-            user_id=student_id,
-            class_id=class_id,
-            attendance_date=date_str,
-            status=data['status'],
-            marked_by=user.id,
-            note=data.get('note')
-        )
+    # Save all attendance records in one transaction
+    rows = [
+        (student_id, class_id, date_str, data['status'], data.get('note'), user.id)
+        for student_id, data in changes.items()
+    ]
+    success, saved_count, error = await aio.mark_attendance_batch(rows)
 
-        if success:
-            saved_count += 1
-        else:
-            error_count += 1
-            logger.error(f"Failed to save attendance for student {student_id}: {error}")
+    if not success:
+        # Nothing was saved: keep the marks so the user can save them again
+        logger.error(f"Failed to save attendance for {len(rows)} users on {date_str}: {error}")
+        keyboard = [
+            [
+                InlineKeyboardButton(
+                    "🔄 " + get_translation(lang, "retry"),
+                    callback_data=encode_callback("att_save", group, date_str)
+                )
+            ],
+            [
+                InlineKeyboardButton(
+                    "⬅️ " + get_translation(lang, "back"),
+                    callback_data=encode_callback("att_tab", group, date_str)
+                )
+            ]
+        ]
+        message = f"❌ {get_translation(lang, 'attendance_save_failed')}\n\n"
+        message += f"📅 {format_date_with_day(date_str, lang)}"
+        if error != "unknown_error":
+            message += f"\n{get_translation(lang, error)}"
+        await query.edit_message_text(
+            message,
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return
 
-    # Clear attendance changes
+    # Clear attendance changes only once they are saved
     context.user_data.pop("attendance_changes", None)
+    context.user_data.pop("attendance_roster", None)
     context.user_data.pop("selected_date", None)
     
     # Show success message
@@ -493,9 +646,6 @@ async def save_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message += f"📅 {format_date_with_day(date_str, lang)}\n"
     message += f"💾 {get_translation(lang, 'saved')}: {saved_count}\n"
     
-    if error_count > 0:
-        message += f"❌ {get_translation(lang, 'errors')}: {error_count}\n"
-    
     # Calculate statistics
     present = sum(1 for data in changes.values() if data['status'])
     absent = len(changes) - present
@@ -525,21 +675,43 @@ async def save_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def switch_attendance_tab(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def switch_attendance_tab(update: Update, context: ContextTypes.DEFAULT_TYPE, group: str, date_str: str):
     """
     Switch attendance group tab.
-    Callback: att_tab_GROUP_DATE
+    Callback: att_tab(group, date)
     """
     query = update.callback_query
     await query.answer()
 
-    parts = query.data.split("_")
-    group = parts[2]
-    date_str = "_".join(parts[3:])
-
     await show_attendance_interface(update, context, date_str, group)
 
 
+async def change_attendance_page(update: Update, context: ContextTypes.DEFAULT_TYPE, group: str, date_str: str, page: int):
+    """
+    Show another page of the attendance roster.
+    Callback: att_page(group, date, page)
+    """
+    query = update.callback_query
+    await query.answer()
+
+    await show_attendance_interface(update, context, date_str, group, page=page)
+
+
+async def discard_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Drop a coalesced toggle edit before another button edits the message.
+
+    Runs in handler group -1 for every callback query except toggles, so a
+    late edit cannot overwrite e.g. the save confirmation or reason menu.
+    """
+    query = update.callback_query
+    if callback_codec.action_of(query.data) == "att_toggle":
+        return
+    message = query.message
+    if message is not None:
+        await edit_coalescer.discard((message.chat_id, message.message_id))
+
+
 def register_attendance_mark_handlers(application):
     """
     Register attendance marking handlers.
@@ -547,34 +719,15 @@ def register_attendance_mark_handlers(application):
     Args:
         application: Telegram Application instance
     """
-    # Toggle individual student
-    application.add_handler(CallbackQueryHandler(
-        toggle_attendance,
-        pattern="^att_toggle_[0-9]+_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-
-    # Mark all present
-    application.add_handler(CallbackQueryHandler(
-        mark_all_present,
-        pattern="^att_all_present_(students|teachers)_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-
-    # Mark all absent
-    application.add_handler(CallbackQueryHandler(
-        mark_all_absent,
-        pattern="^att_all_absent_(students|teachers)_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-
-    # Save attendance
-    application.add_handler(CallbackQueryHandler(
-        save_attendance,
-        pattern="^att_save_(students|teachers)_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-
-    # Switch tab
-    application.add_handler(CallbackQueryHandler(
-        switch_attendance_tab,
-        pattern="^att_tab_(students|teachers)_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
+    # Drop pending toggle edits before any other button edits the message
+    application.add_handler(CallbackQueryHandler(discard_pending_edit), group=-1)
+
+    # Encoded callbacks (see utils.callbacks)
+    callback_codec.register_handler("att_toggle", toggle_attendance)
+    callback_codec.register_handler("att_all_present", mark_all_present)
+    callback_codec.register_handler("att_all_absent", mark_all_absent)
+    callback_codec.register_handler("att_save", save_attendance)
+    callback_codec.register_handler("att_tab", switch_attendance_tab)
+    callback_codec.register_handler("att_page", change_attendance_page)
 
     logger.info("Attendance marking handlers registered")
@@ -11,11 +11,11 @@ Absence reason handlers for attendance marking.
 
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import ContextTypes, CallbackQueryHandler, MessageHandler, filters
+from telegram.ext import ContextTypes, MessageHandler, filters
 
 from config import ROLE_TEACHER
 from middleware.auth import require_role, get_user_lang
-from utils import get_translation, validate_note
+from utils import get_translation, validate_note, callback_codec, encode_callback
 
 logger = logging.getLogger(__name__)
 
@@ -24,21 +24,16 @@ WAITING_FOR_CUSTOM_REASON = 2
 
 
 @require_role(ROLE_TEACHER)
-async def show_reason_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_reason_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, student_id: int, date_str: str):
     """
     Show absence reason selection menu.
-    Callback: att_reason_STUDENT_ID_DATE
+    Callback: att_reason(student_id, date)
     """
     query = update.callback_query
     await query.answer()
     
     lang = get_user_lang(context)
     
-    # Parse callback data
-    parts = query.data.split("_")
-    student_id = int(parts[2])
-    date_str = parts[3]
-    
     # Store context for later
     context.user_data["pending_reason"] = {
         "student_id": student_id,
@@ -46,8 +41,8 @@ async def show_reason_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     }
     
     # Get student name from attendance_changes
-    from database.operations import get_user_by_id
-    student = get_user_by_id(student_id)
+    from database.operations import aio
+    student = await aio.get_user_by_id(student_id)
     student_name = student.name if student else f"ID {student_id}"
     
     # Build message
@@ -60,23 +55,23 @@ async def show_reason_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [
         [InlineKeyboardButton(
             get_translation(lang, 'sick'),
-            callback_data=f"reason_sick_{student_id}_{date_str}"
+            callback_data=encode_callback("reason_set", "sick", student_id, date_str)
         )],
         [InlineKeyboardButton(
             get_translation(lang, 'travel'),
-            callback_data=f"reason_travel_{student_id}_{date_str}"
+            callback_data=encode_callback("reason_set", "travel", student_id, date_str)
         )],
         [InlineKeyboardButton(
             get_translation(lang, 'excused'),
-            callback_data=f"reason_excused_{student_id}_{date_str}"
+            callback_data=encode_callback("reason_set", "excused", student_id, date_str)
         )],
         [InlineKeyboardButton(
             get_translation(lang, 'custom'),
-            callback_data=f"reason_custom_{student_id}_{date_str}"
+            callback_data=encode_callback("reason_custom", student_id, date_str)
         )],
         [InlineKeyboardButton(
             f"❌ {get_translation(lang, 'cancel')}",
-            callback_data=f"att_date_{date_str}"
+            callback_data=encode_callback("att_date", date_str)
         )]
     ]
     
@@ -87,22 +82,16 @@ async def show_reason_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 @require_role(ROLE_TEACHER)
-async def select_predefined_reason(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def select_predefined_reason(update: Update, context: ContextTypes.DEFAULT_TYPE, reason_type: str, student_id: int, date_str: str):
     """
     Handle predefined reason selection (sick/travel/excused).
-    Callback: reason_TYPE_STUDENT_ID_DATE
+    Callback: reason_set(reason_type, student_id, date)
     """
     query = update.callback_query
     await query.answer()
     
     lang = get_user_lang(context)
     
-    # Parse callback data
-    parts = query.data.split("_")
-    reason_type = parts[1]  # sick, travel, excused
-    student_id = int(parts[2])
-    date_str = parts[3]
-    
     # Get translated reason
     reason_text = get_translation(lang, reason_type)
     
@@ -133,21 +122,16 @@ async def select_predefined_reason(update: Update, context: ContextTypes.DEFAULT
 
 
 @require_role(ROLE_TEACHER)
-async def request_custom_reason(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def request_custom_reason(update: Update, context: ContextTypes.DEFAULT_TYPE, student_id: int, date_str: str):
     """
     Request custom absence reason input.
-    Callback: reason_custom_STUDENT_ID_DATE
+    Callback: reason_custom(student_id, date)
     """
     query = update.callback_query
     await query.answer()
     
     lang = get_user_lang(context)
     
-    # Parse callback data
-    parts = query.data.split("_")
-    student_id = int(parts[2])
-    date_str = parts[3]
-    
     # Store context
     context.user_data["pending_reason"] = {
         "student_id": student_id,
@@ -156,8 +140,8 @@ async def request_custom_reason(update: Update, context: ContextTypes.DEFAULT_TY
     context.user_data["conversation_state"] = WAITING_FOR_CUSTOM_REASON
     
     # Get student name
-    from database.operations import get_user_by_id
-    student = get_user_by_id(student_id)
+    from database.operations import aio
+    student = await aio.get_user_by_id(student_id)
     student_name = student.name if student else f"ID {student_id}"
     
     # Show input instructions
@@ -168,7 +152,7 @@ async def request_custom_reason(update: Update, context: ContextTypes.DEFAULT_TY
     
     keyboard = [[InlineKeyboardButton(
         f"❌ {get_translation(lang, 'cancel')}",
-        callback_data=f"att_date_{date_str}"
+        callback_data=encode_callback("att_date", date_str)
     )]]
     
     await query.edit_message_text(
@@ -254,44 +238,29 @@ async def receive_custom_reason(update: Update, context: ContextTypes.DEFAULT_TY
 
 
 @require_role(ROLE_TEACHER)
-async def edit_existing_reason(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def edit_existing_reason(update: Update, context: ContextTypes.DEFAULT_TYPE, student_id: int, date_str: str):
     """
     Edit an existing absence reason.
-    Callback: edit_reason_STUDENT_ID_DATE
+    Callback: edit_reason(student_id, date)
     """
     query = update.callback_query
     await query.answer()
     
-    # Redirect to reason menu
-    # Change callback data format to match show_reason_menu
-    parts = query.data.split("_")
-    student_id = parts[2]
-    date_str = parts[3]
-    
-    # Create new callback data
-    context.user_data["callback_data"] = f"att_reason_{student_id}_{date_str}"
-    
     # Show reason menu
-    update.callback_query.data = f"att_reason_{student_id}_{date_str}"
-    await show_reason_menu(update, context)
+    await show_reason_menu(update, context, student_id, date_str)
 
 
 @require_role(ROLE_TEACHER)
-async def clear_reason(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def clear_reason(update: Update, context: ContextTypes.DEFAULT_TYPE, student_id: int, date_str: str):
     """
     Clear absence reason for a student.
-    Callback: clear_reason_STUDENT_ID_DATE
+    Callback: clear_reason(student_id, date)
     """
     query = update.callback_query
     await query.answer()
     
     lang = get_user_lang(context)
     
-    # Parse callback data
-    parts = query.data.split("_")
-    student_id = int(parts[2])
-    date_str = parts[3]
-    
     # Clear reason
     if "attendance_changes" in context.user_data:
         if student_id in context.user_data["attendance_changes"]:
@@ -317,35 +286,12 @@ def register_attendance_reason_handlers(application):
     Args:
         application: Telegram Application instance
     """
-    # Show reason menu
-    application.add_handler(CallbackQueryHandler(
-        show_reason_menu,
-        pattern="^att_reason_[0-9]+_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-    
-    # Select predefined reason
-    application.add_handler(CallbackQueryHandler(
-        select_predefined_reason,
-        pattern="^reason_(sick|travel|excused)_[0-9]+_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-    
-    # Request custom reason
-    application.add_handler(CallbackQueryHandler(
-        request_custom_reason,
-        pattern="^reason_custom_[0-9]+_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-    
-    # Edit existing reason
-    application.add_handler(CallbackQueryHandler(
-        edit_existing_reason,
-        pattern="^edit_reason_[0-9]+_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
-    
-    # Clear reason
-    application.add_handler(CallbackQueryHandler(
-        clear_reason,
-        pattern="^clear_reason_[0-9]+_[0-9]{4}-[0-9]{2}-[0-9]{2}$"
-    ))
+    # Encoded callbacks (see utils.callbacks)
+    callback_codec.register_handler("att_reason", show_reason_menu)
+    callback_codec.register_handler("reason_set", select_predefined_reason)
+    callback_codec.register_handler("reason_custom", request_custom_reason)
+    callback_codec.register_handler("edit_reason", edit_existing_reason)
+    callback_codec.register_handler("clear_reason", clear_reason)
     
     # Receive custom reason text
     application.add_handler(MessageHandler(
@@ -11,15 +11,19 @@ Handlers for displaying attendance statistics with reason breakdown.
 
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
-from middleware.auth import require_role, get_user_lang
-from utils import get_translation
+from middleware.auth import require_role, get_user_lang, get_current_user
+from utils import get_translation, get_current_date, get_month_start, callback_router
+from utils.date_utils import get_month_name
 from config import ROLE_TEACHER
-from database.operations import get_attendance_stats_by_class, get_user_by_telegram_id
+from database.operations import aio
 
 logger = logging.getLogger(__name__)
 
+# Most common absence reasons listed individually; the rest are summed
+REASON_STATS_TOP_N = 10
+
 
 @require_role(ROLE_TEACHER)
 async def show_reason_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -31,20 +35,26 @@ async def show_reason_statistics(update: Update, context: ContextTypes.DEFAULT_T
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher's class ID
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
     if not teacher or not teacher.class_id:
         await query.edit_message_text(get_translation(lang, "no_class_assigned"))
         return
 
-    # Get statistics
-    stats = get_attendance_stats_by_class(teacher.class_id)
+    # Get statistics for the current month
+    today = get_current_date()
+    stats = await aio.get_attendance_stats_by_class(
+        teacher.class_id,
+        start_date=get_month_start(from_date=today),
+        end_date=today,
+        top_n=REASON_STATS_TOP_N,
+    )
 
     # Build message
     message = f"📊 {get_translation(lang, 'reason_statistics')}\n"
     message += f"🏫 {get_translation(lang, 'class')}: {teacher.class_id}\n"
+    message += f"📅 {get_month_name(today.month, lang)} {today.year}\n"
     message += "=" * 30 + "\n\n"
 
     if not stats or not stats['total_absent']:
@@ -57,6 +67,12 @@ async def show_reason_statistics(update: Update, context: ContextTypes.DEFAULT_T
             percentage = (count / stats['total_with_reason']) * 100 if stats['total_with_reason'] > 0 else 0
             message += f"- {reason}: {count} ({percentage:.1f}%)\n"
 
+        # Reasons beyond the top N
+        other = stats['total_with_reason'] - sum(stats['reason_breakdown'].values())
+        if other > 0:
+            percentage = (other / stats['total_with_reason']) * 100
+            message += f"- {get_translation(lang, 'other_reasons')}: {other} ({percentage:.1f}%)\n"
+
     # Build keyboard
     keyboard = [
         [
@@ -80,9 +96,6 @@ def register_attendance_stats_handlers(application):
     Args:
         application: Telegram Application instance
     """
-    application.add_handler(CallbackQueryHandler(
-        show_reason_statistics,
-        pattern="^teacher_reason_stats$"
-    ))
+    callback_router.add("teacher_reason_stats", show_reason_statistics)
 
     logger.info("Attendance statistics handlers registered")
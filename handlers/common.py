@@ -10,8 +10,10 @@ Common handlers for basic bot commands.
 """
 
 import logging
+from typing import List, Optional
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
+from telegram.ext import ContextTypes, CommandHandler
 
 from config import (
     ROLE_STUDENT,
@@ -19,65 +21,14 @@ from config import (
     ROLE_LEADER,
     ROLE_MANAGER,
     ROLE_DEVELOPER,
-    AUTHORIZED_USERS,
 )
-from middleware.auth import require_auth, load_user_context, get_user_lang
+from middleware.auth import require_auth, load_user_context, get_user_lang, get_permissions
 from middleware.language import load_language_preference
-from utils import get_translation, is_authorized
-from database.operations import create_user, get_user_by_telegram_id
+from utils import cached_keyboard, extend_keyboard, get_translation, callback_router
 
 logger = logging.getLogger(__name__)
 
 
-async def auto_register_user(telegram_id: int, telegram_user) -> bool:
-    """
-    Auto-register user from .env USERS if not in database.
-
-    Args:
-        telegram_id: User's Telegram ID
-        telegram_user: Telegram User object
-
-    Returns:
-        True if user was created or already exists
-    """
-    # Check if user already in database
-    existing_user = get_user_by_telegram_id(telegram_id)
-    if existing_user:
-        logger.debug(f"User {telegram_id} already in database")
-        return True
-
-    # Check if user in AUTHORIZED_USERS
-    if telegram_id not in AUTHORIZED_USERS:
-        logger.warning(f"User {telegram_id} not in AUTHORIZED_USERS")
-        return False
-
-    # Get role and class_id from config
-    role, class_id = AUTHORIZED_USERS[telegram_id]
-
-    # Get name from Telegram
-    name = telegram_user.first_name
-    if telegram_user.last_name:
-        name += f" {telegram_user.last_name}"
-
-    # Create user in database
-    success, user, error = create_user(
-        telegram_id=telegram_id,
-        name=name,
-        role=role,
-        class_id=class_id,
-        language_preference="ar",  # Default to Arabic
-    )
-
-    if success:
-        logger.info(
-            f"✅ Auto-registered user {telegram_id} (role={role}, class={class_id})"
-        )
-        return True
-    else:
-        logger.error(f"❌ Failed to auto-register user {telegram_id}: {error}")
-        return False
-
-
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Start command handler - entry point for all users.
@@ -85,8 +36,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     user = update.effective_user
 
+    # Resolved by the authentication stage (registers .env users if needed)
+    permissions = await get_permissions(update, context)
+
     # Check authorization
-    if not is_authorized(user.id):
+    if not permissions.is_authorized:
         lang = context.user_data.get("language", "ar")
         await update.message.reply_text(
             get_translation(lang, "not_authorized")
@@ -96,9 +50,6 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info(f"Unauthorized start attempt by {user.id}")
         return
 
-    # Auto-register user if not in database
-    await auto_register_user(user.id, user)
-
     # Load user context
     await load_user_context(update, context)
     await load_language_preference(update, context)
@@ -208,6 +159,7 @@ async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data.pop("conversation_state", None)
     context.user_data.pop("temp_data", None)
     context.user_data.pop("attendance_changes", None)
+    context.user_data.pop("attendance_roster", None)
     context.user_data.pop("selected_date", None)
 
     await update.message.reply_text(get_translation(lang, "ok"))
@@ -215,13 +167,19 @@ async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await show_main_menu(update, context)
 
 
-async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """
-    Show main menu based on user role.
+@cached_keyboard
+def build_main_menu_keyboard(role: int, lang: str) -> InlineKeyboardMarkup:
     """
-    lang = get_user_lang(context)
-    role = context.user_data.get("role", 1)
+    Build the main menu keyboard for a role (prebuilt for every role and
+    language at startup, see utils.keyboards).
+
+    Args:
+        role: User role (1-5)
+        lang: Language code
 
+    Returns:
+        Main menu markup
+    """
     keyboard = []
 
     # Student menu (Role 1)
@@ -386,7 +344,27 @@ async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ]
     )
 
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def show_main_menu(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    extra_rows: Optional[List[List[InlineKeyboardButton]]] = None,
+):
+    """
+    Show main menu based on user role.
+
+    Args:
+        update: Telegram update
+        context: Telegram context
+        extra_rows: Optional per-user button rows shown below the role's
+            prebuilt menu
+    """
+    lang = get_user_lang(context)
+    role = context.user_data.get("role", 1)
+
+    reply_markup = extend_keyboard(build_main_menu_keyboard(role, lang), extra_rows)
 
     message = get_translation(lang, "welcome")
 
@@ -408,6 +386,7 @@ async def back_to_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Clear any temporary data
     context.user_data.pop("attendance_changes", None)
+    context.user_data.pop("attendance_roster", None)
     context.user_data.pop("selected_date", None)
     context.user_data.pop("conversation_state", None)
     context.user_data.pop("temp_data", None)
@@ -456,14 +435,10 @@ def register_common_handlers(application):
     application.add_handler(CommandHandler("cancel", cancel_command))
 
     # Back button handlers
-    application.add_handler(
-        CallbackQueryHandler(back_to_main_menu, pattern="^back_main$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(back_to_main_menu, pattern="^menu_main$")
-    )
+    callback_router.add("back_main", back_to_main_menu)
+    callback_router.add("menu_main", back_to_main_menu)
 
     # Main menu callbacks
-    application.add_handler(CallbackQueryHandler(main_menu_callback, pattern="^menu_"))
+    callback_router.add_prefix("menu_", main_menu_callback)
 
     logger.info("Common handlers registered")
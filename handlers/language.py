@@ -12,11 +12,11 @@ Language selection handlers.
 import logging
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import CallbackQueryHandler, CommandHandler, ContextTypes
+from telegram.ext import CommandHandler, ContextTypes
 
 from middleware.auth import require_auth
 from middleware.language import set_language_preference
-from utils import get_translation
+from utils import get_translation, callback_router
 
 logger = logging.getLogger(__name__)
 
@@ -102,6 +102,6 @@ def register_language_handlers(application):
         application: Telegram Application instance
     """
     application.add_handler(CommandHandler("language", language_command))
-    application.add_handler(CallbackQueryHandler(language_callback, pattern="^lang_"))
+    callback_router.add_prefix("lang_", language_callback)
 
     logger.info("Language handlers registered")
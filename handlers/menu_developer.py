@@ -11,12 +11,12 @@ Developer menu handlers.
 
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
 from config import ROLE_DEVELOPER
 from middleware.auth import require_role, get_user_lang
 from database import get_table_counts
-from utils import get_translation
+from utils import get_translation, callback_router
 
 logger = logging.getLogger(__name__)
 
@@ -74,10 +74,10 @@ async def mimic_mode_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     lang = get_user_lang(context)
-    from database.operations import get_users_by_role
+    from database.operations import aio
     
     # Get available users to mimic
-    all_users = get_users_by_role(None)
+    all_users = await aio.get_users_by_role(None)
     
     message = f"🎭 {get_translation(lang, 'mimic_mode')}\n"
     message += f"👥 {len(all_users)} {get_translation(lang, 'total_users')}\n"
@@ -291,70 +291,25 @@ def register_developer_handlers(application):
         application: Telegram Application instance
     """
     # Main developer menus
-    application.add_handler(CallbackQueryHandler(
-        analytics_dashboard,
-        pattern="^developer_analytics$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        mimic_mode_menu,
-        pattern="^developer_mimic$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        system_management,
-        pattern="^developer_system$"
-    ))
+    callback_router.add("developer_analytics", analytics_dashboard)
+    callback_router.add("developer_mimic", mimic_mode_menu)
+    callback_router.add("developer_system", system_management)
     
     # Mimic mode sub-handlers
-    application.add_handler(CallbackQueryHandler(
-        mimic_students_list,
-        pattern="^mimic_students_list$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        mimic_teachers_list,
-        pattern="^mimic_teachers_list$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        mimic_leaders_list,
-        pattern="^mimic_leaders_list$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        mimic_managers_list,
-        pattern="^mimic_managers_list$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        mimic_developers_list,
-        pattern="^mimic_developers_list$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        mimic_search_user,
-        pattern="^mimic_search_user$"
-    ))
+    callback_router.add("mimic_students_list", mimic_students_list)
+    callback_router.add("mimic_teachers_list", mimic_teachers_list)
+    callback_router.add("mimic_leaders_list", mimic_leaders_list)
+    callback_router.add("mimic_managers_list", mimic_managers_list)
+    callback_router.add("mimic_developers_list", mimic_developers_list)
+    callback_router.add("mimic_search_user", mimic_search_user)
     
     # System management sub-handlers
-    application.add_handler(CallbackQueryHandler(
-        system_db_info,
-        pattern="^system_db_info$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        system_user_mgmt,
-        pattern="^system_user_mgmt$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        system_restart,
-        pattern="^system_restart$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        system_clean_logs,
-        pattern="^system_clean_logs$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        system_performance,
-        pattern="^system_performance$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        system_alerts,
-        pattern="^system_alerts$"
-    ))
+    callback_router.add("system_db_info", system_db_info)
+    callback_router.add("system_user_mgmt", system_user_mgmt)
+    callback_router.add("system_restart", system_restart)
+    callback_router.add("system_clean_logs", system_clean_logs)
+    callback_router.add("system_performance", system_performance)
+    callback_router.add("system_alerts", system_alerts)
     
     logger.info("Developer menu handlers registered")
 
@@ -369,9 +324,9 @@ async def mimic_students_list(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.answer()
 
     lang = get_user_lang(context)
-    from database.operations import get_users_by_role, ROLE_STUDENT
+    from database.operations import aio, ROLE_STUDENT
     
-    students = get_users_by_role(ROLE_STUDENT)
+    students = await aio.get_users_by_role(ROLE_STUDENT)
     
     message = f"👨‍🎓 {get_translation(lang, 'students')} ({len(students)})\n"
     message += "=" * 30 + "\n\n"
@@ -419,9 +374,9 @@ async def mimic_teachers_list(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.answer()
 
     lang = get_user_lang(context)
-    from database.operations import get_users_by_role, ROLE_TEACHER
+    from database.operations import aio, ROLE_TEACHER
     
-    teachers = get_users_by_role(ROLE_TEACHER)
+    teachers = await aio.get_users_by_role(ROLE_TEACHER)
     
     message = f"👨‍🏫 {get_translation(lang, 'teachers')} ({len(teachers)})\n"
     message += "=" * 30 + "\n\n"
@@ -462,9 +417,9 @@ async def mimic_leaders_list(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     lang = get_user_lang(context)
-    from database.operations import get_users_by_role, ROLE_LEADER
+    from database.operations import aio, ROLE_LEADER
     
-    leaders = get_users_by_role(ROLE_LEADER)
+    leaders = await aio.get_users_by_role(ROLE_LEADER)
     
     message = f"👑 {get_translation(lang, 'leaders')} ({len(leaders)})\n"
     message += "=" * 30 + "\n\n"
@@ -505,9 +460,9 @@ async def mimic_managers_list(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.answer()
 
     lang = get_user_lang(context)
-    from database.operations import get_users_by_role, ROLE_MANAGER
+    from database.operations import aio, ROLE_MANAGER
     
-    managers = get_users_by_role(ROLE_MANAGER)
+    managers = await aio.get_users_by_role(ROLE_MANAGER)
     
     message = f"👨‍💼 {get_translation(lang, 'managers')} ({len(managers)})\n"
     message += "=" * 30 + "\n\n"
@@ -548,9 +503,9 @@ async def mimic_developers_list(update: Update, context: ContextTypes.DEFAULT_TY
     await query.answer()
 
     lang = get_user_lang(context)
-    from database.operations import get_users_by_role, ROLE_DEVELOPER
+    from database.operations import aio, ROLE_DEVELOPER
     
-    developers = get_users_by_role(ROLE_DEVELOPER)
+    developers = await aio.get_users_by_role(ROLE_DEVELOPER)
     
     message = f"👨‍💻 {get_translation(lang, 'developers')} ({len(developers)})\n"
     message += "=" * 30 + "\n\n"
@@ -808,7 +763,39 @@ async def system_performance(update: Update, context: ContextTypes.DEFAULT_TYPE)
         message += f"💻 CPU Usage: {cpu_percent:.1f}%\n"
         message += f"🧠 Memory: {memory.percent:.1f}% ({memory.used//(1024**3)}GB/{memory.total//(1024**3)}GB)\n"
         message += f"💾 Disk: {disk.percent:.1f}% ({disk.used//(1024**3)}GB/{disk.total//(1024**3)}GB)\n"
-        message += f"🌐 Network: {network.bytes_sent//(1024*1024):.0f}MB sent, {network.bytes_recv//(1024*1024):.0f}MB received\n\n"
+        message += f"🌐 Network: {network.bytes_sent//(1024*1024):.0f}MB sent, {network.bytes_recv//(1024*1024):.0f}MB received\n"
+
+        # In-process user cache
+        from database.operations import get_user_cache_stats
+        cache = get_user_cache_stats()
+        hit_rate = f"{cache['hit_rate']:.1f}%" if cache['hit_rate'] is not None else "-"
+        message += f"🗃️ User cache: {cache['size']}/{cache['maxsize']} entries, {hit_rate} hits\n"
+
+        # Coalesced attendance toggle edits
+        from utils import edit_coalescer
+        edits = edit_coalescer.stats()
+        message += f"✏️ Message edits: {edits['sent']} sent, {edits['coalesced']} coalesced\n"
+
+        # Busiest callback routes
+        routes = callback_router.stats()[:5]
+        if routes:
+            message += "🧭 Callback routes (hits, avg/max ms):\n"
+            for route in routes:
+                message += (
+                    f"  • {route['route']}: {route['hits']}, "
+                    f"{route['avg_ms']:.1f}/{route['max_ms']:.1f}\n"
+                )
+
+        # Database thread pool (only used when the async engine is off)
+        from database import get_executor_stats, is_async_enabled
+        if not is_async_enabled():
+            pool = get_executor_stats()
+            message += (
+                f"🧵 DB threads: {pool['running']}/{pool['workers']} busy, "
+                f"{pool['queued']} queued, wait {pool['avg_wait_ms']:.1f}ms avg / "
+                f"{pool['max_wait_ms']:.1f}ms max\n"
+            )
+        message += "\n"
         
         # Performance recommendations
         if cpu_percent > 80:
@@ -11,11 +11,11 @@ Leader menu handlers.
 
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
 from config import ROLE_LEADER, ROLE_TEACHER
-from middleware.auth import require_role, get_user_lang
-from utils import get_translation
+from middleware.auth import require_role, get_user_lang, get_current_user
+from utils import get_translation, callback_router
 
 logger = logging.getLogger(__name__)
 
@@ -30,13 +30,12 @@ async def add_student_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
-    from database.operations import get_user_by_telegram_id, get_users_by_class
+    from database.operations import aio
     from config import ROLE_STUDENT
 
     # Get leader info
-    leader = get_user_by_telegram_id(user_id)
+    leader = await get_current_user(context)
 
     if not leader or not leader.class_id:
         message = get_translation(lang, "no_class_assigned")
@@ -46,7 +45,7 @@ async def add_student_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )]]
     else:
         # Get class members
-        all_members = get_users_by_class(leader.class_id)
+        all_members = await aio.get_users_by_class(leader.class_id)
         students = [m for m in all_members if m.role == ROLE_STUDENT]
         teachers = [m for m in all_members if m.role == ROLE_TEACHER]
         leaders = [m for m in all_members if m.role == ROLE_LEADER]
@@ -108,13 +107,12 @@ async def remove_student_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
-    from database.operations import get_user_by_telegram_id, get_users_by_class
+    from database.operations import aio
     from config import ROLE_STUDENT
 
     # Get leader info
-    leader = get_user_by_telegram_id(user_id)
+    leader = await get_current_user(context)
 
     if not leader or not leader.class_id:
         message = get_translation(lang, "no_class_assigned")
@@ -124,7 +122,7 @@ async def remove_student_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
         )]]
     else:
         # Get class members
-        all_members = get_users_by_class(leader.class_id)
+        all_members = await aio.get_users_by_class(leader.class_id)
         students = [m for m in all_members if m.role == ROLE_STUDENT]
 
         message = f"➖ {get_translation(lang, 'remove_student')}\n"
@@ -194,13 +192,12 @@ async def bulk_operations_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
-    from database.operations import get_user_by_telegram_id, get_users_by_class
+    from database.operations import aio
     from config import ROLE_STUDENT
 
     # Get leader info
-    leader = get_user_by_telegram_id(user_id)
+    leader = await get_current_user(context)
 
     if not leader or not leader.class_id:
         message = get_translation(lang, "no_class_assigned")
@@ -210,7 +207,7 @@ async def bulk_operations_menu(update: Update, context: ContextTypes.DEFAULT_TYP
         )]]
     else:
         # Get class members
-        all_members = get_users_by_class(leader.class_id)
+        all_members = await aio.get_users_by_class(leader.class_id)
         students = [m for m in all_members if m.role == ROLE_STUDENT]
 
         message = f"📋 {get_translation(lang, 'bulk_actions')}\n"
@@ -270,50 +267,22 @@ def register_leader_handlers(application):
     Args:
         application: Telegram Application instance
     """
-    application.add_handler(
-        CallbackQueryHandler(add_student_menu, pattern="^leader_add_student$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(remove_student_menu, pattern="^leader_remove_student$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(bulk_operations_menu, pattern="^leader_bulk_operations$")
-    )
+    callback_router.add("leader_add_student", add_student_menu)
+    callback_router.add("leader_remove_student", remove_student_menu)
+    callback_router.add("leader_bulk_operations", bulk_operations_menu)
     
     # Bulk operation handlers
-    application.add_handler(
-        CallbackQueryHandler(generate_attendance_report, pattern="^leader_bulk_attendance_report$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(class_statistics, pattern="^leader_bulk_class_statistics$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(send_message_to_all, pattern="^leader_bulk_send_message_to_all$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(export_class_list, pattern="^leader_bulk_export_class_list$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(attendance_summary, pattern="^leader_bulk_attendance_summary$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(class_settings, pattern="^leader_bulk_class_settings$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(bulk_mark_all_present, pattern="^leader_mark_all_present$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(bulk_mark_all_absent, pattern="^leader_mark_all_absent$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(confirm_remove_student, pattern="^leader_remove_confirm_[0-9]+$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(leader_manual_add, pattern="^leader_manual_add$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(leader_remove_execute, pattern="^leader_remove_execute_[0-9]+$")
-    )
+    callback_router.add("leader_bulk_attendance_report", generate_attendance_report)
+    callback_router.add("leader_bulk_class_statistics", class_statistics)
+    callback_router.add("leader_bulk_send_message_to_all", send_message_to_all)
+    callback_router.add("leader_bulk_export_class_list", export_class_list)
+    callback_router.add("leader_bulk_attendance_summary", attendance_summary)
+    callback_router.add("leader_bulk_class_settings", class_settings)
+    callback_router.add("leader_mark_all_present", bulk_mark_all_present)
+    callback_router.add("leader_mark_all_absent", bulk_mark_all_absent)
+    callback_router.add_prefix("leader_remove_confirm_", confirm_remove_student)
+    callback_router.add("leader_manual_add", leader_manual_add)
+    callback_router.add_prefix("leader_remove_execute_", leader_remove_execute)
 
     logger.info("Leader menu handlers registered")
 
@@ -500,9 +469,9 @@ async def confirm_remove_student(update: Update, context: ContextTypes.DEFAULT_T
     parts = query.data.split("_")
     student_id = int(parts[3])
 
-    from database.operations import get_user_by_id
+    from database.operations import aio
     
-    student = get_user_by_id(student_id)
+    student = await aio.get_user_by_id(student_id)
     if not student:
         message = get_translation(lang, "user_not_found")
     else:
@@ -576,11 +545,9 @@ async def leader_remove_execute(update: Update, context: ContextTypes.DEFAULT_TY
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get current user
-    from database.operations import get_user_by_telegram_id
-    leader = get_user_by_telegram_id(user_id)
+    leader = await get_current_user(context)
     
     if not leader or not leader.class_id:
         await query.edit_message_text(get_translation(lang, "access_denied"))
@@ -594,8 +561,8 @@ async def leader_remove_execute(update: Update, context: ContextTypes.DEFAULT_TY
         return
 
     # Execute removal
-    from database.operations import update_user
-    success = update_user(student_id, {"class_id": None})
+    from database.operations import aio
+    success = await aio.update_user(student_id, {"class_id": None})
 
     if success:
         message = f"✅ **Member Removed Successfully**\n\n"
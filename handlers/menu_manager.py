@@ -11,11 +11,11 @@ Manager menu handlers.
 
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
 from config import ROLE_MANAGER
-from middleware.auth import require_role, get_user_lang
-from utils import get_translation
+from middleware.auth import require_role, get_user_lang, get_current_user
+from utils import get_translation, callback_router
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +31,12 @@ async def broadcast_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     lang = get_user_lang(context)
     
-    from database.operations import get_users_by_role, get_user_by_telegram_id
+    from database.operations import aio
     
-    user_id = context.user_data.get("telegram_id")
-    manager = get_user_by_telegram_id(user_id)
+    manager = await get_current_user(context)
     
     # Get counts of different user types
-    all_users = get_users_by_role(None)  # Get all users
+    all_users = await aio.get_users_by_role(None)  # Get all users
     
     message = f"📢 {get_translation(lang, 'broadcast_message')}\n"
     message += f"👥 {len(all_users)} {get_translation(lang, 'total_users')}\n"
@@ -216,11 +215,11 @@ async def export_data_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     lang = get_user_lang(context)
     
-    from database.operations import get_users_by_role, get_all_attendance_records
+    from database.operations import aio
     
     # Get data statistics
-    all_users = get_users_by_role(None)
-    all_attendance = get_all_attendance_records()
+    all_users = await aio.get_users_by_role(None)
+    all_attendance = await aio.get_all_attendance_records()
     
     message = f"📤 {get_translation(lang, 'export_data')}\n"
     message += f"📊 {len(all_users)} {get_translation(lang, 'users')}, {len(all_attendance)} {get_translation(lang, 'attendance_records')}\n"
@@ -301,80 +300,29 @@ def register_manager_handlers(application):
         application: Telegram Application instance
     """
     # Main manager menus
-    application.add_handler(CallbackQueryHandler(
-        broadcast_menu,
-        pattern="^manager_broadcast$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        backup_menu,
-        pattern="^manager_backup$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        export_data_menu,
-        pattern="^manager_export$"
-    ))
+    callback_router.add("manager_broadcast", broadcast_menu)
+    callback_router.add("manager_backup", backup_menu)
+    callback_router.add("manager_export", export_data_menu)
     
     # Broadcast sub-handlers
-    application.add_handler(CallbackQueryHandler(
-        broadcast_to_all_users,
-        pattern="^manager_broadcast_all$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        broadcast_to_students,
-        pattern="^manager_broadcast_students$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        broadcast_to_teachers,
-        pattern="^manager_broadcast_teachers$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        broadcast_to_leaders,
-        pattern="^manager_broadcast_leaders$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        broadcast_urgent_message,
-        pattern="^manager_broadcast_urgent$"
-    ))
+    callback_router.add("manager_broadcast_all", broadcast_to_all_users)
+    callback_router.add("manager_broadcast_students", broadcast_to_students)
+    callback_router.add("manager_broadcast_teachers", broadcast_to_teachers)
+    callback_router.add("manager_broadcast_leaders", broadcast_to_leaders)
+    callback_router.add("manager_broadcast_urgent", broadcast_urgent_message)
     
     # Backup sub-handlers
-    application.add_handler(CallbackQueryHandler(
-        create_backup,
-        pattern="^manager_create_backup$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        restore_backup,
-        pattern="^manager_restore_backup$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        delete_old_backups,
-        pattern="^manager_delete_backups$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        backup_info,
-        pattern="^manager_backup_info$"
-    ))
+    callback_router.add("manager_create_backup", create_backup)
+    callback_router.add("manager_restore_backup", restore_backup)
+    callback_router.add("manager_delete_backups", delete_old_backups)
+    callback_router.add("manager_backup_info", backup_info)
     
     # Export sub-handlers
-    application.add_handler(CallbackQueryHandler(
-        export_users,
-        pattern="^manager_export_users$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        export_attendance,
-        pattern="^manager_export_attendance$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        export_class_stats,
-        pattern="^manager_export_stats$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        export_full_report,
-        pattern="^manager_export_report$"
-    ))
-    application.add_handler(CallbackQueryHandler(
-        export_csv,
-        pattern="^manager_export_csv$"
-    ))
+    callback_router.add("manager_export_users", export_users)
+    callback_router.add("manager_export_attendance", export_attendance)
+    callback_router.add("manager_export_stats", export_class_stats)
+    callback_router.add("manager_export_report", export_full_report)
+    callback_router.add("manager_export_csv", export_csv)
     
     logger.info("Manager menu handlers registered")
 
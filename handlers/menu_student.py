@@ -10,14 +10,12 @@ Student menu handlers.
 """
 
 import logging
-from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
-from middleware.auth import require_auth, get_user_lang
-from database.operations import get_user_by_telegram_id, get_user_attendance_history
-from database.connection import get_db
-from utils import get_translation, format_date_with_day, calculate_age
+from middleware.auth import require_auth, get_user_lang, get_current_user
+from database.operations import aio
+from utils import get_translation, format_date_with_day, calculate_age, callback_router
 
 logger = logging.getLogger(__name__)
 
@@ -32,17 +30,16 @@ async def view_my_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get user from database
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
 
     if not user:
         await query.edit_message_text(get_translation(lang, "user_not_found"))
         return
 
     # Get attendance history (last 10 records)
-    attendance_records = get_user_attendance_history(user.id, limit=10)
+    attendance_records = await aio.get_user_attendance_history(user.id, limit=10)
 
     if not attendance_records:
         message = get_translation(lang, "check_attendance") + "\n\n"
@@ -118,10 +115,9 @@ async def view_my_details(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get user from database
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
 
     if not user:
         await query.edit_message_text(get_translation(lang, "user_not_found"))
@@ -178,26 +174,21 @@ async def view_my_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get user from database
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
 
     if not user:
         await query.edit_message_text(get_translation(lang, "user_not_found"))
         return
 
-    # Get all attendance records for statistics
-    from database.operations import count_attendance
-    from datetime import date, timedelta
-
-    # Calculate date range (last 3 months)
-    end_date = date.today()
-    start_date = end_date - timedelta(days=90)
+    # Read the monthly statistics rows (current month and the two before)
+    from utils import get_month_start
 
-    present_count = count_attendance(user.id, True, start_date, end_date)
-    absent_count = count_attendance(user.id, False, start_date, end_date)
-    total = present_count + absent_count
+    stats = await aio.get_user_statistics(user.id, get_month_start(months_ago=2))
+    present_count = stats["present"]
+    absent_count = stats["absent"]
+    total = stats["total"]
 
     # Build statistics message
     message = f"📈 {get_translation(lang, 'my_statistics')}\n"
@@ -221,7 +212,8 @@ async def view_my_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
 
-    percentage = (present_count / total * 100) if total > 0 else 0
+    # Present out of the sessions held (unmarked sessions count as missed)
+    percentage = stats["percentage"]
 
     message += f"📊 {get_translation(lang, 'attendance_rate')}: {percentage:.1f}%\n\n"
 
@@ -263,10 +255,9 @@ async def edit_language(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get user from database
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
 
     if not user:
         await query.edit_message_text(get_translation(lang, "user_not_found"))
@@ -321,7 +312,7 @@ async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = context.user_data.get("telegram_id")
 
     # Get user from database
-    user = get_user_by_telegram_id(user_id)
+    user = await get_current_user(context)
 
     if not user:
         await query.edit_message_text(get_translation(lang, "user_not_found"))
@@ -341,11 +332,11 @@ async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Update user language
     try:
-        with get_db() as db:
-            db.execute(
-                "UPDATE users SET language_preference = ?, updated_at = ? WHERE id = ?",
-                (new_language, datetime.utcnow(), user.id)
-            )
+        success, _, error = await aio.update_user(
+            user_id, language_preference=new_language
+        )
+        if not success:
+            raise ValueError(error)
         
         # Update context language
         context.user_data["language"] = new_language
@@ -387,23 +378,11 @@ def register_student_handlers(application):
     Args:
         application: Telegram Application instance
     """
-    application.add_handler(
-        CallbackQueryHandler(view_my_attendance, pattern="^student_my_attendance$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(view_my_details, pattern="^student_my_details$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(view_my_statistics, pattern="^student_my_stats$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(edit_language, pattern="^student_edit_language$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(set_language, pattern="^student_set_language_ar$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(set_language, pattern="^student_set_language_en$")
-    )
+    callback_router.add("student_my_attendance", view_my_attendance)
+    callback_router.add("student_my_details", view_my_details)
+    callback_router.add("student_my_stats", view_my_statistics)
+    callback_router.add("student_edit_language", edit_language)
+    callback_router.add("student_set_language_ar", set_language)
+    callback_router.add("student_set_language_en", set_language)
 
     logger.info("Student menu handlers registered")
@@ -10,23 +10,31 @@ Teacher menu handlers.
 """
 
 import logging
+import re
 from datetime import date, timedelta
+from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
-
-from config import ROLE_TEACHER, ROLE_STUDENT
-from middleware.auth import require_role, get_user_lang, get_user_by_telegram_id
-from database.operations import (
-    get_user_by_telegram_id, get_users_by_class, 
-    get_attendance_stats_by_class, count_attendance,
-    get_class_attendance, get_attendance
+from telegram.ext import ContextTypes
+
+from config import ROLE_TEACHER, ROLE_STUDENT, STUDENTS_PER_PAGE
+from middleware.auth import require_role, get_user_lang, get_current_user
+from database.operations import aio
+from database.operations import session_calendar
+from utils import (
+    get_translation,
+    get_month_start,
+    format_date_with_day,
+    get_page_bounds,
+    build_page_buttons,
+    callback_router,
 )
-from database import get_db
-from utils import get_translation, get_last_saturday, get_next_saturday, format_date_with_day
 from handlers.attendance_stats import show_reason_statistics
 
 logger = logging.getLogger(__name__)
 
+# Attendance views show the class dates of the last RECENT_WEEKS weeks
+RECENT_WEEKS = 4
+
 
 @require_role(ROLE_TEACHER)
 async def mark_attendance_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -50,10 +58,9 @@ async def view_student_details(update: Update, context: ContextTypes.DEFAULT_TYP
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
 
     if not teacher or not teacher.class_id:
         message = (
@@ -76,7 +83,7 @@ async def view_student_details(update: Update, context: ContextTypes.DEFAULT_TYP
         return
 
     # Get students in teacher's class (only actual students, not teachers)
-    all_users_in_class = get_users_by_class(teacher.class_id)
+    all_users_in_class = await aio.get_users_by_class(teacher.class_id)
     students = [user for user in all_users_in_class if user.role == ROLE_STUDENT]
 
     if not students:
@@ -136,10 +143,9 @@ async def view_class_statistics(update: Update, context: ContextTypes.DEFAULT_TY
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
 
     if not teacher or not teacher.class_id:
         message = (
@@ -160,7 +166,7 @@ async def view_class_statistics(update: Update, context: ContextTypes.DEFAULT_TY
         return
 
     # Get students in teacher's class (only actual students, not teachers)
-    all_users_in_class = get_users_by_class(teacher.class_id)
+    all_users_in_class = await aio.get_users_by_class(teacher.class_id)
     students = [user for user in all_users_in_class if user.role == ROLE_STUDENT]
 
     if not students:
@@ -182,26 +188,20 @@ async def view_class_statistics(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return
 
-    # Get real statistics
-    stats = get_attendance_stats_by_class(teacher.class_id)
+    # Get real statistics for the current month
     today = date.today()
-    last_saturday = get_last_saturday(today)
-    next_saturday = get_next_saturday(today)
-
-    # Count current attendance for recent dates
-    recent_present = 0
-    recent_absent = 0
-    recent_total = 0
-
-    # Check attendance for the last 4 Saturdays
-    for i in range(4):
-        check_date = last_saturday - timedelta(weeks=i)
-        if check_date >= date(2024, 1, 1):  # Don't go too far back
-            present_count = count_attendance_by_class_and_date(teacher.class_id, check_date, True)
-            absent_count = count_attendance_by_class_and_date(teacher.class_id, check_date, False)
-            recent_present += present_count
-            recent_absent += absent_count
-            recent_total += (present_count + absent_count)
+    month_start = get_month_start(from_date=today)
+    stats = await aio.get_attendance_stats_by_class(
+        teacher.class_id, start_date=month_start, end_date=today, top_n=3
+    )
+    month_stats = await aio.get_class_statistics(teacher.class_id, month_start)
+
+    # Count attendance for the recent class dates in one query
+    recent_dates = _recent_sessions(teacher.class_id, today)
+    daily_counts = await aio.get_class_daily_counts(teacher.class_id, recent_dates)
+    recent_present = sum(day["present"] for day in daily_counts.values())
+    recent_absent = sum(day["absent"] for day in daily_counts.values())
+    recent_total = recent_present + recent_absent
 
     # Build comprehensive message
     message = f"📊 {get_translation(lang, 'class_statistics')}\n"
@@ -210,8 +210,8 @@ async def view_class_statistics(update: Update, context: ContextTypes.DEFAULT_TY
     message += get_translation(lang, "students") if lang == "en" else "طالب\n"
     message += "=" * 35 + "\n\n"
 
-    # Overall statistics
-    message += "📈 **Overall Statistics:**\n"
+    # Absences this month
+    message += "📈 **Absences This Month:**\n"
     message += f"• Total Absence Records: {stats.get('total_absent', 0)}\n"
     message += f"• With Reason: {stats.get('total_with_reason', 0)}\n"
     if stats.get('total_absent', 0) > 0:
@@ -219,8 +219,18 @@ async def view_class_statistics(update: Update, context: ContextTypes.DEFAULT_TY
         message += f"• Reason Rate: {reason_percentage:.1f}%\n"
     message += "\n"
 
-    # Recent attendance (last 4 weeks)
-    message += "📅 **Recent Attendance (Last 4 Weeks):**\n"
+    # This month, from the monthly statistics rows
+    message += "📆 **This Month:**\n"
+    if month_stats["total"] > 0:
+        message += f"• Present: {month_stats['present']} ({month_stats['percentage']:.1f}%)\n"
+        message += f"• Absent: {month_stats['absent']}\n"
+        message += f"• Students absent 3+ classes in a row: {month_stats['students_at_risk']}\n"
+    else:
+        message += "• No attendance marked yet\n"
+    message += "\n"
+
+    # Recent attendance (class dates of the last RECENT_WEEKS weeks)
+    message += f"📅 **Recent Attendance (Last {RECENT_WEEKS} Weeks):**\n"
     if recent_total > 0:
         recent_present_rate = (recent_present / recent_total) * 100
         message += f"• Present: {recent_present} ({recent_present_rate:.1f}%)\n"
@@ -233,9 +243,7 @@ async def view_class_statistics(update: Update, context: ContextTypes.DEFAULT_TY
     # Most common absence reasons
     if stats.get('reason_breakdown'):
         message += "🚫 **Common Absence Reasons:**\n"
-        sorted_reasons = sorted(stats['reason_breakdown'].items(), 
-                              key=lambda x: x[1], reverse=True)[:3]
-        for reason, count in sorted_reasons:
+        for reason, count in stats['reason_breakdown'].items():
             percentage = (count / stats.get('total_with_reason', 1)) * 100
             message += f"• {reason}: {count} ({percentage:.1f}%)\n"
 
@@ -283,53 +291,53 @@ async def view_class_details(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
     if not teacher or not teacher.class_id:
         await query.edit_message_text(get_translation(lang, "access_denied"))
         return
 
-    # Extract class_id from callback data
-    try:
-        class_id = int(query.data.split("_")[-1])
-    except (IndexError, ValueError):
-        class_id = teacher.class_id
-
-    # Get students and their attendance
-    students = get_users_by_class(class_id)
-    students = [user for user in students if user.role == ROLE_STUDENT]
+    # Extract class_id (and page) from callback data
+    class_id, page = _parse_class_page(query.data, teacher.class_id)
+
+    # One page of students with their recent class dates
+    recent_dates = _recent_sessions(class_id)
+    rows, total = await aio.get_class_attendance_matrix(
+        class_id,
+        recent_dates,
+        role=ROLE_STUDENT,
+        limit=STUDENTS_PER_PAGE,
+        offset=page * STUDENTS_PER_PAGE,
+    )
+    if not rows and page > 0:
+        # Page no longer exists (students were removed); show the first one
+        page = 0
+        rows, total = await aio.get_class_attendance_matrix(
+            class_id, recent_dates, role=ROLE_STUDENT, limit=STUDENTS_PER_PAGE
+        )
+    page, pages = get_page_bounds(page, total)
 
-    if not students:
+    if not rows:
         message = "👥 No students found in this class."
     else:
-        # Get attendance for recent dates
         message = f"👥 **Class Details - {class_id}**\n"
-        message += f"Total Students: {len(students)}\n"
+        message += f"Total Students: {total}\n"
         message += "=" * 30 + "\n\n"
 
         # Show student-wise attendance summary
-        today = date.today()
-        last_sat = get_last_saturday(today)
-        last_4_sats = [last_sat - timedelta(weeks=i) for i in range(4)]
-
-        for student in students[:10]:  # Limit to first 10 students
+        for student, statuses in rows:
             message += f"**{student.name}** (ID: {student.telegram_id})\n"
-            
-            # Count attendance for recent dates
-            recent_attendance = []
-            for sat_date in last_4_sats:
-                attendance = get_attendance(student.id, class_id, sat_date.strftime('%Y-%m-%d'))
-                if attendance:
-                    recent_attendance.append("✅" if attendance.status else "❌")
-                else:
-                    recent_attendance.append("⏸️")
-            
-            message += f"Recent: {' '.join(recent_attendance)}\n\n"
+            message += f"Recent: {_format_statuses(statuses)}\n\n"
 
     # Build keyboard
-    keyboard = [
+    keyboard = []
+    page_buttons = build_page_buttons(
+        lang, f"teacher_class_details_{class_id}_", page, pages
+    )
+    if page_buttons:
+        keyboard.append(page_buttons)
+    keyboard += [
         [
             InlineKeyboardButton(
                 "📅 " + get_translation(lang, "view_date"),
@@ -366,10 +374,9 @@ async def edit_attendance_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
     if not teacher or not teacher.class_id:
         await query.edit_message_text(get_translation(lang, "access_denied"))
         return
@@ -383,7 +390,7 @@ async def edit_attendance_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     message = f"✏️ **Edit Attendance - Class {class_id}**\n\n"
     message += "Choose an option to edit attendance records:\n\n"
     message += "📅 **Date Selection:**\n"
-    message += "• Quick edit for last Saturday\n"
+    message += "• Quick edit for the last class\n"
     message += "• Edit for any specific date\n\n"
     message += "🗑️ **Bulk Operations:**\n"
     message += "• Mark all as present\n"
@@ -395,7 +402,7 @@ async def edit_attendance_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     keyboard = [
         [
             InlineKeyboardButton(
-                "📅 " + get_translation(lang, "last_saturday"),
+                "📅 " + get_translation(lang, "last_class"),
                 callback_data=f"teacher_edit_date_{class_id}_last"
             )
         ],
@@ -447,10 +454,9 @@ async def bulk_mark_attendance_menu(update: Update, context: ContextTypes.DEFAUL
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
     if not teacher or not teacher.class_id:
         await query.edit_message_text(get_translation(lang, "access_denied"))
         return
@@ -461,7 +467,7 @@ async def bulk_mark_attendance_menu(update: Update, context: ContextTypes.DEFAUL
     action = callback_parts[3]  # 'present' or 'absent'
 
     # Get students count
-    students = get_users_by_class(class_id)
+    students = await aio.get_users_by_class(class_id)
     students = [user for user in students if user.role == ROLE_STUDENT]
     student_count = len(students)
 
@@ -512,10 +518,9 @@ async def bulk_mark_attendance_confirm(update: Update, context: ContextTypes.DEF
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
     if not teacher or not teacher.class_id:
         await query.edit_message_text(get_translation(lang, "access_denied"))
         return
@@ -525,16 +530,29 @@ async def bulk_mark_attendance_confirm(update: Update, context: ContextTypes.DEF
     class_id = int(callback_parts[3])
     action = callback_parts[4]  # 'present' or 'absent'
 
-    # Get recent Saturday date
-    today = date.today()
-    last_saturday = get_last_saturday(today)
-    date_str = last_saturday.strftime('%Y-%m-%d')
+    # Get the class's most recent session date
+    last_session = session_calendar.last_session(class_id, date.today())
+    if last_session is None:
+        keyboard = [
+            [
+                InlineKeyboardButton(
+                    "⬅️ " + get_translation(lang, "back"),
+                    callback_data=f"teacher_edit_attendance_{class_id}"
+                )
+            ]
+        ]
+        await query.edit_message_text(
+            "❌ " + get_translation(lang, "no_recent_class"),
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return
+    date_str = last_session.strftime('%Y-%m-%d')
 
     # Execute bulk operation
-    from database.operations import bulk_mark_attendance
+    from database.operations import aio
     is_present = action == "present"
     
-    success, count_updated, error = bulk_mark_attendance(
+    success, count_updated, error = await aio.bulk_mark_attendance(
         class_id=class_id,
         attendance_date=date_str,
         status=is_present,
@@ -581,16 +599,30 @@ async def bulk_mark_attendance_confirm(update: Update, context: ContextTypes.DEF
     )
 
 
-# Helper function to count attendance by class, date, and status
-def count_attendance_by_class_and_date(class_id: int, attendance_date: date, status: bool) -> int:
-    """Helper function to count attendance for a class on a specific date."""
-    with get_db() as db:
-        from database import Attendance
-        return db.query(Attendance).filter_by(
-            class_id=class_id,
-            date=attendance_date,
-            status=status
-        ).count()
+# Helper function to list the class dates shown as "recent"
+def _recent_sessions(class_id: int, today: Optional[date] = None) -> list:
+    """Get a class's session dates in the last RECENT_WEEKS weeks, newest first."""
+    today = today or date.today()
+    start = today - timedelta(weeks=RECENT_WEEKS, days=-1)
+    return session_calendar.sessions_in_range(class_id, start, today)[::-1]
+
+
+# Helper function to read CLASSID and optional PAGE from callback data
+def _parse_class_page(data: str, default_class_id: int) -> tuple:
+    """Parse callbacks like prefix_CLASSID or prefix_CLASSID_PAGE."""
+    match = re.search(r"_(\d+)(?:_(\d+))?$", data)
+    if not match:
+        return default_class_id, 0
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+# Helper function to render attendance statuses as emoji
+def _format_statuses(statuses: list) -> str:
+    """Render True/False/None statuses as ✅/❌/⏸️."""
+    return " ".join(
+        "⏸️" if status is None else ("✅" if status else "❌")
+        for status in statuses
+    )
 
 
 def register_teacher_handlers(application):
@@ -600,36 +632,16 @@ def register_teacher_handlers(application):
     Args:
         application: Telegram Application instance
     """
-    application.add_handler(
-        CallbackQueryHandler(mark_attendance_menu, pattern="^teacher_mark_attendance$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(view_student_details, pattern="^teacher_student_details$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(view_class_statistics, pattern="^teacher_class_stats$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(view_class_details, pattern="^teacher_class_details_")
-    )
-    application.add_handler(
-        CallbackQueryHandler(edit_attendance_menu, pattern="^teacher_edit_attendance_")
-    )
-    application.add_handler(
-        CallbackQueryHandler(bulk_mark_attendance_menu, pattern="^teacher_bulk_")
-    )
-    application.add_handler(
-        CallbackQueryHandler(bulk_mark_attendance_confirm, pattern="^teacher_bulk_confirm_")
-    )
-    application.add_handler(
-        CallbackQueryHandler(edit_attendance_date_selection, pattern="^teacher_edit_date_")
-    )
-    application.add_handler(
-        CallbackQueryHandler(edit_attendance_view_recent, pattern="^teacher_edit_recent_")
-    )
-    application.add_handler(
-        CallbackQueryHandler(show_reason_statistics, pattern="^teacher_reason_stats$")
-    )
+    callback_router.add("teacher_mark_attendance", mark_attendance_menu)
+    callback_router.add("teacher_student_details", view_student_details)
+    callback_router.add("teacher_class_stats", view_class_statistics)
+    callback_router.add_prefix("teacher_class_details_", view_class_details)
+    callback_router.add_prefix("teacher_edit_attendance_", edit_attendance_menu)
+    callback_router.add_prefix("teacher_bulk_", bulk_mark_attendance_menu)
+    callback_router.add_prefix("teacher_bulk_confirm_", bulk_mark_attendance_confirm)
+    callback_router.add_prefix("teacher_edit_date_", edit_attendance_date_selection)
+    callback_router.add_prefix("teacher_edit_recent_", edit_attendance_view_recent)
+    callback_router.add("teacher_reason_stats", show_reason_statistics)
 
     logger.info("Teacher menu handlers registered")
 
@@ -644,10 +656,9 @@ async def edit_attendance_date_selection(update: Update, context: ContextTypes.D
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
     if not teacher or not teacher.class_id:
         await query.edit_message_text(get_translation(lang, "access_denied"))
         return
@@ -658,7 +669,7 @@ async def edit_attendance_date_selection(update: Update, context: ContextTypes.D
     action = callback_parts[4]  # 'last' or 'choose'
 
     if action == "last":
-        # Go directly to attendance for last Saturday
+        # Go directly to attendance for the last class
         from handlers.attendance_date import start_attendance
         await start_attendance(update, context)
     else:
@@ -677,56 +688,54 @@ async def edit_attendance_view_recent(update: Update, context: ContextTypes.DEFA
     await query.answer()
 
     lang = get_user_lang(context)
-    user_id = context.user_data.get("telegram_id")
 
     # Get teacher from database
-    teacher = get_user_by_telegram_id(user_id)
+    teacher = await get_current_user(context)
     if not teacher or not teacher.class_id:
         await query.edit_message_text(get_translation(lang, "access_denied"))
         return
 
-    # Extract class_id from callback data
-    try:
-        class_id = int(query.data.split("_")[-1])
-    except (IndexError, ValueError):
-        class_id = teacher.class_id
+    # Extract class_id (and page) from callback data
+    class_id, page = _parse_class_page(query.data, teacher.class_id)
 
-    # Get recent attendance data
-    students = get_users_by_class(class_id)
-    students = [user for user in students if user.role == ROLE_STUDENT]
+    # Every student's recent class dates in one query; totals need all of
+    # them, the per-student lines are paged
+    recent_dates = _recent_sessions(class_id)
+    rows, total = await aio.get_class_attendance_matrix(
+        class_id, recent_dates, role=ROLE_STUDENT
+    )
+    page, pages = get_page_bounds(page, total)
 
-    if not students:
+    if not rows:
         message = "👥 No students found in this class."
     else:
-        today = date.today()
-        last_sat = get_last_saturday(today)
-        last_4_sats = [last_sat - timedelta(weeks=i) for i in range(4)]
-
         message = f"📅 **Recent Attendance - Class {class_id}**\n\n"
 
-        for sat_date in last_4_sats:
-            message += f"**{format_date_with_day(sat_date.strftime('%Y-%m-%d'), lang)}**\n"
-            
-            present_count = 0
-            absent_count = 0
-            
-            for student in students:
-                attendance = get_attendance(student.id, class_id, sat_date.strftime('%Y-%m-%d'))
-                if attendance:
-                    if attendance.status:
-                        present_count += 1
-                    else:
-                        absent_count += 1
-            
-            total = present_count + absent_count
-            if total > 0:
+        for index, session_date in enumerate(recent_dates):
+            message += f"**{format_date_with_day(session_date, lang)}**\n"
+
+            present_count = sum(1 for _, statuses in rows if statuses[index] is True)
+            absent_count = sum(1 for _, statuses in rows if statuses[index] is False)
+
+            total_marked = present_count + absent_count
+            if total_marked > 0:
                 message += f"✅ Present: {present_count} | ❌ Absent: {absent_count}\n"
             else:
                 message += "⏸️ No records\n"
             message += "\n"
 
+        start = page * STUDENTS_PER_PAGE
+        for student, statuses in rows[start : start + STUDENTS_PER_PAGE]:
+            message += f"{_format_statuses(statuses)}  {student.name}\n"
+
     # Build keyboard
-    keyboard = [
+    keyboard = []
+    page_buttons = build_page_buttons(
+        lang, f"teacher_edit_recent_{class_id}_", page, pages
+    )
+    if page_buttons:
+        keyboard.append(page_buttons)
+    keyboard += [
         [
             InlineKeyboardButton(
                 "✏️ " + get_translation(lang, "edit_attendance"),
@@ -12,12 +12,28 @@ Main entry point for the Telegram School Management Bot.
 
 import logging
 from telegram import Update
-from telegram.ext import Application
+from telegram.ext import Application, ContextTypes
 from telegram.request import HTTPXRequest
 
 import config
 from utils.logging_config import setup_logging
-from database import init_db, check_connection
+from utils.callbacks import CALLBACK_PREFIX, LEGACY_CALLBACK_PREFIXES, callback_codec
+from utils.keyboards import prebuild_keyboards
+from utils.router import callback_router
+from database import (
+    init_db,
+    check_connection,
+    get_update_concurrency,
+    is_async_enabled,
+)
+from database.operations import load_known_users, load_session_calendar
+from middleware import (
+    AUTH_HANDLER_GROUP,
+    BotContext,
+    RequestScopedApplication,
+    create_auth_handler,
+    create_persistence,
+)
 from handlers import (
     register_common_handlers,
     register_language_handlers,
@@ -79,6 +95,14 @@ def main():
     logger.info("Initializing database tables...")
     init_db()
 
+    # Registered users skip the per-update registration lookup
+    known_users = load_known_users()
+    logger.info(f"Known registered users: {known_users}")
+
+    # Class days and skipped dates for attendance validation and statistics
+    classes = load_session_calendar()
+    logger.info(f"Session calendar loaded for {classes} classes")
+
     # Create custom request with longer timeouts
     logger.info("Creating Telegram application with custom timeouts...")
     request = HTTPXRequest(
@@ -90,16 +114,28 @@ def main():
     )
 
     # Create application with custom request
+    builder = Application.builder()
+    if config.PERSISTENCE_ENABLED:
+        # Unsaved attendance marks etc. survive restarts
+        builder = builder.persistence(create_persistence())
     application = (
-        Application.builder()
+        builder
         .token(config.BOT_API)
         .request(request)
+        .application_class(RequestScopedApplication)  # One DB session per update
+        .context_types(ContextTypes(context=BotContext))
+        # Only overlap updates when database calls don't block the event loop
+        .concurrent_updates(get_update_concurrency())
         .post_init(post_init)  # Verify connection after init
         .build()
     )
 
     # Register handlers
     logger.info("Registering handlers...")
+
+    # Resolve the user of every update once, before any other handler
+    application.add_handler(create_auth_handler(), group=AUTH_HANDLER_GROUP)
+
     register_common_handlers(application)
     register_language_handlers(application)
     register_student_handlers(application)
@@ -115,12 +151,33 @@ def main():
     register_attendance_confirm_handlers(application)
     register_attendance_stats_handlers(application)
 
+    # Encoded callbacks (stats per action), then one handler for all routes
+    callback_router.add_prefix(
+        CALLBACK_PREFIX,
+        callback_codec.dispatch,
+        label=lambda data: f"{CALLBACK_PREFIX}{callback_codec.action_of(data)}",
+    )
+    # Plain attendance buttons still in chats from before the encoding
+    for prefix in LEGACY_CALLBACK_PREFIXES:
+        callback_router.add_prefix(prefix, callback_codec.dispatch_legacy)
+    application.add_handler(callback_router.create_handler())
+
+    # Static menus for every role and language (rebuilt if translations reload)
+    prebuild_keyboards()
+
     # Add error handler
     application.add_error_handler(error_handler)
 
     # Start bot
     logger.info("Bot is starting...")
     logger.info(f"Database: {config.DATABASE_URL}")
+    if is_async_enabled():
+        logger.info("Database calls: async engine")
+    elif config.DB_THREAD_OFFLOAD:
+        logger.info("Database calls: thread pool")
+    else:
+        logger.info("Database calls: inline (blocking)")
+    logger.info(f"Concurrent updates: {application.concurrent_updates}")
     logger.info(f"Authorized users: {len(config.AUTHORIZED_USERS)}")
     logger.info("=" * 60)
 
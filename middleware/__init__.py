@@ -10,6 +10,11 @@ Middleware package for the Telegram School Bot.
 """
 
 from middleware.auth import (
+    AUTH_HANDLER_GROUP,
+    authenticate_update,
+    create_auth_handler,
+    get_current_user,
+    get_permissions,
     require_auth,
     require_role,
     load_user_context,
@@ -22,8 +27,23 @@ from middleware.language import (
     get_current_language,
 )
 
+from middleware.session import (
+    BotContext,
+    RequestScopedApplication,
+)
+
+from middleware.persistence import (
+    BatchedPersistence,
+    create_persistence,
+)
+
 __all__ = [
     # Authentication
+    "AUTH_HANDLER_GROUP",
+    "authenticate_update",
+    "create_auth_handler",
+    "get_current_user",
+    "get_permissions",
     "require_auth",
     "require_role",
     "load_user_context",
@@ -32,4 +52,10 @@ __all__ = [
     "load_language_preference",
     "set_language_preference",
     "get_current_language",
+    # Database session
+    "BotContext",
+    "RequestScopedApplication",
+    # Bot state persistence
+    "BatchedPersistence",
+    "create_persistence",
 ]
@@ -11,18 +11,22 @@ Authentication middleware for Telegram bot handlers.
 
 import logging
 from functools import wraps
-from typing import Callable
+from typing import Callable, Optional
 
 from telegram import Update
-from telegram.ext import ContextTypes
+from telegram.ext import ContextTypes, TypeHandler
 
 from config import AUTHORIZED_USERS
-from utils import get_translation, get_user_role, is_authorized
-from database import get_db
-from database.operations import create_user, get_user_by_telegram_id
+from utils import PermissionContext, get_translation
+from database import User
+from database.operations import aio, get_known_language, is_known_user
 
 logger = logging.getLogger(__name__)
 
+# Handler group of the authentication stage: before every other group,
+# including group -1 (which only runs its first matching handler)
+AUTH_HANDLER_GROUP = -2
+
 
 async def auto_register_user_if_needed(telegram_id: int, telegram_user) -> bool:
     """
@@ -35,8 +39,12 @@ async def auto_register_user_if_needed(telegram_id: int, telegram_user) -> bool:
     Returns:
         True if user exists or was created successfully
     """
+    # Known registered users need no lookup
+    if is_known_user(telegram_id):
+        return True
+    
     # Check if user already in database
-    existing_user = get_user_by_telegram_id(telegram_id)
+    existing_user = await aio.get_user_by_telegram_id(telegram_id)
     if existing_user:
         return True
     
@@ -44,6 +52,18 @@ async def auto_register_user_if_needed(telegram_id: int, telegram_user) -> bool:
     if telegram_id not in AUTHORIZED_USERS:
         return False
     
+    await _register_authorized_user(telegram_id, telegram_user)
+    return True
+
+
+async def _register_authorized_user(telegram_id: int, telegram_user):
+    """
+    Create the database record of an AUTHORIZED_USERS entry.
+
+    Returns:
+        Created User, or None if creation failed (the user stays authorized
+        through .env)
+    """
     # Get role and class_id from config
     role, class_id = AUTHORIZED_USERS[telegram_id]
     
@@ -53,7 +73,7 @@ async def auto_register_user_if_needed(telegram_id: int, telegram_user) -> bool:
         name += f" {telegram_user.last_name}"
     
     # Create user in database
-    success, user, error = create_user(
+    success, user, error = await aio.create_user(
         telegram_id=telegram_id,
         name=name,
         role=role,
@@ -63,12 +83,116 @@ async def auto_register_user_if_needed(telegram_id: int, telegram_user) -> bool:
     
     if success:
         logger.info(f"✅ Auto-registered user {telegram_id} ({name}) - role={role}, class={class_id}")
-        return True
+        return user
     else:
         logger.error(f"❌ Failed to auto-register user {telegram_id}: {error}")
         # Still allow them to use the bot even if DB creation failed
         # They're authorized in .env
-        return True
+        return None
+
+
+async def get_permissions(update: Update, context: ContextTypes.DEFAULT_TYPE) -> PermissionContext:
+    """
+    Get the permissions of the update's user, built once per update.
+
+    The first call reads the user row (registering .env users that are not
+    in the database yet). .env users known to be registered need no lookup
+    at all, since their role and class come from AUTHORIZED_USERS, and
+    the language of known users comes from the in-memory language map.
+    Later calls during the same
+    update, e.g. from the decorators or from can_* checks in the handler,
+    reuse the result.
+
+    Args:
+        update: Telegram update
+        context: Telegram context (one per update)
+
+    Returns:
+        PermissionContext (unauthorized if the update has no user)
+    """
+    permissions = getattr(context, "permissions", None)
+    if isinstance(permissions, PermissionContext):
+        return permissions
+
+    telegram_user = update.effective_user
+    if not telegram_user:
+        return PermissionContext(None)
+
+    telegram_id = telegram_user.id
+    if telegram_id in AUTHORIZED_USERS and is_known_user(telegram_id):
+        user = None
+    else:
+        user = await aio.get_user_by_telegram_id(telegram_id)
+        if user is None and telegram_id in AUTHORIZED_USERS:
+            user = await _register_authorized_user(telegram_id, telegram_user)
+
+    permissions = PermissionContext.from_user(telegram_id, user)
+
+    language = context.user_data.get("language") if context.user_data is not None else None
+    if language is None and permissions.is_authorized:
+        language = get_known_language(telegram_id)
+    if language is None and permissions.is_authorized:
+        if permissions.user is None:
+            permissions.user = await aio.get_user_by_telegram_id(telegram_id)
+        if permissions.user is not None:
+            language = permissions.user.language_preference
+    permissions.language = language or "ar"
+
+    context.permissions = permissions
+    return permissions
+
+
+async def get_current_user(context: ContextTypes.DEFAULT_TYPE) -> Optional[User]:
+    """
+    Get the database row of the update's user, looked up at most once per
+    update (none at all if the authentication stage already loaded it).
+
+    Args:
+        context: Telegram context
+
+    Returns:
+        User object or None
+    """
+    permissions = getattr(context, "permissions", None)
+    if not isinstance(permissions, PermissionContext):
+        return await aio.get_user_by_telegram_id(context.user_data.get("telegram_id"))
+
+    if permissions.user is None and permissions.is_authorized:
+        permissions.user = await aio.get_user_by_telegram_id(permissions.telegram_id)
+    return permissions.user
+
+
+def _store_user_context(context: ContextTypes.DEFAULT_TYPE, permissions: PermissionContext):
+    """Mirror the resolved user into user_data for handlers that read it there."""
+    context.user_data["telegram_id"] = permissions.telegram_id
+    context.user_data["role"] = permissions.role
+    context.user_data.setdefault("language", permissions.language)
+
+
+async def authenticate_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Authentication stage, run for every update before any handler.
+
+    Resolves identity, role, class and language once into
+    context.permissions (see get_permissions); the decorators below only
+    read it. Does not reject anything: handlers decide what they require.
+    """
+    if not update.effective_user:
+        return
+
+    permissions = await get_permissions(update, context)
+    if permissions.is_authorized:
+        _store_user_context(context, permissions)
+
+
+def create_auth_handler() -> TypeHandler:
+    """
+    Create the authentication stage handler.
+
+    Usage:
+        application.add_handler(create_auth_handler(), group=AUTH_HANDLER_GROUP)
+    """
+    return TypeHandler(Update, authenticate_update)
 
 
 def require_auth(func: Callable) -> Callable:
@@ -89,11 +213,13 @@ def require_auth(func: Callable) -> Callable:
             logger.warning("Update has no effective user")
             return
         
+        permissions = await get_permissions(update, context)
+        
         # Check if user is authorized
-        if not is_authorized(user.id):
+        if not permissions.is_authorized:
             lang = context.user_data.get("language", "ar")
             
-            await update.message.reply_text(
+            await update.effective_message.reply_text(
                 get_translation(lang, "not_authorized") + "\n" +
                 get_translation(lang, "your_telegram_id").format(id=user.id)
             )
@@ -101,13 +227,8 @@ def require_auth(func: Callable) -> Callable:
             logger.info(f"Unauthorized access attempt by user {user.id}")
             return
         
-        # Auto-register user if needed
-        await auto_register_user_if_needed(user.id, user)
-        
         # Store user info in context for easy access
-        context.user_data["telegram_id"] = user.id
-        with get_db() as db:
-            context.user_data["role"] = get_user_role(user.id, db)
+        _store_user_context(context, permissions)
         
         return await func(update, context, *args, **kwargs)
     
@@ -134,15 +255,13 @@ def require_role(min_role: int):
             if not user:
                 return
             
-            # Auto-register if needed
-            await auto_register_user_if_needed(user.id, user)
+            # Resolved once per update by the authentication stage
+            permissions = await get_permissions(update, context)
+            user_role = permissions.role
             
-            with get_db() as db:
-                user_role = get_user_role(user.id, db)
-            
-            if user_role is None or user_role < min_role:
+            if not permissions.has_role(min_role):
                 lang = context.user_data.get("language", "ar")
-                await update.message.reply_text(
+                await update.effective_message.reply_text(
                     get_translation(lang, "no_permission")
                 )
                 logger.warning(f"User {user.id} (role={user_role}) tried to access handler requiring role {min_role}")
@@ -165,20 +284,9 @@ async def load_user_context(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not user:
         return
     
-    # Auto-register if needed
-    await auto_register_user_if_needed(user.id, user)
-    
-    # Load language preference if not already set
-    if "language" not in context.user_data:
-        from utils import get_user_language
-        with get_db() as db:
-            context.user_data["language"] = get_user_language(user.id, db)
-    
-    # Load user info
-    if "telegram_id" not in context.user_data:
-        context.user_data["telegram_id"] = user.id
-        with get_db() as db:
-            context.user_data["role"] = get_user_role(user.id, db)
+    # Resolved once per update (auto-registers .env users if needed)
+    permissions = await get_permissions(update, context)
+    _store_user_context(context, permissions)
 
 
 def get_user_lang(context: ContextTypes.DEFAULT_TYPE) -> str:
@@ -7,18 +7,45 @@
 
 """
 Language preference middleware.
+
+Languages are resolved from the in-memory map kept by the user operations
+(seeded by load_known_users at startup and updated by update_user), so
+only users the bot has not seen yet cost a query.
 """
 
 import logging
+from typing import Optional
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from database.operations import get_user_by_telegram_id
+from config import DEFAULT_LANGUAGE
+from database.operations import aio, get_known_language
 
 logger = logging.getLogger(__name__)
 
 
+async def resolve_language(telegram_id: int) -> Optional[str]:
+    """
+    Get a user's language preference, from memory when the user is known.
+
+    Args:
+        telegram_id: User's Telegram ID
+
+    Returns:
+        Language code, or None if the user is not registered
+    """
+    language = get_known_language(telegram_id)
+    if language is not None:
+        return language
+
+    # Unknown so far: the lookup also adds the user to the map
+    db_user = await aio.get_user_by_telegram_id(telegram_id)
+    if db_user is None:
+        return None
+    return db_user.language_preference or DEFAULT_LANGUAGE
+
+
 async def load_language_preference(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Load user's language preference from database.
@@ -33,18 +60,15 @@ async def load_language_preference(update: Update, context: ContextTypes.DEFAULT
     if "language" in context.user_data:
         return
 
-    # Try to load from database
-    db_user = get_user_by_telegram_id(user.id)
+    language = await resolve_language(user.id)
 
-    if db_user and db_user.language_preference:
-        context.user_data["language"] = db_user.language_preference
-        logger.debug(
-            f"Loaded language preference for user {user.id}: {db_user.language_preference}"
-        )
+    if language:
+        context.user_data["language"] = language
+        logger.debug(f"Loaded language preference for user {user.id}: {language}")
     else:
         # Default to Arabic
-        context.user_data["language"] = "ar"
-        logger.debug(f"Using default language (ar) for user {user.id}")
+        context.user_data["language"] = DEFAULT_LANGUAGE
+        logger.debug(f"Using default language ({DEFAULT_LANGUAGE}) for user {user.id}")
 
 
 async def set_language_preference(
@@ -58,10 +82,8 @@ async def set_language_preference(
         language: Language code ('ar' or 'en')
         context: Telegram context
     """
-    from database.operations import update_user
-
-    # Update in database
-    success, user, error = update_user(telegram_id, language_preference=language)
+    # Update in database (update_user also refreshes the language map)
+    success, user, error = await aio.update_user(telegram_id, language_preference=language)
 
     if success:
         # Update in context
@@ -0,0 +1,321 @@
+# =============================================================================
+# FILE: middleware/persistence.py
+# DESCRIPTION: Persistent user/chat state backed by SQLite or Redis
+# LOCATION: middleware/persistence.py
+# PURPOSE: Keep in-flight state (unsaved attendance marks, pending reasons)
+#          across restarts without writing on every update
+# =============================================================================
+
+"""
+Bot state persistence.
+
+BatchedPersistence is a python-telegram-bot BasePersistence that stores
+user_data and chat_data (e.g. attendance_changes, attendance_roster,
+current_group, pending_reason) in a StateStore. The Application already
+tracks which users and chats changed and hands them over every
+PERSISTENCE_INTERVAL seconds; they are serialized right away and written
+together in one batch, so handling an update costs nothing extra. Stopping
+the bot writes whatever is still dirty.
+
+Usage:
+    application = Application.builder().persistence(create_persistence())...
+"""
+
+import asyncio
+import logging
+import pickle
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from config import (
+    PERSISTENCE_INTERVAL,
+    PERSISTENCE_PATH,
+    REDIS_ENABLED,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+# (kind, key) with kind "user_data" or "chat_data"
+StateKey = Tuple[str, int]
+
+
+class StateStore(ABC):
+    """Storage backend for serialized state, one blob per (kind, key)."""
+
+    name = "none"
+
+    @abstractmethod
+    async def load(self, kind: str) -> Dict[int, bytes]:
+        """Load every entry of a kind."""
+
+    @abstractmethod
+    async def save(self, kind: str, entries: Dict[int, bytes]) -> None:
+        """Write several entries of a kind in one batch."""
+
+    @abstractmethod
+    async def delete(self, kind: str, key: int) -> None:
+        """Remove one entry."""
+
+    async def close(self) -> None:
+        """Release connections."""
+
+
+class SQLiteStateStore(StateStore):
+    """
+    State in a local SQLite file (blocking calls run in a worker thread).
+
+    One connection is opened on first use and kept until close(); the
+    lock keeps worker threads from using it at the same time.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the store's connection (call with the lock held)."""
+        if self._connection is None:
+            # Used from whichever worker thread asyncio.to_thread picks
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bot_state ("
+                "kind TEXT NOT NULL, key INTEGER NOT NULL, data BLOB NOT NULL, "
+                "PRIMARY KEY (kind, key))"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _load(self, kind: str) -> Dict[int, bytes]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, data FROM bot_state WHERE kind = ?", (kind,)
+            )
+            return dict(rows.fetchall())
+
+    def _save(self, kind: str, entries: Dict[int, bytes]) -> None:
+        with self._lock, self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO bot_state (kind, key, data) VALUES (?, ?, ?)",
+                [(kind, key, data) for key, data in entries.items()],
+            )
+
+    def _delete(self, kind: str, key: int) -> None:
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "DELETE FROM bot_state WHERE kind = ? AND key = ?", (kind, key)
+            )
+
+    def _close(self) -> None:
+        with self._lock:
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+
+    async def load(self, kind: str) -> Dict[int, bytes]:
+        return await asyncio.to_thread(self._load, kind)
+
+    async def save(self, kind: str, entries: Dict[int, bytes]) -> None:
+        await asyncio.to_thread(self._save, kind, entries)
+
+    async def delete(self, kind: str, key: int) -> None:
+        await asyncio.to_thread(self._delete, kind, key)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+
+class RedisStateStore(StateStore):
+    """State in Redis, one hash per kind."""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "bot_state"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    def _hash(self, kind: str) -> str:
+        return f"{self.prefix}:{kind}"
+
+    async def load(self, kind: str) -> Dict[int, bytes]:
+        entries = await self.client.hgetall(self._hash(kind))
+        return {int(key): data for key, data in entries.items()}
+
+    async def save(self, kind: str, entries: Dict[int, bytes]) -> None:
+        await self.client.hset(
+            self._hash(kind), mapping={str(key): data for key, data in entries.items()}
+        )
+
+    async def delete(self, kind: str, key: int) -> None:
+        await self.client.hdel(self._hash(kind), str(key))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class BatchedPersistence(BasePersistence):
+    """
+    Persist user_data and chat_data to a StateStore in batches.
+
+    bot_data, callback_data and conversations are not persisted.
+    """
+
+    def __init__(self, store: StateStore, update_interval: float = PERSISTENCE_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False, chat_data=True, user_data=True, callback_data=False
+            ),
+            update_interval=update_interval,
+        )
+        self.store = store
+        self.batches_written = 0
+        self.entries_written = 0
+        self._dirty: Dict[StateKey, bytes] = {}
+        self._write_task: Optional[asyncio.Task] = None
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    async def _load(self, kind: str) -> Dict[int, Any]:
+        """Load and deserialize every entry of a kind (skipping broken ones)."""
+        data = {}
+        for key, blob in (await self.store.load(kind)).items():
+            try:
+                data[key] = pickle.loads(blob)
+            except Exception as e:
+                logger.warning(f"Dropping unreadable {kind} for {key}: {e}")
+        logger.info(f"Loaded {kind} for {len(data)} entries from {self.store.name}")
+        return data
+
+    async def get_user_data(self) -> Dict[int, Dict]:
+        return await self._load("user_data")
+
+    async def get_chat_data(self) -> Dict[int, Dict]:
+        return await self._load("chat_data")
+
+    async def get_bot_data(self) -> Dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> Dict:
+        return {}
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def _mark_dirty(self, kind: str, key: int, data: Any) -> None:
+        """Serialize now (a consistent snapshot) and schedule the batch write."""
+        try:
+            self._dirty[(kind, key)] = pickle.dumps(data)
+        except Exception as e:
+            logger.error(f"Cannot persist {kind} for {key}: {e}")
+            return
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._write_dirty())
+
+    async def _write_dirty(self) -> None:
+        """Write every dirty entry, one batch per kind."""
+        # Let the rest of this persistence cycle mark its entries first
+        await asyncio.sleep(0)
+        batch, self._dirty = self._dirty, {}
+        if not batch:
+            return
+
+        by_kind: Dict[str, Dict[int, bytes]] = {}
+        for (kind, key), blob in batch.items():
+            by_kind.setdefault(kind, {})[key] = blob
+
+        for kind, entries in by_kind.items():
+            try:
+                await self.store.save(kind, entries)
+                self.batches_written += 1
+                self.entries_written += len(entries)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(entries)} {kind} entries: {e}")
+                # Retry with the next batch unless newer data was marked since
+                for key, blob in entries.items():
+                    self._dirty.setdefault((kind, key), blob)
+
+    async def update_user_data(self, user_id: int, data: Dict) -> None:
+        self._mark_dirty("user_data", user_id, data)
+
+    async def update_chat_data(self, chat_id: int, data: Dict) -> None:
+        self._mark_dirty("chat_data", chat_id, data)
+
+    async def update_bot_data(self, data: Dict) -> None:
+        pass
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    async def update_conversation(self, name: str, key: Tuple, new_state: Optional[object]) -> None:
+        pass
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._dirty.pop(("user_data", user_id), None)
+        await self.store.delete("user_data", user_id)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._dirty.pop(("chat_data", chat_id), None)
+        await self.store.delete("chat_data", chat_id)
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict) -> None:
+        pass
+
+    async def flush(self) -> None:
+        """Write what is still dirty and close the store (on shutdown)."""
+        if self._write_task is not None:
+            await self._write_task
+        await self._write_dirty()
+        await self.store.close()
+        logger.info(
+            f"Persistence flushed: {self.entries_written} entries in "
+            f"{self.batches_written} batches"
+        )
+
+
+def create_persistence(update_interval: float = PERSISTENCE_INTERVAL) -> BatchedPersistence:
+    """
+    Create the persistence for the configured backend.
+
+    Redis is used when REDIS_ENABLED is set and the redis package is
+    installed; otherwise state goes to the SQLite file at PERSISTENCE_PATH.
+
+    Args:
+        update_interval: Seconds between batch writes
+
+    Returns:
+        BatchedPersistence instance
+    """
+    store: Optional[StateStore] = None
+    if REDIS_ENABLED:
+        try:
+            store = RedisStateStore(REDIS_URL)
+        except ImportError:
+            logger.warning("REDIS_ENABLED is set but redis is not installed; using SQLite")
+
+    if store is None:
+        store = SQLiteStateStore(PERSISTENCE_PATH)
+
+    logger.info(f"Bot state persistence: {store.name} (every {update_interval}s)")
+    return BatchedPersistence(store, update_interval=update_interval)
@@ -0,0 +1,89 @@
+# =============================================================================
+# FILE: middleware/session.py
+# DESCRIPTION: Request-scoped database session middleware
+# LOCATION: middleware/session.py
+# PURPOSE: Share one session (and identity map) across everything that
+#          handles a single update, committed once at the end
+# =============================================================================
+
+"""
+Request-scoped database session middleware.
+
+Every update is processed inside one request scope, so the auth
+decorators, the handler body and the database operations they call all
+reuse one session and see each other's objects instead of opening (and
+committing) a session per call. The scope uses the async engine when it
+is available (database.async_request_scope) and the sync engine otherwise.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from telegram.ext import Application, CallbackContext, ExtBot
+
+from database import (
+    async_request_scope,
+    get_async_request_session,
+    get_request_session,
+    is_async_enabled,
+    mark_async_request_failed,
+    mark_request_failed,
+    request_scope,
+)
+from utils import PermissionContext
+
+logger = logging.getLogger(__name__)
+
+
+class BotContext(CallbackContext[ExtBot, Dict, Dict, Dict]):
+    """
+    Callback context exposing the request session as `context.db`.
+
+    Usage:
+        ContextTypes(context=BotContext)
+    """
+
+    # Set by middleware.auth.get_permissions, once per update
+    permissions: Optional[PermissionContext] = None
+
+    @property
+    def db(self) -> Optional[Union[AsyncSession, Session]]:
+        """
+        Session of the update being handled: an AsyncSession when the async
+        engine is enabled, a Session otherwise (None outside a request).
+        """
+        return get_async_request_session() or get_request_session()
+
+
+class RequestScopedApplication(Application):
+    """
+    Application that handles each update inside one database session.
+    The session is committed after the last handler group ran, or rolled
+    back if any handler raised.
+
+    Usage:
+        Application.builder().application_class(RequestScopedApplication)
+    """
+
+    async def process_update(self, update: object) -> None:
+        if is_async_enabled():
+            async with async_request_scope():
+                await super().process_update(update)
+        else:
+            with request_scope():
+                await super().process_update(update)
+
+    async def process_error(
+        self,
+        update: Optional[object],
+        error: Exception,
+        job: Any = None,
+        coroutine: Any = None,
+    ) -> bool:
+        # Handler errors are reported here rather than raised out of
+        # process_update, so flag the request for rollback first
+        mark_request_failed()
+        mark_async_request_failed()
+        return await super().process_error(update, error, job, coroutine)
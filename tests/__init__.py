@@ -0,0 +1,6 @@
+# =============================================================================
+# FILE: tests/__init__.py
+# DESCRIPTION: Test package initialization
+# LOCATION: tests/__init__.py
+# PURPOSE: Makes the tests directory a package for pytest
+# =============================================================================
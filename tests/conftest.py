@@ -0,0 +1,64 @@
+# =============================================================================
+# FILE: tests/conftest.py
+# DESCRIPTION: Shared pytest fixtures
+# LOCATION: tests/conftest.py
+# PURPOSE: Point the bot at an in-memory SQLite database and give every test
+#          empty tables and a reloaded session calendar
+# =============================================================================
+
+"""
+Shared pytest fixtures.
+
+config.py reads the environment at import time, so the test settings are
+set here, before any test module imports the bot's packages.
+"""
+
+import os
+
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ.setdefault("BOT_API", "test")
+os.environ["ASYNC_DB_ENABLED"] = "False"
+os.environ["PERSISTENCE_ENABLED"] = "False"
+
+import pytest
+
+from database import Base, Class, engine, get_db, init_db
+from database.operations import clear_user_cache, create_user, load_session_calendar
+
+ATTENDANCE_DATE = "2025-10-25"  # A Saturday
+
+
+@pytest.fixture(autouse=True)
+def fresh_db():
+    """Recreate every table and reload the caches that mirror them."""
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    clear_user_cache()
+    load_session_calendar()
+    yield
+    clear_user_cache()
+
+
+@pytest.fixture
+def class_id():
+    """Create a class meeting on Saturdays."""
+    with get_db() as db:
+        class_obj = Class(name="Test Class")
+        db.add(class_obj)
+        db.flush()
+        return class_obj.id
+
+
+@pytest.fixture
+def teacher(class_id):
+    """Create the class's teacher."""
+    return create_user(1000, "Test Teacher", 2, class_id=class_id)[1]
+
+
+@pytest.fixture
+def students(class_id):
+    """Create three students in the class."""
+    return [
+        create_user(2000 + i, f"Test Student {i}", 1, class_id=class_id)[1]
+        for i in range(3)
+    ]
@@ -0,0 +1,124 @@
+# =============================================================================
+# FILE: tests/test_attendance_batch.py
+# DESCRIPTION: Tests for batch attendance saves
+# LOCATION: tests/test_attendance_batch.py
+# PURPOSE: Check that mark_attendance_batch validates every row first and
+#          saves all rows or none
+# =============================================================================
+
+"""
+mark_attendance_batch tests.
+"""
+
+import pytest
+
+from database import Attendance, AttendanceStatistics, User, get_db
+from database.operations import attendance, get_attendance, mark_attendance_batch
+from tests.conftest import ATTENDANCE_DATE
+
+
+def rows_for(students, class_id, teacher, date_str=ATTENDANCE_DATE, note=None):
+    """One row per student: the first one present, the others absent."""
+    return [
+        (student.id, class_id, date_str, index == 0, note, teacher.id)
+        for index, student in enumerate(students)
+    ]
+
+
+def attendance_count():
+    with get_db() as db:
+        return db.query(Attendance).count()
+
+
+def test_saves_every_row(class_id, teacher, students):
+    success, saved, error = mark_attendance_batch(
+        rows_for(students, class_id, teacher, note="Sick")
+    )
+
+    assert (success, saved, error) == (True, len(students), "")
+    record = get_attendance(students[1].id, class_id, ATTENDANCE_DATE)
+    assert record.status is False
+    assert record.note == "Sick"
+
+
+def test_saving_again_updates_the_records(class_id, teacher, students):
+    mark_attendance_batch(rows_for(students, class_id, teacher))
+    rows = [(student.id, class_id, ATTENDANCE_DATE, True, None, teacher.id) for student in students]
+
+    assert mark_attendance_batch(rows) == (True, len(students), "")
+    assert attendance_count() == len(students)
+    assert get_attendance(students[1].id, class_id, ATTENDANCE_DATE).status is True
+
+
+def test_last_duplicate_row_wins(class_id, teacher, students):
+    student = students[0]
+    rows = [
+        (student.id, class_id, ATTENDANCE_DATE, True, None, teacher.id),
+        (student.id, class_id, ATTENDANCE_DATE, False, "Travel", teacher.id),
+    ]
+
+    assert mark_attendance_batch(rows) == (True, 1, "")
+    record = get_attendance(student.id, class_id, ATTENDANCE_DATE)
+    assert (record.status, record.note) == (False, "Travel")
+
+
+def test_empty_batch_saves_nothing():
+    assert mark_attendance_batch([]) == (True, 0, "")
+
+
+@pytest.mark.parametrize(
+    "date_str, error",
+    [
+        ("2025-10-24", "not_class_day"),  # A Friday
+        ("25-10-2025", "invalid_date_format"),
+    ],
+)
+def test_one_invalid_date_rejects_the_whole_batch(class_id, teacher, students, date_str, error):
+    rows = rows_for(students, class_id, teacher)
+    rows[-1] = rows[-1][:2] + (date_str,) + rows[-1][3:]
+
+    assert mark_attendance_batch(rows) == (False, 0, error)
+    assert attendance_count() == 0
+
+
+def test_one_invalid_note_rejects_the_whole_batch(class_id, teacher, students):
+    rows = rows_for(students, class_id, teacher)
+    rows[-1] = rows[-1][:4] + ("x" * 1000,) + rows[-1][5:]
+
+    success, saved, error = mark_attendance_batch(rows)
+
+    assert (success, saved) == (False, 0)
+    assert error
+    assert attendance_count() == 0
+
+
+def test_database_error_rolls_back_every_row(class_id, teacher, students, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("statistics failed")
+
+    monkeypatch.setattr(attendance, "refresh_statistics", fail)
+
+    assert mark_attendance_batch(rows_for(students, class_id, teacher)) == (
+        False,
+        0,
+        "unknown_error",
+    )
+    assert attendance_count() == 0
+    with get_db() as db:
+        assert db.query(AttendanceStatistics).count() == 0
+
+
+def test_failure_in_a_shared_session_keeps_earlier_work(class_id, teacher, students, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("statistics failed")
+
+    monkeypatch.setattr(attendance, "refresh_statistics", fail)
+
+    with get_db() as db:
+        db.query(User).filter_by(id=teacher.id).update({"name": "Renamed Teacher"})
+        success, _, _ = mark_attendance_batch(rows_for(students, class_id, teacher), db=db)
+
+    assert success is False
+    assert attendance_count() == 0
+    with get_db() as db:
+        assert db.query(User).filter_by(id=teacher.id).one().name == "Renamed Teacher"
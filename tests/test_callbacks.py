@@ -0,0 +1,176 @@
+# =============================================================================
+# FILE: tests/test_callbacks.py
+# DESCRIPTION: Tests for the callback codec and the callback router
+# LOCATION: tests/test_callbacks.py
+# PURPOSE: Check that encoded callbacks round-trip and that plain callback
+#          data of old buttons still reaches the same handlers
+# =============================================================================
+
+"""
+Callback codec and router tests.
+"""
+
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from utils.callbacks import (
+    CALLBACK_ACTIONS,
+    CALLBACK_PREFIX,
+    LEGACY_CALLBACK_PREFIXES,
+    MAX_CALLBACK_BYTES,
+    CallbackCodec,
+)
+from utils.router import CallbackRouter
+
+
+def make_update(data):
+    """Build an update carrying a callback query with data."""
+    query = MagicMock()
+    query.data = data
+    query.answer = AsyncMock()
+    update = MagicMock()
+    update.callback_query = query
+    return update
+
+
+def make_context():
+    return SimpleNamespace(user_data={"language": "en"}, bot_data={}, chat_data={})
+
+
+@pytest.mark.parametrize(
+    "action, args",
+    [
+        ("att_date", ["2025-10-25"]),
+        ("att_page", ["students", "2025-10-25", 3]),
+        ("att_toggle", [123456789, "2025-10-25"]),
+        ("att_confirm", ["absent", "teachers", "2025-10-25"]),
+        ("reason_set", ["excused", 42, "2031-12-31"]),
+    ],
+)
+def test_encode_decode_round_trip(action, args):
+    codec = CallbackCodec()
+    data = codec.encode(action, *args)
+
+    assert data.startswith(CALLBACK_PREFIX)
+    assert len(data.encode()) <= MAX_CALLBACK_BYTES
+    assert codec.decode(data) == (action, args)
+    assert codec.action_of(data) == action
+
+
+def test_every_action_round_trips():
+    codec = CallbackCodec()
+    samples = {int: 7, str: "students", date: "2025-10-25"}
+    for action, (_, types) in CALLBACK_ACTIONS.items():
+        args = [samples[kind] for kind in types]
+        assert codec.decode(codec.encode(action, *args)) == (action, args)
+
+
+def test_long_arguments_use_the_payload_table():
+    codec = CallbackCodec(payload_cache_size=1)
+    data = codec.encode("att_page", "x" * 100, "2025-10-25", 1)
+
+    assert len(data.encode()) <= MAX_CALLBACK_BYTES
+    assert codec.decode(data) == ("att_page", ["x" * 100, "2025-10-25", 1])
+
+    # Evicted payloads decode as None (the button answers "expired")
+    codec.encode("att_page", "y" * 100, "2025-10-25", 1)
+    assert codec.decode(data) is None
+
+
+def test_encode_rejects_wrong_argument_count():
+    with pytest.raises(ValueError):
+        CallbackCodec().encode("att_toggle", 1)
+
+
+@pytest.mark.parametrize("data", [None, "", "menu_main", "~", "~!!!", "~_w"])
+def test_decode_rejects_other_data(data):
+    assert CallbackCodec().decode(data) is None
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ("att_date_2025-10-25", ("att_date", ["2025-10-25"])),
+        ("att_tab_teachers_2025-10-25", ("att_tab", ["teachers", "2025-10-25"])),
+        ("att_page_students_2025-10-25_2", ("att_page", ["students", "2025-10-25", 2])),
+        ("att_toggle_42_2025-10-25", ("att_toggle", [42, "2025-10-25"])),
+        (
+            "att_confirm_present_students_2025-10-25",
+            ("att_confirm", ["present", "students", "2025-10-25"]),
+        ),
+        ("att_all_absent_students_2025-10-25", ("att_all_absent", ["students", "2025-10-25"])),
+        ("att_save_students_2025-10-25", ("att_save", ["students", "2025-10-25"])),
+        ("reason_travel_42_2025-10-25", ("reason_set", ["travel", 42, "2025-10-25"])),
+        ("reason_custom_42_2025-10-25", ("reason_custom", [42, "2025-10-25"])),
+        ("edit_reason_42_2025-10-25", ("edit_reason", [42, "2025-10-25"])),
+        ("clear_reason_42_2025-10-25", ("clear_reason", [42, "2025-10-25"])),
+        ("att_toggle_42", None),
+        ("att_date_manual", None),
+    ],
+)
+def test_decode_legacy(data, expected):
+    assert CallbackCodec.decode_legacy(data) == expected
+
+
+def build_router(codec):
+    """Wire a router the way main() does, plus one plain attendance route."""
+    router = CallbackRouter()
+    manual_entry = AsyncMock()
+    router.add("att_date_manual", manual_entry)
+    router.add_prefix(CALLBACK_PREFIX, codec.dispatch)
+    for prefix in LEGACY_CALLBACK_PREFIXES:
+        router.add_prefix(prefix, codec.dispatch_legacy)
+    return router, manual_entry
+
+
+def test_legacy_and_encoded_buttons_reach_the_same_handler():
+    codec = CallbackCodec()
+    toggle = AsyncMock()
+    codec.register_handler("att_toggle", toggle)
+    router, _ = build_router(codec)
+    context = make_context()
+
+    for data in ("att_toggle_42_2025-10-25", codec.encode("att_toggle", 42, "2025-10-25")):
+        update = make_update(data)
+        asyncio.run(router.dispatch(update, context))
+        toggle.assert_awaited_with(update, context, 42, "2025-10-25")
+    assert toggle.await_count == 2
+
+
+def test_legacy_reason_prefixes_are_routed():
+    codec = CallbackCodec()
+    handlers = {
+        action: AsyncMock() for action in ("reason_set", "edit_reason", "clear_reason")
+    }
+    for action, handler in handlers.items():
+        codec.register_handler(action, handler)
+    router, _ = build_router(codec)
+
+    for data, action in (
+        ("reason_sick_7_2025-10-25", "reason_set"),
+        ("edit_reason_7_2025-10-25", "edit_reason"),
+        ("clear_reason_7_2025-10-25", "clear_reason"),
+    ):
+        asyncio.run(router.dispatch(make_update(data), make_context()))
+        assert handlers[action].await_count == 1
+
+
+def test_exact_routes_win_over_legacy_prefixes():
+    codec = CallbackCodec()
+    router, manual_entry = build_router(codec)
+
+    asyncio.run(router.dispatch(make_update("att_date_manual"), make_context()))
+    manual_entry.assert_awaited_once()
+
+
+def test_unknown_legacy_data_answers_expired():
+    codec = CallbackCodec()
+    router, _ = build_router(codec)
+    update = make_update("att_unknown_2025-10-25")
+
+    asyncio.run(router.dispatch(update, make_context()))
+    assert update.callback_query.answer.await_args.kwargs["show_alert"] is True
@@ -0,0 +1,159 @@
+# =============================================================================
+# FILE: tests/test_class_calendar.py
+# DESCRIPTION: Tests for the per-class session calendar
+# LOCATION: tests/test_class_calendar.py
+# PURPOSE: Check meeting dates with skip dates, holidays and class day
+#          changes, and the date validation built on them
+# =============================================================================
+
+"""
+Session calendar tests.
+"""
+
+from datetime import date
+
+import pytest
+
+from database import get_db
+from database.operations import (
+    add_skip_date,
+    get_attendance,
+    load_session_calendar,
+    mark_attendance,
+    remove_skip_date,
+    session_calendar,
+    set_class_day,
+    validate_class_date,
+)
+from database.operations.class_calendar import SessionCalendar
+
+MONDAY, SATURDAY = 0, 5
+
+
+@pytest.fixture
+def calendar():
+    """Class 1 meets on Saturdays, class 2 on Mondays."""
+    calendar = SessionCalendar()
+    calendar.load(
+        {1: SATURDAY, 2: MONDAY},
+        [(1, date(2025, 10, 11)), (None, date(2025, 10, 25))],
+    )
+    return calendar
+
+
+def test_sessions_skip_class_dates_and_holidays(calendar):
+    assert calendar.sessions_in_range(1, date(2025, 10, 1), date(2025, 10, 31)) == [
+        date(2025, 10, 4),
+        date(2025, 10, 18),
+    ]
+    assert calendar.count_sessions_in_month(1, 2025, 10) == 2
+    # The class 1 skip date does not apply to class 2 (the holiday does)
+    assert calendar.count_sessions_in_month(2, 2025, 10) == 4
+    assert calendar.is_skipped(2, date(2025, 10, 25))
+    assert not calendar.is_skipped(2, date(2025, 10, 11))
+
+
+def test_sessions_across_years(calendar):
+    sessions = calendar.sessions_in_range(1, date(2025, 12, 20), date(2026, 1, 10))
+
+    assert sessions == [date(2025, 12, 20), date(2025, 12, 27), date(2026, 1, 3), date(2026, 1, 10)]
+    assert calendar.count_sessions(1, date(2025, 12, 20), date(2026, 1, 10)) == 4
+
+
+def test_last_and_next_session(calendar):
+    assert calendar.last_session(1, date(2025, 10, 17)) == date(2025, 10, 4)
+    assert calendar.last_session(1, date(2025, 10, 18)) == date(2025, 10, 18)
+    assert calendar.next_session(1, date(2025, 10, 18)) == date(2025, 11, 1)
+
+
+def test_skip_updates(calendar):
+    calendar.add_skip(1, date(2025, 10, 18))
+    assert not calendar.is_session(1, date(2025, 10, 18))
+
+    calendar.remove_skip(1, date(2025, 10, 18))
+    assert calendar.is_session(1, date(2025, 10, 18))
+
+
+def test_class_day_change_keeps_earlier_dates(calendar):
+    calendar.set_class_day(1, MONDAY, date(2025, 11, 3))
+
+    assert calendar.is_session(1, date(2025, 11, 1))
+    assert calendar.is_session(1, date(2025, 11, 3))
+    assert not calendar.is_session(1, date(2025, 11, 8))
+    assert calendar.class_day(1, date(2025, 11, 2)) == SATURDAY
+    assert calendar.class_day(1) == MONDAY
+
+
+def test_later_class_day_change_is_replaced(calendar):
+    calendar.set_class_day(1, MONDAY, date(2025, 12, 1))
+    calendar.set_class_day(1, SATURDAY, date(2025, 11, 1))
+
+    assert calendar.class_day_history(1) == (SATURDAY, ())
+    assert calendar.is_session(1, date(2025, 12, 6))
+
+
+@pytest.mark.parametrize(
+    "date_str, expected",
+    [
+        ("2025-10-04", (True, date(2025, 10, 4), "")),
+        ("2025-10-05", (False, date(2025, 10, 5), "not_class_day")),
+        ("2025-10-35", (False, None, "invalid_date_format")),
+    ],
+)
+def test_validate_class_date(class_id, date_str, expected):
+    assert validate_class_date(date_str, class_id) == expected
+
+
+def test_skip_date_operations(class_id):
+    success, skip, error = add_skip_date("2025-10-04", class_id, "Trip")
+    assert (success, skip.reason, error) == (True, "Trip", "")
+    assert validate_class_date("2025-10-04", class_id)[2] == "class_skipped"
+    # Other classes still meet
+    assert validate_class_date("2025-10-04", class_id + 1)[0]
+
+    assert add_skip_date("2025-10-05", class_id)[2] == "not_class_day"
+    assert add_skip_date("2025-10-04", class_id)[2] == "class_skipped"
+
+    assert remove_skip_date("2025-10-04", class_id) == (True, "")
+    assert validate_class_date("2025-10-04", class_id)[0]
+    assert remove_skip_date("2025-10-04", class_id) == (False, "skip_date_not_found")
+
+
+def test_holiday_applies_to_every_class(class_id):
+    assert add_skip_date("2025-10-04")[0]
+
+    assert validate_class_date("2025-10-04", class_id)[2] == "class_skipped"
+    assert validate_class_date("2025-10-04")[2] == "class_skipped"
+
+
+def test_failed_transaction_restores_the_calendar(class_id):
+    with pytest.raises(RuntimeError):
+        with get_db() as db:
+            add_skip_date("2025-10-04", class_id, db=db)
+            set_class_day(class_id, MONDAY, "2025-10-01", db=db)
+            assert not session_calendar.is_session(class_id, date(2025, 10, 4))
+            raise RuntimeError("rolled back")
+
+    assert session_calendar.is_session(class_id, date(2025, 10, 4))
+    assert session_calendar.class_day_history(class_id) == (SATURDAY, ())
+
+
+def test_class_day_change_keeps_earlier_attendance(class_id, teacher, students):
+    student = students[0]
+    assert mark_attendance(student.id, class_id, "2025-10-04", True, teacher.id)[0]
+
+    assert set_class_day(class_id, MONDAY, "2025-10-06") == (True, "")
+    assert get_attendance(student.id, class_id, "2025-10-04") is not None
+    assert validate_class_date("2025-10-11", class_id)[2] == "not_class_day"
+    assert validate_class_date("2025-10-13", class_id)[0]
+
+    # The change is stored: a restart sees the same dates
+    load_session_calendar()
+    assert session_calendar.is_session(class_id, date(2025, 10, 4))
+    assert session_calendar.is_session(class_id, date(2025, 10, 13))
+
+
+def test_set_class_day_validates(class_id):
+    assert set_class_day(class_id, 7) == (False, "invalid_class_day")
+    assert set_class_day(class_id, MONDAY, "next week") == (False, "invalid_date_format")
+    assert set_class_day(class_id + 1, MONDAY) == (False, "class_not_found")
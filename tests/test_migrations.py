@@ -0,0 +1,111 @@
+# =============================================================================
+# FILE: tests/test_migrations.py
+# DESCRIPTION: Tests for Alembic migrations that rewrite data
+# LOCATION: tests/test_migrations.py
+# PURPOSE: Check that the unique attendance migration removes duplicate
+#          records before it creates the unique indexes
+# =============================================================================
+
+"""
+Migration tests.
+
+Migrations run in-process on their own SQLite database (the bot's engine is
+left alone) through an Alembic Operations context.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from database.models import Attendance, Base
+
+VERSIONS_DIR = Path(__file__).resolve().parents[1] / "database" / "migrations" / "versions"
+
+
+def load_migration(revision):
+    """Import a migration module by its revision ID."""
+    path = next(VERSIONS_DIR.glob(f"{revision}_*.py"))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_upgrade(connection, revision):
+    with Operations.context(MigrationContext.configure(connection)):
+        load_migration(revision).upgrade()
+
+
+@pytest.fixture
+def old_schema(tmp_path):
+    """A database with the attendance table as before c4a1f2d9e7b3."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index in Attendance.__table__.indexes:
+            if index.unique:
+                index.drop(connection)
+        connection.execute(
+            text(
+                "CREATE INDEX idx_attendance_user_class_date "
+                "ON attendance (user_id, class_id, date)"
+            )
+        )
+    yield engine
+    engine.dispose()
+
+
+def insert_attendance(connection, rows):
+    connection.execute(
+        text(
+            "INSERT INTO attendance (id, user_id, class_id, date, status, marked_by) "
+            "VALUES (:id, :user_id, :class_id, :date, :status, 1)"
+        ),
+        [
+            dict(zip(("id", "user_id", "class_id", "date", "status"), row))
+            for row in rows
+        ],
+    )
+
+
+def test_unique_attendance_keeps_the_newest_duplicate(old_schema):
+    with old_schema.begin() as connection:
+        insert_attendance(
+            connection,
+            [
+                (1, 1, 1, "2025-10-25", True),
+                (2, 1, 1, "2025-10-25", False),  # Newest for user 1 in class 1
+                (3, 1, 2, "2025-10-25", True),  # Another class: kept
+                (4, 2, None, "2025-10-25", True),
+                (5, 2, None, "2025-10-25", False),  # Newest without a class
+                (6, 2, None, "2025-11-01", True),
+            ],
+        )
+        run_upgrade(connection, "c4a1f2d9e7b3")
+
+    with old_schema.connect() as connection:
+        kept = connection.execute(
+            text("SELECT id, status FROM attendance ORDER BY id")
+        ).all()
+    assert [tuple(row) for row in kept] == [(2, 0), (3, 1), (5, 0), (6, 1)]
+
+    indexes = {index["name"]: index for index in inspect(old_schema).get_indexes("attendance")}
+    assert "idx_attendance_user_class_date" not in indexes
+    assert indexes["uq_attendance_user_class_date"]["unique"]
+    assert indexes["uq_attendance_user_date_no_class"]["unique"]
+
+
+def test_unique_attendance_rejects_new_duplicates(old_schema):
+    with old_schema.begin() as connection:
+        run_upgrade(connection, "c4a1f2d9e7b3")
+
+    with old_schema.begin() as connection:
+        insert_attendance(connection, [(1, 1, None, "2025-10-25", True)])
+    with pytest.raises(IntegrityError):
+        with old_schema.begin() as connection:
+            insert_attendance(connection, [(2, 1, None, "2025-10-25", False)])
@@ -0,0 +1,130 @@
+# =============================================================================
+# FILE: tests/test_statistics.py
+# DESCRIPTION: Tests for the materialized monthly attendance statistics
+# LOCATION: tests/test_statistics.py
+# PURPOSE: Check that every attendance and calendar write leaves
+#          AttendanceStatistics equal to a full recomputation
+# =============================================================================
+
+"""
+Attendance statistics tests.
+"""
+
+from datetime import date
+
+from database import Attendance, AttendanceStatistics, detach, get_db
+from database.operations import (
+    add_skip_date,
+    bulk_mark_attendance,
+    delete_attendance,
+    find_statistics_mismatches,
+    get_user_statistics,
+    mark_attendance,
+    mark_attendance_batch,
+    rebuild_statistics,
+    refresh_statistics,
+    remove_skip_date,
+    set_class_day,
+)
+
+OCTOBER = ("2025-10-04", "2025-10-11", "2025-10-18", "2025-10-25")
+
+
+def stats_row(user_id, class_id, month=date(2025, 10, 1)):
+    with get_db() as db:
+        row = (
+            db.query(AttendanceStatistics)
+            .filter_by(user_id=user_id, class_id=class_id, month=month)
+            .one()
+        )
+        detach(db, row)
+        return row
+
+
+def test_attendance_writes_keep_statistics_in_step(class_id, teacher, students):
+    student = students[0]
+    # Absent, present, absent
+    for day, status in zip(OCTOBER[:3], (False, True, False)):
+        assert mark_attendance(student.id, class_id, day, status, teacher.id)[0]
+    assert find_statistics_mismatches() == []
+    assert stats_row(student.id, class_id).consecutive_absences == 1
+
+    rows = [(s.id, class_id, "2025-11-01", True, None, teacher.id) for s in students]
+    assert mark_attendance_batch(rows)[0]
+    assert find_statistics_mismatches() == []
+
+    assert bulk_mark_attendance(class_id, "2025-10-25", False, teacher.id)[0]
+    assert find_statistics_mismatches() == []
+    assert stats_row(student.id, class_id).consecutive_absences == 2
+
+    # Without the present mark every October record is an absence
+    assert delete_attendance(student.id, class_id, "2025-10-11")[0]
+    assert find_statistics_mismatches() == []
+    assert stats_row(student.id, class_id).consecutive_absences == 3
+
+
+def test_calendar_changes_keep_statistics_in_step(class_id, teacher, students):
+    student = students[0]
+    mark_attendance(student.id, class_id, "2025-10-04", True, teacher.id)
+
+    assert add_skip_date("2025-10-18", class_id)[0]
+    assert find_statistics_mismatches() == []
+    assert stats_row(student.id, class_id).total_sessions == 3
+
+    assert remove_skip_date("2025-10-18", class_id)[0]
+    assert add_skip_date("2025-10-11")[0]  # Holiday for every class
+    assert find_statistics_mismatches() == []
+
+    assert set_class_day(class_id, 0, "2025-10-20")[0]  # Mondays from then on
+    assert find_statistics_mismatches() == []
+
+
+def test_percentage_is_out_of_the_sessions_held(class_id, teacher, students):
+    student = students[0]
+    mark_attendance(student.id, class_id, "2025-10-04", True, teacher.id)
+
+    row = stats_row(student.id, class_id)
+    assert (row.total_sessions, row.attendance_percentage) == (4, 25.0)
+
+    add_skip_date("2025-10-25", class_id)
+    assert stats_row(student.id, class_id).attendance_percentage == round(100 / 3, 1)
+
+
+def test_summary_counts_sessions_held(class_id, teacher, students):
+    student = students[0]
+    mark_attendance(student.id, class_id, "2025-10-04", True, teacher.id)
+    mark_attendance(student.id, class_id, "2025-10-11", False, teacher.id)
+
+    summary = get_user_statistics(student.id, date(2025, 10, 1))
+    assert (summary["present"], summary["absent"], summary["total"]) == (1, 1, 2)
+    assert summary["sessions"] == 4
+    assert summary["percentage"] == 25.0
+
+
+def test_refresh_statistics_catches_up_with_raw_writes(class_id, teacher, students):
+    student = students[0]
+    with get_db() as db:
+        db.add(
+            Attendance(
+                user_id=student.id,
+                class_id=class_id,
+                date=date(2025, 10, 4),
+                status=False,
+                marked_by=teacher.id,
+            )
+        )
+    assert find_statistics_mismatches() != []
+
+    with get_db() as db:
+        refresh_statistics(db, [(student.id, class_id, date(2025, 10, 4))])
+    assert find_statistics_mismatches() == []
+
+
+def test_rebuild_matches_incremental_updates(class_id, teacher, students):
+    for index, day in enumerate(OCTOBER):
+        for student in students:
+            mark_attendance(student.id, class_id, day, index % 2 == 0, teacher.id)
+    mark_attendance(teacher.id, None, "2025-10-04", True, teacher.id)
+
+    assert rebuild_statistics() == len(students) + 1
+    assert find_statistics_mismatches() == []
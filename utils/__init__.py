@@ -23,15 +23,35 @@ from utils.birthday_utils import (
     is_birthday_today,
 )
 
+# Cache
+from utils.cache import TTLCache
+
+# Keyboards
+from utils.keyboards import (
+    cached_keyboard,
+    clear_keyboard_cache,
+    extend_keyboard,
+    prebuild_keyboards,
+)
+
+# Message edits
+from utils.edit_coalescer import EditCoalescer, edit_coalescer
+
+# Callback data
+from utils.callbacks import CallbackCodec, callback_codec, encode_callback
+from utils.router import CallbackRouter, callback_router
+
 # Date utilities
 from utils.date_utils import (
     count_saturdays_in_month,
     format_date_with_day,
+    get_class_days_in_range,
     get_current_date,
     get_current_datetime,
     get_current_month_saturdays,
     get_last_n_saturdays,
     get_last_saturday,
+    get_month_start,
     get_next_saturday,
     get_previous_saturday,
     get_saturdays_in_month,
@@ -42,8 +62,12 @@ from utils.date_utils import (
 )
 from utils.logging_config import setup_logging
 
+# Pagination
+from utils.pagination import build_page_buttons, get_page_bounds
+
 # Permissions
 from utils.permissions import (
+    PermissionContext,
     can_broadcast,
     can_change_roles,
     can_create_backups,
@@ -69,6 +93,7 @@ from utils.translations import (
     get_role_name,
     get_success_message,
     get_translation,
+    reload_translations,
 )
 
 # Validators
@@ -87,14 +112,35 @@ from utils.validators import (
 __all__ = [
     # Logging
     "setup_logging",
+    # Pagination
+    "get_page_bounds",
+    "build_page_buttons",
+    # Cache
+    "TTLCache",
+    # Keyboards
+    "cached_keyboard",
+    "clear_keyboard_cache",
+    "extend_keyboard",
+    "prebuild_keyboards",
+    # Message edits
+    "EditCoalescer",
+    "edit_coalescer",
+    # Callback data
+    "CallbackCodec",
+    "callback_codec",
+    "encode_callback",
+    "CallbackRouter",
+    "callback_router",
     # Date utilities
     "get_current_date",
     "get_current_datetime",
     "is_saturday",
     "get_next_saturday",
     "get_last_saturday",
+    "get_month_start",
     "get_previous_saturday",
     "get_saturdays_in_range",
+    "get_class_days_in_range",
     "count_saturdays_in_month",
     "get_saturdays_in_month",
     "get_current_month_saturdays",
@@ -125,6 +171,7 @@ __all__ = [
     "get_birthday_message",
     # Translations
     "get_translation",
+    "reload_translations",
     "get_bilingual_text",
     "format_phone_display",
     "format_date_display",
@@ -133,6 +180,7 @@ __all__ = [
     "get_error_message",
     "get_success_message",
     # Permissions
+    "PermissionContext",
     "get_user_role",
     "get_user_class",
     "is_authorized",
@@ -12,8 +12,10 @@ Birthday and age calculation utilities.
 from datetime import date, datetime, timedelta
 from typing import List, Optional, Tuple
 
+from sqlalchemy.orm import Session
+
 from config import BIRTHDAY_NOTIFICATION_DAYS, BIRTHDAY_UPCOMING_DAYS
-from database import User, get_db
+from database import User, detach, get_db
 
 
 def calculate_age(birthday: date, reference_date: Optional[date] = None) -> int:
@@ -117,7 +119,9 @@ def is_birthday_soon(
 
 
 def get_upcoming_birthdays(
-    days_ahead: int = BIRTHDAY_UPCOMING_DAYS, class_id: Optional[int] = None
+    days_ahead: int = BIRTHDAY_UPCOMING_DAYS,
+    class_id: Optional[int] = None,
+    db: Optional[Session] = None,
 ) -> List[Tuple[User, int, int]]:
     """
     Get list of users with upcoming birthdays.
@@ -125,6 +129,7 @@ def get_upcoming_birthdays(
     Args:
         days_ahead: Number of days to look ahead (default: 30)
         class_id: Filter by class ID (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of tuples: (user, days_until_birthday, age_turning)
@@ -132,7 +137,7 @@ def get_upcoming_birthdays(
     upcoming = []
     today = date.today()
 
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(User).filter(User.birthday.isnot(None))
 
         if class_id:
@@ -141,6 +146,7 @@ def get_upcoming_birthdays(
         users = query.all()
 
         for user in users:
+            detach(db, user)
             days_until = days_until_birthday(user.birthday, today)
 
             if 0 <= days_until <= days_ahead:
@@ -155,7 +161,10 @@ def get_upcoming_birthdays(
 
 
 def get_birthdays_in_month(
-    month: int, year: Optional[int] = None, class_id: Optional[int] = None
+    month: int,
+    year: Optional[int] = None,
+    class_id: Optional[int] = None,
+    db: Optional[Session] = None,
 ) -> List[Tuple[User, date, int]]:
     """
     Get all birthdays in a specific month.
@@ -164,6 +173,7 @@ def get_birthdays_in_month(
         month: Month number (1-12)
         year: Year (default: current year)
         class_id: Filter by class ID (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of tuples: (user, birthday_this_year, age_turning)
@@ -173,7 +183,7 @@ def get_birthdays_in_month(
 
     birthdays = []
 
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(User).filter(User.birthday.isnot(None))
 
         if class_id:
@@ -182,6 +192,7 @@ def get_birthdays_in_month(
         users = query.all()
 
         for user in users:
+            detach(db, user)
             if user.birthday.month == month:
                 birthday_this_year = date(year, user.birthday.month, user.birthday.day)
                 age_turning = calculate_age(user.birthday, birthday_this_year)
@@ -339,7 +350,9 @@ def get_birthday_message(
 
 
 def notify_upcoming_birthdays(
-    class_id: Optional[int] = None, days_ahead: int = BIRTHDAY_NOTIFICATION_DAYS
+    class_id: Optional[int] = None,
+    days_ahead: int = BIRTHDAY_NOTIFICATION_DAYS,
+    db: Optional[Session] = None,
 ) -> List[str]:
     """
     Generate list of birthday notification messages.
@@ -347,12 +360,13 @@ def notify_upcoming_birthdays(
     Args:
         class_id: Filter by class ID (optional)
         days_ahead: Days ahead to check (default: 3)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         List of notification messages
     """
     messages = []
-    upcoming = get_upcoming_birthdays(days_ahead, class_id)
+    upcoming = get_upcoming_birthdays(days_ahead, class_id, db=db)
 
     for user, days_until, age_turning in upcoming:
         msg_ar = get_birthday_message(user, days_until, age_turning, "ar")
@@ -364,19 +378,22 @@ def notify_upcoming_birthdays(
     return messages
 
 
-def get_age_statistics(class_id: Optional[int] = None) -> dict:
+def get_age_statistics(
+    class_id: Optional[int] = None, db: Optional[Session] = None
+) -> dict:
     """
     Get age statistics for a class or all users.
 
     Args:
         class_id: Filter by class ID (optional)
+        db: Optional SQLAlchemy session (defaults to the request session)
 
     Returns:
         Dictionary with age statistics
     """
     ages = []
 
-    with get_db() as db:
+    with get_db(db) as db:
         query = db.query(User).filter(User.birthday.isnot(None))
 
         if class_id:
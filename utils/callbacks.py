@@ -0,0 +1,348 @@
+# =============================================================================
+# FILE: utils/callbacks.py
+# DESCRIPTION: Compact callback_data codec and dispatcher
+# LOCATION: utils/callbacks.py
+# PURPOSE: Pack callback actions and their arguments into short tokens and
+#          route them to handlers with one dict lookup
+# =============================================================================
+
+"""
+Callback data codec.
+
+Buttons that carry arguments (user IDs, dates, page numbers) use encoded
+callback data instead of strings like "att_toggle_42_2025-10-25" that
+every handler had to split("_") again:
+
+    "~" + base64url(action code, packed arguments)
+
+Ints are varints, dates are days since 2000-01-01 and strings are
+length-prefixed UTF-8, so a toggle button takes ~7 bytes instead of ~30.
+If a token would exceed Telegram's 64-byte limit, the arguments are kept
+in an in-memory LRU table and the token only references them (such
+buttons stop working after a restart or eviction and answer "expired").
+
+Buttons sent before encoding was introduced still carry the plain
+strings; LEGACY_CALLBACKS maps them to the same actions, so they keep
+working (unknown plain data answers "expired").
+
+Usage:
+    data = callback_codec.encode("att_toggle", student.id, date_str)
+    callback_codec.register_handler("att_toggle", toggle_attendance)
+    callback_router.add_prefix(CALLBACK_PREFIX, callback_codec.dispatch)
+    for prefix in LEGACY_CALLBACK_PREFIXES:
+        callback_router.add_prefix(prefix, callback_codec.dispatch_legacy)
+
+The handler is called as handler(update, context, *arguments).
+"""
+
+import base64
+import logging
+import re
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from config import CALLBACK_PAYLOAD_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# First character of encoded callback data (plain callbacks never start with it)
+CALLBACK_PREFIX = "~"
+
+# Telegram's limit for callback_data
+MAX_CALLBACK_BYTES = 64
+
+# Set in the action byte when the arguments live in the payload table
+PAYLOAD_FLAG = 0x80
+
+DATE_EPOCH = date(2000, 1, 1)
+
+# Action name -> (code, argument types). Codes are stored in buttons that
+# were already sent to chats: never renumber or reuse them.
+CALLBACK_ACTIONS: Dict[str, Tuple[int, Tuple[type, ...]]] = {
+    # Attendance marking
+    "att_date": (1, (date,)),                 # date
+    "att_tab": (2, (str, date)),              # group, date
+    "att_page": (3, (str, date, int)),        # group, date, page
+    "att_toggle": (4, (int, date)),           # user_id, date
+    "att_confirm": (5, (str, str, date)),     # present/absent, group, date
+    "att_all_present": (6, (str, date)),      # group, date
+    "att_all_absent": (7, (str, date)),       # group, date
+    "att_save": (8, (str, date)),             # group, date
+    # Absence reasons
+    "att_reason": (9, (int, date)),           # user_id, date
+    "reason_set": (10, (str, int, date)),     # sick/travel/excused, user_id, date
+    "reason_custom": (11, (int, date)),       # user_id, date
+    "edit_reason": (12, (int, date)),         # user_id, date
+    "clear_reason": (13, (int, date)),        # user_id, date
+}
+
+# Plain callback data of buttons sent before CALLBACK_ACTIONS existed
+_DATE = r"(\d{4}-\d{2}-\d{2})"
+_GROUP = r"(students|teachers)"
+LEGACY_CALLBACKS: Tuple[Tuple[re.Pattern, str], ...] = tuple(
+    (re.compile(pattern), action)
+    for pattern, action in (
+        (rf"att_date_{_DATE}", "att_date"),
+        (rf"att_tab_{_GROUP}_{_DATE}", "att_tab"),
+        (rf"att_page_{_GROUP}_{_DATE}_(\d+)", "att_page"),
+        (rf"att_toggle_(\d+)_{_DATE}", "att_toggle"),
+        (rf"att_confirm_(present|absent)_{_GROUP}_{_DATE}", "att_confirm"),
+        (rf"att_all_present_{_GROUP}_{_DATE}", "att_all_present"),
+        (rf"att_all_absent_{_GROUP}_{_DATE}", "att_all_absent"),
+        (rf"att_save_{_GROUP}_{_DATE}", "att_save"),
+        (rf"att_reason_(\d+)_{_DATE}", "att_reason"),
+        (rf"reason_(sick|travel|excused)_(\d+)_{_DATE}", "reason_set"),
+        (rf"reason_custom_(\d+)_{_DATE}", "reason_custom"),
+        (rf"edit_reason_(\d+)_{_DATE}", "edit_reason"),
+        (rf"clear_reason_(\d+)_{_DATE}", "clear_reason"),
+    )
+)
+
+# Router prefixes covering every LEGACY_CALLBACKS pattern
+LEGACY_CALLBACK_PREFIXES = ("att_", "reason_", "edit_reason_", "clear_reason_")
+
+
+def _pack_varint(value: int, out: bytearray) -> None:
+    """Append a non-negative int as a LEB128 varint."""
+    if value < 0:
+        raise ValueError(f"Cannot encode negative value {value}")
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _unpack_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read a varint at pos; returns (value, next position)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+class CallbackCodec:
+    """
+    Encode, decode and dispatch callback data for CALLBACK_ACTIONS.
+
+    Usage:
+        data = callback_codec.encode("att_page", "students", date_str, 2)
+        action, args = callback_codec.decode(data)
+    """
+
+    def __init__(self, payload_cache_size: int = CALLBACK_PAYLOAD_CACHE_SIZE):
+        self.payload_cache_size = payload_cache_size
+        self._by_code = {
+            code: (action, types) for action, (code, types) in CALLBACK_ACTIONS.items()
+        }
+        self._payloads: "OrderedDict[int, Tuple]" = OrderedDict()
+        self._next_payload_key = 0
+        self._handlers: Dict[str, Callable] = {}
+
+    # -------------------------------------------------------------------------
+    # Encoding
+    # -------------------------------------------------------------------------
+
+    def encode(self, action: str, *args: Any) -> str:
+        """
+        Encode an action and its arguments as callback data.
+
+        Args:
+            action: Action name from CALLBACK_ACTIONS
+            *args: Arguments matching the action's types (dates may be
+                date objects or YYYY-MM-DD strings)
+
+        Returns:
+            Callback data string (at most 64 bytes)
+        """
+        code, types = CALLBACK_ACTIONS[action]
+        if len(args) != len(types):
+            raise ValueError(f"{action} takes {len(types)} arguments, got {len(args)}")
+
+        packed = bytearray([code])
+        for value, kind in zip(args, types):
+            self._pack_value(kind, value, packed)
+
+        data = self._to_text(packed)
+        if len(data.encode()) <= MAX_CALLBACK_BYTES:
+            return data
+
+        # Too long for Telegram: keep the arguments server-side
+        key = self._store_payload(tuple(args))
+        packed = bytearray([code | PAYLOAD_FLAG])
+        _pack_varint(key, packed)
+        return self._to_text(packed)
+
+    @staticmethod
+    def _pack_value(kind: type, value: Any, out: bytearray) -> None:
+        """Append one argument."""
+        if kind is int:
+            _pack_varint(int(value), out)
+        elif kind is date:
+            if isinstance(value, str):
+                value = date.fromisoformat(value)
+            _pack_varint((value - DATE_EPOCH).days, out)
+        else:
+            raw = str(value).encode()
+            _pack_varint(len(raw), out)
+            out.extend(raw)
+
+    @staticmethod
+    def _to_text(packed: bytearray) -> str:
+        return CALLBACK_PREFIX + base64.urlsafe_b64encode(bytes(packed)).rstrip(b"=").decode()
+
+    def _store_payload(self, args: Tuple) -> int:
+        """Keep arguments in the LRU payload table and return their key."""
+        key = self._next_payload_key
+        self._next_payload_key += 1
+        self._payloads[key] = args
+        while len(self._payloads) > self.payload_cache_size:
+            self._payloads.popitem(last=False)
+        return key
+
+    # -------------------------------------------------------------------------
+    # Decoding
+    # -------------------------------------------------------------------------
+
+    def decode(self, data: Optional[str]) -> Optional[Tuple[str, List[Any]]]:
+        """
+        Decode callback data produced by encode().
+
+        Args:
+            data: Callback data
+
+        Returns:
+            (action, arguments) with dates as YYYY-MM-DD strings, or None if
+            the data is not encoded, malformed or references an evicted payload
+        """
+        if not data or not data.startswith(CALLBACK_PREFIX):
+            return None
+        token = data[len(CALLBACK_PREFIX):]
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            action, types = self._by_code[raw[0] & ~PAYLOAD_FLAG]
+
+            if raw[0] & PAYLOAD_FLAG:
+                key, _ = _unpack_varint(raw, 1)
+                if key not in self._payloads:
+                    return None
+                self._payloads.move_to_end(key)
+                args = [
+                    value.isoformat() if isinstance(value, date) else value
+                    for value in self._payloads[key]
+                ]
+                return action, args
+
+            args = []
+            pos = 1
+            for kind in types:
+                value, pos = _unpack_varint(raw, pos)
+                if kind is date:
+                    value = (DATE_EPOCH + timedelta(days=value)).isoformat()
+                elif kind is not int:
+                    value, pos = raw[pos : pos + value].decode(), pos + value
+                args.append(value)
+            return action, args
+        except (IndexError, KeyError, ValueError, UnicodeDecodeError):
+            return None
+
+    @staticmethod
+    def decode_legacy(data: Optional[str]) -> Optional[Tuple[str, List[Any]]]:
+        """
+        Decode plain callback data of buttons sent before encoding.
+
+        Args:
+            data: Callback data such as "att_toggle_42_2025-10-25"
+
+        Returns:
+            (action, arguments) like decode(), or None if no pattern matches
+        """
+        for pattern, action in LEGACY_CALLBACKS:
+            match = pattern.fullmatch(data or "")
+            if match:
+                types = CALLBACK_ACTIONS[action][1]
+                args = [
+                    int(value) if kind is int else value
+                    for value, kind in zip(match.groups(), types)
+                ]
+                return action, args
+        return None
+
+    def action_of(self, data: Optional[str]) -> Optional[str]:
+        """Get the action name of encoded callback data without its arguments."""
+        if not data or not data.startswith(CALLBACK_PREFIX) or len(data) < 3:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(data[1:3] + "==")
+        except ValueError:
+            return None
+        entry = self._by_code.get(raw[0] & ~PAYLOAD_FLAG)
+        return entry[0] if entry else None
+
+    # -------------------------------------------------------------------------
+    # Dispatch
+    # -------------------------------------------------------------------------
+
+    def register_handler(self, action: str, handler: Callable) -> None:
+        """
+        Route an action to handler(update, context, *arguments).
+
+        Args:
+            action: Action name from CALLBACK_ACTIONS
+            handler: Async callback handler
+        """
+        if action not in CALLBACK_ACTIONS:
+            raise KeyError(f"Unknown callback action: {action}")
+        self._handlers[action] = handler
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Decode the callback query and call the handler of its action."""
+        return await self._call(update, context, self.decode(update.callback_query.data))
+
+    async def dispatch_legacy(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Like dispatch, for plain callback data (see LEGACY_CALLBACKS)."""
+        return await self._call(
+            update, context, self.decode_legacy(update.callback_query.data)
+        )
+
+    async def _call(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        decoded: Optional[Tuple[str, List[Any]]],
+    ):
+        """Call the handler of a decoded action, or answer "expired"."""
+        query = update.callback_query
+        handler = self._handlers.get(decoded[0]) if decoded else None
+        if handler is None:
+            # Import here to avoid circular imports
+            from middleware.auth import get_user_lang
+            from utils.translations import get_translation
+
+            await query.answer(
+                get_translation(get_user_lang(context), "button_expired"),
+                show_alert=True,
+            )
+            return
+        action, args = decoded
+        return await handler(update, context, *args)
+
+
+# Shared codec for all handlers
+callback_codec = CallbackCodec()
+
+
+def encode_callback(action: str, *args: Union[int, str, date]) -> str:
+    """Shortcut for callback_codec.encode."""
+    return callback_codec.encode(action, *args)
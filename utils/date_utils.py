@@ -8,15 +8,32 @@
 """
 Date utility functions for Saturday-only school operations.
 All attendance and class-related dates must be Saturdays.
+
+Class days are found arithmetically (first class day of a range, then
+steps of 7 days) rather than by checking every day, so ranges spanning
+years cost O(weeks) to list and O(1) to count.
 """
 
 from calendar import monthrange
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional, Tuple, Union
 
 import pytz
 
 from config import CLASS_DAY_OF_WEEK, TIMEZONE
+from utils.translations import get_translation
+
+# Translation keys of the weekdays (0=Monday, 6=Sunday)
+WEEKDAY_KEYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
 
 
 def get_current_datetime() -> datetime:
@@ -105,6 +122,32 @@ def get_previous_saturday(from_date: Optional[date] = None) -> date:
     return from_date - timedelta(days=days_back)
 
 
+def _first_class_day_on_or_after(start_date: date, class_day: int) -> date:
+    """Get start_date if it falls on class_day, otherwise the next one."""
+    return start_date + timedelta(days=(class_day - start_date.weekday()) % 7)
+
+
+def get_class_days_in_range(
+    start_date: date, end_date: date, class_day: int = CLASS_DAY_OF_WEEK
+) -> List[date]:
+    """
+    Get all dates falling on a weekday between two dates (inclusive).
+
+    Args:
+        start_date: Start date
+        end_date: End date
+        class_day: Weekday of the class (0=Monday, 6=Sunday)
+
+    Returns:
+        List of dates in range
+    """
+    first = _first_class_day_on_or_after(start_date, class_day)
+    if first > end_date:
+        return []
+    weeks = (end_date - first).days // 7 + 1
+    return [first + timedelta(weeks=week) for week in range(weeks)]
+
+
 def get_saturdays_in_range(start_date: date, end_date: date) -> List[date]:
     """
     Get all Saturdays between two dates (inclusive).
@@ -116,15 +159,7 @@ def get_saturdays_in_range(start_date: date, end_date: date) -> List[date]:
     Returns:
         List of Saturday dates in range
     """
-    saturdays = []
-    current = start_date
-
-    while current <= end_date:
-        if is_saturday(current):
-            saturdays.append(current)
-        current += timedelta(days=1)
-
-    return saturdays
+    return get_class_days_in_range(start_date, end_date)
 
 
 def count_saturdays_in_range(start_date: date, end_date: date) -> int:
@@ -138,7 +173,31 @@ def count_saturdays_in_range(start_date: date, end_date: date) -> int:
     Returns:
         Number of Saturdays
     """
-    return len(get_saturdays_in_range(start_date, end_date))
+    first = _first_class_day_on_or_after(start_date, CLASS_DAY_OF_WEEK)
+    if first > end_date:
+        return 0
+    return (end_date - first).days // 7 + 1
+
+
+@lru_cache(maxsize=256)
+def _month_class_days(year: int, month: int, class_day: int) -> Tuple[date, ...]:
+    """
+    Get the class days of a month (cached per month and class weekday).
+
+    Args:
+        year: Year
+        month: Month (1-12)
+        class_day: Weekday of the class (0=Monday, 6=Sunday)
+
+    Returns:
+        Tuple of dates
+    """
+    first = _first_class_day_on_or_after(date(year, month, 1), class_day)
+    days_in_month = monthrange(year, month)[1]
+    return tuple(
+        first + timedelta(weeks=week)
+        for week in range((days_in_month - first.day) // 7 + 1)
+    )
 
 
 def count_saturdays_in_month(year: int, month: int) -> int:
@@ -152,11 +211,7 @@ def count_saturdays_in_month(year: int, month: int) -> int:
     Returns:
         Number of Saturdays in the month
     """
-    days_in_month = monthrange(year, month)[1]
-    first_day = date(year, month, 1)
-    last_day = date(year, month, days_in_month)
-
-    return count_saturdays_in_range(first_day, last_day)
+    return len(_month_class_days(year, month, CLASS_DAY_OF_WEEK))
 
 
 def get_saturdays_in_month(year: int, month: int) -> List[date]:
@@ -170,11 +225,7 @@ def get_saturdays_in_month(year: int, month: int) -> List[date]:
     Returns:
         List of Saturday dates
     """
-    days_in_month = monthrange(year, month)[1]
-    first_day = date(year, month, 1)
-    last_day = date(year, month, days_in_month)
-
-    return get_saturdays_in_range(first_day, last_day)
+    return list(_month_class_days(year, month, CLASS_DAY_OF_WEEK))
 
 
 def get_current_month_saturdays() -> List[date]:
@@ -188,6 +239,24 @@ def get_current_month_saturdays() -> List[date]:
     return get_saturdays_in_month(today.year, today.month)
 
 
+def get_month_start(months_ago: int = 0, from_date: Optional[date] = None) -> date:
+    """
+    Get the first day of the month `months_ago` months before from_date.
+
+    Args:
+        months_ago: Number of months to go back (0 = current month)
+        from_date: Reference date (default: today)
+
+    Returns:
+        First day of that month
+    """
+    if from_date is None:
+        from_date = get_current_date()
+
+    month_index = from_date.year * 12 + from_date.month - 1 - months_ago
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
 def validate_saturday(date_str: str) -> Tuple[bool, Optional[date], str]:
     """
     Validate that a date string is a valid Saturday.
@@ -253,14 +322,8 @@ def get_last_n_saturdays(n: int, from_date: Optional[date] = None) -> List[date]
     if from_date is None:
         from_date = get_current_date()
 
-    saturdays = []
-    current = get_last_saturday(from_date)
-
-    for _ in range(n):
-        saturdays.append(current)
-        current = get_previous_saturday(current)
-
-    return saturdays
+    last = get_last_saturday(from_date)
+    return [last - timedelta(weeks=week) for week in range(n)]
 
 
 def format_date_with_day(date_obj: Union[str, date], language: str = "ar") -> str:
@@ -282,10 +345,9 @@ def format_date_with_day(date_obj: Union[str, date], language: str = "ar") -> st
 
     date_str = date_obj.strftime("%Y-%m-%d")
 
-    if language == "ar":
-        return f"السبت {date_str}"
-    else:
-        return f"Saturday {date_str}"
+    # Classes may meet on other days than Saturday (see Class.class_day)
+    day_name = get_translation(language, WEEKDAY_KEYS[date_obj.weekday()])
+    return f"{day_name} {date_str}"
 
 
 def get_month_name(month: int, language: str = "ar") -> str:
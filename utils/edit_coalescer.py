@@ -0,0 +1,124 @@
+# =============================================================================
+# FILE: utils/edit_coalescer.py
+# DESCRIPTION: Per-message coalescing of rapid message edits
+# LOCATION: utils/edit_coalescer.py
+# PURPOSE: Send one edit per short window instead of one per button tap
+# =============================================================================
+
+"""
+Message edit coalescer.
+
+The first edit of a message is sent right away and opens a window of
+`delay` seconds. Edits requested during the window replace each other, and
+only the latest one is sent when the window closes (which opens the next
+window). Rapid toggling therefore costs one Telegram call per window
+instead of one per tap, and the edits cannot overtake each other.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable
+
+from config import EDIT_COALESCE_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Coroutine function that performs the edit (renders the latest state)
+EditSender = Callable[[], Awaitable]
+
+
+class EditCoalescer:
+    """
+    Coalesce edits of the same message into one per window.
+
+    Usage:
+        await edit_coalescer.edit((chat_id, message_id), send)
+        await edit_coalescer.discard((chat_id, message_id))
+    """
+
+    def __init__(self, delay: float = EDIT_COALESCE_DELAY):
+        self.delay = delay
+        self.requested = 0
+        self.sent = 0
+        self._pending: Dict[Hashable, EditSender] = {}
+        self._windows: Dict[Hashable, asyncio.Task] = {}
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def edit(self, key: Hashable, send: EditSender) -> None:
+        """
+        Send an edit now, or keep it as the latest one for the open window.
+
+        Args:
+            key: Message identity, e.g. (chat_id, message_id)
+            send: Coroutine function performing the edit
+        """
+        self.requested += 1
+        if self.delay <= 0:
+            await self._send(key, send)
+            return
+
+        if key in self._windows:
+            self._pending[key] = send
+            return
+
+        self._windows[key] = asyncio.create_task(self._close_window(key))
+        await self._send(key, send)
+
+    async def discard(self, key: Hashable) -> None:
+        """
+        Drop the pending edit of a message and wait for one being sent.
+
+        Call this before editing the message some other way, so a late
+        coalesced edit cannot overwrite it.
+
+        Args:
+            key: Message identity
+        """
+        self._pending.pop(key, None)
+        window = self._windows.pop(key, None)
+        if window is not None:
+            window.cancel()
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            await asyncio.wait([in_flight])
+
+    def stats(self) -> Dict[str, int]:
+        """Return requested, sent and coalesced (skipped) edit counts."""
+        return {
+            "requested": self.requested,
+            "sent": self.sent,
+            "coalesced": self.requested - self.sent - len(self._pending),
+            "pending": len(self._pending),
+        }
+
+    async def _send(self, key: Hashable, send: EditSender) -> None:
+        """Perform an edit, tracking it so discard() can wait for it."""
+        task = asyncio.ensure_future(send())
+        self._in_flight[key] = task
+        try:
+            # Shielded: cancelling a window must not abort a started edit
+            await asyncio.shield(task)
+            self.sent += 1
+        finally:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+
+    async def _close_window(self, key: Hashable) -> None:
+        """Send the latest pending edit after each window until none is left."""
+        try:
+            while True:
+                await asyncio.sleep(self.delay)
+                send = self._pending.pop(key, None)
+                if send is None:
+                    return
+                try:
+                    await self._send(key, send)
+                except Exception as e:
+                    logger.error(f"Coalesced edit of message {key} failed: {e}")
+        finally:
+            if self._windows.get(key) is asyncio.current_task():
+                del self._windows[key]
+
+
+# Shared by all handlers that edit messages on rapid button taps
+edit_coalescer = EditCoalescer()
@@ -0,0 +1,149 @@
+# =============================================================================
+# FILE: utils/keyboards.py
+# DESCRIPTION: Prebuilt inline keyboards for static menus
+# LOCATION: utils/keyboards.py
+# PURPOSE: Render menus that only depend on role and language once (at
+#          startup) and serve the same InlineKeyboardMarkup afterwards
+# =============================================================================
+
+"""
+Keyboard cache.
+
+Menus like the main menu have no per-user content: their buttons only
+depend on the role and the language. Builders decorated with
+cached_keyboard are rendered for every role and language by
+prebuild_keyboards at startup, and again when reload_translations runs;
+serving a menu is then one dict lookup. Combinations that were not
+prebuilt are rendered on first use.
+
+InlineKeyboardMarkup objects are immutable, so sharing them between
+updates is safe. Per-user rows go on top with extend_keyboard, which
+reuses the cached buttons.
+
+Usage:
+    @cached_keyboard
+    def build_main_menu_keyboard(role: int, lang: str) -> InlineKeyboardMarkup:
+        ...
+
+    prebuild_keyboards()  # At startup, after the handlers are imported
+"""
+
+import logging
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import ROLE_DEVELOPER, ROLE_STUDENT
+from utils.translations import TRANSLATIONS, on_translations_reload
+
+logger = logging.getLogger(__name__)
+
+KeyboardBuilder = Callable[[int, str], InlineKeyboardMarkup]
+
+# Builder name -> uncached builder
+_builders: Dict[str, KeyboardBuilder] = {}
+
+# (builder name, role, lang) -> rendered markup
+_keyboards: Dict[Tuple[str, int, str], InlineKeyboardMarkup] = {}
+
+# Roles and languages of the last prebuild_keyboards call (None if never)
+_prebuilt: Optional[Tuple[Tuple[int, ...], Tuple[str, ...]]] = None
+
+
+def cached_keyboard(builder: KeyboardBuilder) -> KeyboardBuilder:
+    """
+    Cache a keyboard builder of (role, lang) and include it in
+    prebuild_keyboards.
+
+    Args:
+        builder: Function returning the markup for a role and language
+
+    Returns:
+        Wrapped builder (the uncached one is available as __wrapped__)
+    """
+    name = builder.__qualname__
+    _builders[name] = builder
+
+    @wraps(builder)
+    def wrapper(role: int, lang: str) -> InlineKeyboardMarkup:
+        key = (name, role, lang)
+        markup = _keyboards.get(key)
+        if markup is None:
+            markup = _keyboards[key] = builder(role, lang)
+        return markup
+
+    return wrapper
+
+
+def prebuild_keyboards(
+    roles: Optional[Iterable[int]] = None, languages: Optional[Iterable[str]] = None
+) -> int:
+    """
+    Render every cached keyboard for every role and language.
+
+    Args:
+        roles: Roles to render (defaults to all roles)
+        languages: Language codes to render (defaults to all translations)
+
+    Returns:
+        Number of keyboards rendered
+    """
+    global _prebuilt
+    roles = tuple(roles if roles is not None else range(ROLE_STUDENT, ROLE_DEVELOPER + 1))
+    languages = tuple(languages if languages is not None else TRANSLATIONS)
+    _prebuilt = (roles, languages)
+
+    keyboards = {
+        (name, role, lang): builder(role, lang)
+        for name, builder in _builders.items()
+        for role in roles
+        for lang in languages
+    }
+    # Render first, then swap (no await in between, so no update sees a
+    # partly built cache)
+    _keyboards.clear()
+    _keyboards.update(keyboards)
+    logger.info(f"Prebuilt {len(keyboards)} keyboards")
+    return len(keyboards)
+
+
+def extend_keyboard(
+    markup: InlineKeyboardMarkup, rows: Optional[Sequence[Sequence[InlineKeyboardButton]]]
+) -> InlineKeyboardMarkup:
+    """
+    Add per-user rows below a cached keyboard without rebuilding it.
+
+    Args:
+        markup: Cached markup
+        rows: Extra button rows (may be None or empty)
+
+    Returns:
+        New markup sharing the cached rows (markup itself if rows is empty)
+    """
+    if not rows:
+        return markup
+    return InlineKeyboardMarkup(
+        tuple(markup.inline_keyboard) + tuple(tuple(row) for row in rows)
+    )
+
+
+def clear_keyboard_cache() -> None:
+    """Drop every cached keyboard (they are rebuilt on next use)."""
+    _keyboards.clear()
+
+
+def keyboard_cache_size() -> int:
+    """Get the number of cached keyboards."""
+    return len(_keyboards)
+
+
+def _rebuild_after_reload() -> None:
+    """Render the keyboards again with the reloaded translations."""
+    if _prebuilt is None:
+        clear_keyboard_cache()
+    else:
+        prebuild_keyboards(*_prebuilt)
+
+
+on_translations_reload(_rebuild_after_reload)
@@ -0,0 +1,86 @@
+# =============================================================================
+# FILE: utils/pagination.py
+# DESCRIPTION: Pagination helpers for long lists in messages and keyboards
+# LOCATION: utils/pagination.py
+# PURPOSE: Split rosters into pages and build Previous/Next buttons
+# =============================================================================
+
+"""
+Pagination utilities.
+"""
+
+from typing import Callable, List, Tuple, Union
+
+from telegram import InlineKeyboardButton
+
+from config import STUDENTS_PER_PAGE
+from utils.translations import get_translation
+
+
+def get_page_bounds(
+    page: int, total: int, per_page: int = STUDENTS_PER_PAGE
+) -> Tuple[int, int]:
+    """
+    Clamp a page number to the available pages.
+
+    Args:
+        page: Requested page (0-based)
+        total: Total number of items
+        per_page: Items per page
+
+    Returns:
+        Tuple of (page, page_count); page_count is at least 1
+    """
+    pages = max(1, -(-total // per_page))
+    return min(max(page, 0), pages - 1), pages
+
+
+def build_page_buttons(
+    lang: str,
+    callback_prefix: Union[str, Callable[[int], str]],
+    page: int,
+    pages: int,
+) -> List[InlineKeyboardButton]:
+    """
+    Build a Previous / page / Next keyboard row.
+
+    Args:
+        lang: Language code
+        callback_prefix: Callback data prefix (the page number is appended),
+            or a function returning the callback data for a page number
+        page: Current page (0-based)
+        pages: Total number of pages
+
+    Returns:
+        List of buttons (empty if there is only one page)
+    """
+    if pages <= 1:
+        return []
+
+    def callback_data(number: int) -> str:
+        if callable(callback_prefix):
+            return callback_prefix(number)
+        return f"{callback_prefix}{number}"
+
+    buttons = []
+    if page > 0:
+        buttons.append(
+            InlineKeyboardButton(
+                "⬅️ " + get_translation(lang, "previous"),
+                callback_data=callback_data(page - 1),
+            )
+        )
+    buttons.append(
+        InlineKeyboardButton(
+            get_translation(lang, "page_of", page=page + 1, pages=pages),
+            callback_data=callback_data(page),
+        )
+    )
+    if page < pages - 1:
+        buttons.append(
+            InlineKeyboardButton(
+                get_translation(lang, "next") + " ➡️",
+                callback_data=callback_data(page + 1),
+            )
+        )
+    return buttons
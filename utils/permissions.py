@@ -9,12 +9,8 @@
 Permission system for role-based access control.
 """
 
-from functools import wraps
 from typing import Callable, Optional
 
-from telegram import Update
-from telegram.ext import ContextTypes
-
 from config import (
     AUTHORIZED_USERS,
     ROLE_DEVELOPER,
@@ -23,8 +19,7 @@ from config import (
     ROLE_STUDENT,
     ROLE_TEACHER,
 )
-from database import User, get_db
-from utils.translations import get_translation
+from database import User
 
 
 def get_user_from_db(telegram_id: int, db=None) -> Optional[User]:
@@ -40,9 +35,151 @@ def get_user_from_db(telegram_id: int, db=None) -> Optional[User]:
     """
     if db:
         return db.query(User).filter_by(telegram_id=telegram_id).first()
-    else:
-        with get_db() as new_db:
-            return new_db.query(User).filter_by(telegram_id=telegram_id).first()
+
+    # Imported here to avoid a circular import (operations import utils)
+    from database.operations import get_user_by_telegram_id
+
+    return get_user_by_telegram_id(telegram_id)
+
+
+class PermissionContext:
+    """
+    Role and class of one user, resolved once and checked without queries.
+
+    Build it once per update (see middleware.auth.get_permissions) and ask
+    it every permission question of that update.
+
+    Usage:
+        permissions = PermissionContext.load(telegram_id)
+        if permissions.can_edit_attendance(class_id):
+            ...
+    """
+
+    def __init__(
+        self,
+        telegram_id: Optional[int],
+        role: Optional[int] = None,
+        class_id: Optional[int] = None,
+        user: Optional[User] = None,
+    ):
+        self.telegram_id = telegram_id
+        self.role = role
+        self.class_id = class_id
+        self.user = user
+        # Resolved by middleware.auth.get_permissions
+        self.language = user.language_preference if user and user.language_preference else "ar"
+
+    @classmethod
+    def from_user(cls, telegram_id: int, user: Optional[User]) -> "PermissionContext":
+        """
+        Build from AUTHORIZED_USERS, falling back to an already loaded user row.
+
+        Args:
+            telegram_id: Telegram user ID
+            user: User row of telegram_id, or None
+
+        Returns:
+            PermissionContext
+        """
+        # AUTHORIZED_USERS from config takes precedence over the database
+        if telegram_id in AUTHORIZED_USERS:
+            role, class_id = AUTHORIZED_USERS[telegram_id]
+            return cls(telegram_id, role, class_id, user)
+        if user:
+            return cls(telegram_id, user.role, user.class_id, user)
+        return cls(telegram_id, user=user)
+
+    @classmethod
+    def load(cls, telegram_id: int, db=None) -> "PermissionContext":
+        """
+        Build from AUTHORIZED_USERS or one user row lookup.
+
+        Args:
+            telegram_id: Telegram user ID
+            db: Optional SQLAlchemy session object
+
+        Returns:
+            PermissionContext
+        """
+        if telegram_id in AUTHORIZED_USERS:
+            return cls.from_user(telegram_id, None)
+        return cls.from_user(telegram_id, get_user_from_db(telegram_id, db))
+
+    @property
+    def is_authorized(self) -> bool:
+        """True if the user may use the bot at all."""
+        return self.role is not None
+
+    def has_role(self, required_role: int) -> bool:
+        """True if the user has at least required_role."""
+        return self.role is not None and self.role >= required_role
+
+    def can_edit_attendance(self, class_id: Optional[int] = None) -> bool:
+        """True if the user can edit attendance (of class_id, if given)."""
+        if self.role is None or self.role == ROLE_STUDENT:
+            return False
+
+        # Teachers can only edit their own class
+        if self.role == ROLE_TEACHER:
+            return class_id is None or self.class_id == class_id
+
+        # Leaders, managers, and developers can edit all
+        return self.role >= ROLE_LEADER
+
+    def can_manage_students(self, class_id: Optional[int] = None) -> bool:
+        """True if the user can add/remove students (of class_id, if given)."""
+        # Only leaders and above can manage students
+        if self.role is None or self.role < ROLE_LEADER:
+            return False
+
+        # Leaders can only manage their own class
+        if self.role == ROLE_LEADER:
+            return class_id is None or self.class_id == class_id
+
+        # Managers and developers can manage all
+        return True
+
+    def can_change_roles(self, target_role: int) -> bool:
+        """True if the user can assign target_role."""
+        # Managers can change roles 1-3 (Student, Teacher, Leader)
+        if self.role == ROLE_MANAGER:
+            return target_role <= ROLE_LEADER
+
+        # Developers can change any role
+        return self.role == ROLE_DEVELOPER
+
+    def can_broadcast(self) -> bool:
+        """True if the user can broadcast messages."""
+        return self.has_role(ROLE_MANAGER)
+
+    def can_create_backups(self) -> bool:
+        """True if the user can create backups."""
+        return self.has_role(ROLE_MANAGER)
+
+    def can_export_logs(self) -> bool:
+        """True if the user can export logs."""
+        return self.has_role(ROLE_DEVELOPER)
+
+    def can_view_analytics(self) -> bool:
+        """True if the user can view analytics."""
+        return self.has_role(ROLE_DEVELOPER)
+
+    def can_use_mimic_mode(self) -> bool:
+        """True if the user can use mimic mode."""
+        return self.has_role(ROLE_DEVELOPER)
+
+    def can_view_student_details(self, class_id: Optional[int] = None) -> bool:
+        """True if the user can view student details (of class_id, if given)."""
+        # Students can only view their own details (handled elsewhere)
+        if self.role is None or self.role == ROLE_STUDENT:
+            return False
+
+        # Teachers can view their class
+        if self.role == ROLE_TEACHER:
+            return class_id is None or self.class_id == class_id
+
+        # Leaders and above can view all
+        return True
 
 
 def get_user_role(telegram_id: int, db=None) -> Optional[int]:
@@ -56,16 +193,7 @@ def get_user_role(telegram_id: int, db=None) -> Optional[int]:
     Returns:
         Role number (1-5) or None if not authorized
     """
-    # First check AUTHORIZED_USERS from config
-    if telegram_id in AUTHORIZED_USERS:
-        return AUTHORIZED_USERS[telegram_id][0]  # Returns role
-
-    # Then check database
-    user = get_user_from_db(telegram_id, db)
-    if user:
-        return user.role
-
-    return None
+    return PermissionContext.load(telegram_id, db).role
 
 
 def get_user_class(telegram_id: int, db=None) -> Optional[int]:
@@ -79,16 +207,11 @@ def get_user_class(telegram_id: int, db=None) -> Optional[int]:
     Returns:
         Class ID or None
     """
-    # Check config first
-    if telegram_id in AUTHORIZED_USERS:
-        return AUTHORIZED_USERS[telegram_id][1]  # Returns class_id
+    return PermissionContext.load(telegram_id, db).class_id
 
-    # Check database
-    user = get_user_from_db(telegram_id, db)
-    if user:
-        return user.class_id
 
-    return None
+# The functions below load the user once per call. Handlers that check
+# several permissions should use one PermissionContext instead.
 
 
 def is_authorized(telegram_id: int) -> bool:
@@ -101,7 +224,7 @@ def is_authorized(telegram_id: int) -> bool:
     Returns:
         True if authorized, False otherwise
     """
-    return get_user_role(telegram_id) is not None
+    return PermissionContext.load(telegram_id).is_authorized
 
 
 def has_role(telegram_id: int, required_role: int) -> bool:
@@ -115,12 +238,7 @@ def has_role(telegram_id: int, required_role: int) -> bool:
     Returns:
         True if user has required role or higher
     """
-    user_role = get_user_role(telegram_id)
-
-    if user_role is None:
-        return False
-
-    return user_role >= required_role
+    return PermissionContext.load(telegram_id).has_role(required_role)
 
 
 def can_edit_attendance(telegram_id: int, class_id: Optional[int] = None) -> bool:
@@ -134,24 +252,7 @@ def can_edit_attendance(telegram_id: int, class_id: Optional[int] = None) -> boo
     Returns:
         True if user can edit attendance
     """
-    user_role = get_user_role(telegram_id)
-
-    if user_role is None:
-        return False
-
-    # Students cannot edit attendance
-    if user_role == ROLE_STUDENT:
-        return False
-
-    # Teachers can only edit their own class
-    if user_role == ROLE_TEACHER:
-        if class_id is None:
-            return True  # Can edit if class not specified
-        user_class = get_user_class(telegram_id)
-        return user_class == class_id
-
-    # Leaders, managers, and developers can edit all
-    return user_role >= ROLE_LEADER
+    return PermissionContext.load(telegram_id).can_edit_attendance(class_id)
 
 
 def can_manage_students(telegram_id: int, class_id: Optional[int] = None) -> bool:
@@ -165,24 +266,7 @@ def can_manage_students(telegram_id: int, class_id: Optional[int] = None) -> boo
     Returns:
         True if user can manage students
     """
-    user_role = get_user_role(telegram_id)
-
-    if user_role is None:
-        return False
-
-    # Only leaders and above can manage students
-    if user_role < ROLE_LEADER:
-        return False
-
-    # Leaders can only manage their own class
-    if user_role == ROLE_LEADER:
-        if class_id is None:
-            return True
-        user_class = get_user_class(telegram_id)
-        return user_class == class_id
-
-    # Managers and developers can manage all
-    return True
+    return PermissionContext.load(telegram_id).can_manage_students(class_id)
 
 
 def can_change_roles(telegram_id: int, target_role: int) -> bool:
@@ -196,20 +280,7 @@ def can_change_roles(telegram_id: int, target_role: int) -> bool:
     Returns:
         True if user can assign this role
     """
-    user_role = get_user_role(telegram_id)
-
-    if user_role is None:
-        return False
-
-    # Managers can change roles 1-3 (Student, Teacher, Leader)
-    if user_role == ROLE_MANAGER:
-        return target_role <= ROLE_LEADER
-
-    # Developers can change any role
-    if user_role == ROLE_DEVELOPER:
-        return True
-
-    return False
+    return PermissionContext.load(telegram_id).can_change_roles(target_role)
 
 
 def can_broadcast(telegram_id: int) -> bool:
@@ -288,86 +359,41 @@ def can_view_student_details(telegram_id: int, class_id: Optional[int] = None) -
     Returns:
         True if user can view details
     """
-    user_role = get_user_role(telegram_id)
-
-    if user_role is None:
-        return False
-
-    # Students can only view their own details (handled elsewhere)
-    if user_role == ROLE_STUDENT:
-        return False
-
-    # Teachers can view their class
-    if user_role == ROLE_TEACHER:
-        if class_id is None:
-            return True
-        user_class = get_user_class(telegram_id)
-        return user_class == class_id
-
-    # Leaders and above can view all
-    return True
+    return PermissionContext.load(telegram_id).can_view_student_details(class_id)
 
 
 # Decorators for handlers
+#
+# The implementations live in middleware.auth, next to the authentication
+# stage they read from; these names are kept for existing imports.
 
 
 def require_authorization(func: Callable) -> Callable:
     """
-    Decorator to require user authorization.
+    Decorator to require user authorization (see middleware.auth.require_auth).
 
     Usage:
         @require_authorization
         async def my_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             ...
     """
+    # Imported here to avoid a circular import (middleware imports utils)
+    from middleware.auth import require_auth
 
-    @wraps(func)
-    async def wrapper(
-        update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs
-    ):
-        user_id = update.effective_user.id
-
-        if not is_authorized(user_id):
-            lang = context.user_data.get("language", "ar")
-            await update.message.reply_text(get_translation(lang, "not_authorized"))
-            return
-
-        return await func(update, context, *args, **kwargs)
-
-    return wrapper
+    return require_auth(func)
 
 
 def require_role(min_role: int):
     """
-    Decorator to require minimum role level.
+    Decorator to require minimum role level (see middleware.auth.require_role).
 
     Args:
         min_role: Minimum required role (1-5)
-
-    Usage:
-        @require_role(ROLE_TEACHER)
-        async def teacher_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-            ...
     """
+    # Imported here to avoid a circular import (middleware imports utils)
+    from middleware.auth import require_role as middleware_require_role
 
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(
-            update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs
-        ):
-            user_id = update.effective_user.id
-            user_role = get_user_role(user_id)
-
-            if user_role is None or user_role < min_role:
-                lang = context.user_data.get("language", "ar")
-                await update.message.reply_text(get_translation(lang, "no_permission"))
-                return
-
-            return await func(update, context, *args, **kwargs)
-
-        return wrapper
-
-    return decorator
+    return middleware_require_role(min_role)
 
 
 def get_user_language(telegram_id: int, db=None) -> str:
@@ -381,15 +407,16 @@ def get_user_language(telegram_id: int, db=None) -> str:
     Returns:
         Language code ('ar' or 'en')
     """
-    if db:
-        user = db.query(User).filter(User.telegram_id == telegram_id).first()
-        if user and user.language_preference:
-            return user.language_preference
-    else:
-        with get_db() as new_db:
-            user = new_db.query(User).filter(User.telegram_id == telegram_id).first()
-            if user and user.language_preference:
-                return user.language_preference
+    # Imported here to avoid a circular import (operations import utils)
+    from database.operations import get_known_language
+
+    language = get_known_language(telegram_id)
+    if language is not None:
+        return language
+
+    user = get_user_from_db(telegram_id, db)
+    if user and user.language_preference:
+        return user.language_preference
     
     return "ar"  # Default to Arabic
 
@@ -0,0 +1,205 @@
+# =============================================================================
+# FILE: utils/router.py
+# DESCRIPTION: Callback query router with per-route statistics
+# LOCATION: utils/router.py
+# PURPOSE: Route every callback query with dict lookups instead of trying
+#          one regex CallbackQueryHandler after another
+# =============================================================================
+
+"""
+Callback query router.
+
+All callback queries go through one CallbackQueryHandler. The router finds
+the route by callback data:
+
+1. An exact route ("teacher_class_stats") is one dict lookup.
+2. Otherwise the longest matching prefix route ("teacher_bulk_confirm_"
+   before "teacher_bulk_") is found with one dict lookup per distinct
+   prefix length, however many routes there are.
+
+Registration order therefore no longer matters, and a broad prefix such as
+"menu_" cannot shadow a more specific route.
+
+Usage:
+    callback_router.add("teacher_class_stats", view_class_statistics)
+    callback_router.add_prefix("teacher_class_details_", view_class_details)
+    application.add_handler(callback_router.create_handler())
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ContextTypes
+
+logger = logging.getLogger(__name__)
+
+
+class Route:
+    """A callback handler and the name its statistics are kept under."""
+
+    def __init__(self, name: str, handler: Callable, label: Optional[Callable] = None):
+        self.name = name
+        self.handler = handler
+        # Optional function of the callback data giving a finer stats name
+        self.label = label
+
+
+class RouteStats:
+    """Hit count and timings of one route."""
+
+    def __init__(self):
+        self.hits = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed: float, failed: bool) -> None:
+        self.hits += 1
+        self.errors += failed
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+
+class CallbackRouter:
+    """
+    Route callback queries by exact data or longest prefix.
+
+    Usage:
+        callback_router.add("back_main", back_to_main_menu)
+        callback_router.add_prefix("lang_", language_callback)
+    """
+
+    def __init__(self):
+        self._exact: Dict[str, Route] = {}
+        self._prefixes: Dict[str, Route] = {}
+        # Distinct prefix lengths, longest first
+        self._prefix_lengths: List[int] = []
+        self._stats: Dict[str, RouteStats] = {}
+
+    # -------------------------------------------------------------------------
+    # Registration
+    # -------------------------------------------------------------------------
+
+    def add(self, data: str, handler: Callable) -> None:
+        """
+        Route callback data that equals data exactly.
+
+        Args:
+            data: Callback data
+            handler: Async callback handler
+        """
+        self._register(self._exact, data, Route(data, handler))
+
+    def add_prefix(self, prefix: str, handler: Callable, label: Optional[Callable] = None) -> None:
+        """
+        Route callback data starting with prefix (unless a longer prefix or
+        an exact route matches).
+
+        Args:
+            prefix: Callback data prefix
+            handler: Async callback handler
+            label: Optional function of the callback data returning the name
+                to keep statistics under (defaults to the prefix)
+        """
+        self._register(self._prefixes, prefix, Route(prefix + "*", handler, label))
+        if len(prefix) not in self._prefix_lengths:
+            self._prefix_lengths.append(len(prefix))
+            self._prefix_lengths.sort(reverse=True)
+
+    @staticmethod
+    def _register(routes: Dict[str, Route], key: str, route: Route) -> None:
+        existing = routes.get(key)
+        if existing is not None and existing.handler is not route.handler:
+            raise ValueError(
+                f"Callback route {route.name!r} is already handled by "
+                f"{existing.handler.__name__}"
+            )
+        routes[key] = route
+
+    # -------------------------------------------------------------------------
+    # Dispatch
+    # -------------------------------------------------------------------------
+
+    def resolve(self, data: str) -> Optional[Route]:
+        """
+        Find the route for callback data.
+
+        Args:
+            data: Callback data
+
+        Returns:
+            Matching route or None
+        """
+        route = self._exact.get(data)
+        if route is not None:
+            return route
+        for length in self._prefix_lengths:
+            if length <= len(data):
+                route = self._prefixes.get(data[:length])
+                if route is not None:
+                    return route
+        return None
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Call the handler of the callback query's route and time it."""
+        query = update.callback_query
+        data = query.data or ""
+        route = self.resolve(data)
+        if route is None:
+            logger.warning(f"No callback route for {data!r}")
+            await query.answer()
+            return
+
+        name = route.name
+        if route.label is not None:
+            name = route.label(data) or name
+        failed = True
+        started = time.perf_counter()
+        try:
+            result = await route.handler(update, context)
+            failed = False
+            return result
+        finally:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = RouteStats()
+            stats.record(time.perf_counter() - started, failed)
+
+    def create_handler(self) -> CallbackQueryHandler:
+        """Create the one CallbackQueryHandler for all routed callbacks."""
+        return CallbackQueryHandler(self.dispatch)
+
+    # -------------------------------------------------------------------------
+    # Statistics
+    # -------------------------------------------------------------------------
+
+    def stats(self) -> List[Dict]:
+        """
+        Get per-route statistics, busiest (by total time) first.
+
+        Returns:
+            List of dicts with route, hits, errors, avg_ms, max_ms, total_ms
+        """
+        rows = [
+            {
+                "route": name,
+                "hits": stats.hits,
+                "errors": stats.errors,
+                "avg_ms": stats.total_time / stats.hits * 1000,
+                "max_ms": stats.max_time * 1000,
+                "total_ms": stats.total_time * 1000,
+            }
+            for name, stats in self._stats.items()
+        ]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def reset_stats(self) -> None:
+        """Clear the per-route statistics."""
+        self._stats.clear()
+
+
+# Shared router for all callback handlers
+callback_router = CallbackRouter()
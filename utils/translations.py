@@ -9,7 +9,9 @@
 Translation system for Arabic/English bilingual support.
 """
 
-from typing import Dict, Any
+from typing import Callable, Dict, List
+
+from config import DEFAULT_LANGUAGE
 
 
 # Complete translation dictionary
@@ -22,6 +24,9 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'cancel': 'Cancel',
         'back': 'Back',
         'next': 'Next',
+        'previous': 'Previous',
+        'page_of': 'Page {page}/{pages}',
+        'button_expired': 'This button has expired. Please open the menu again.',
         'save': 'Save',
         'delete': 'Delete',
         'edit': 'Edit',
@@ -141,6 +146,8 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'mark_all_present': 'Mark All Present',
         'mark_all_absent': 'Mark All Absent',
         'attendance_saved': 'Attendance saved successfully!',
+        'attendance_save_failed': 'Attendance could not be saved. Your marks are kept, please try again.',
+        'retry': 'Try Again',
         'attendance_for': 'Attendance for',
         
         # Attendance Button Emojis
@@ -155,6 +162,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'travel': 'Travel',
         'excused': 'Excused',
         'custom': 'Custom',
+        'other_reasons': 'Other reasons',
         'select_reason': 'Select Reason',
         'enter_custom_reason': 'Enter absence reason (max 100 characters):',
         
@@ -169,6 +177,11 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'btn_last_saturday': '⏮️ Last Saturday',
         'btn_this_saturday': '📍 This Saturday',
         'btn_next_saturday': '⏭️ Next Saturday',
+        'select_class_date': 'Select a class date',
+        'last_class': 'Last class',
+        'btn_last_class': '⏮️ Last class',
+        'btn_today_class': '📍 Today\'s class',
+        'btn_next_class': '⏭️ Next class',
         'btn_choose_date': '📅 Choose Date',
         
         # Statistics
@@ -224,7 +237,12 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'error_occurred': 'An error occurred. Please try again later.',
         'no_permission': 'You don\'t have permission to perform this action.',
         'not_saturday': 'No class today. Next class: Saturday {date}',
+        'not_class_day': 'Your class does not meet on this date. Please choose a class date.',
+        'no_recent_class': 'This class has not met yet.',
         'invalid_date_format': 'Invalid date format. Please use: YYYY-MM-DD',
+        'class_skipped': 'No class on this date (holiday or cancelled session).',
+        'invalid_class_day': 'Invalid class day.',
+        'skip_date_not_found': 'This date is not cancelled.',
         'session_expired': 'Session expired. Press /start to log in again.',
         'rate_limit': 'Too many requests. Please wait 30 seconds.',
         'user_not_found': 'User not found.',
@@ -320,6 +338,9 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'cancel': 'إلغاء',
         'back': 'رجوع',
         'next': 'التالي',
+        'previous': 'السابق',
+        'page_of': 'صفحة {page}/{pages}',
+        'button_expired': 'انتهت صلاحية هذا الزر. يرجى فتح القائمة مرة أخرى.',
         'save': 'حفظ',
         'delete': 'حذف',
         'edit': 'تعديل',
@@ -439,6 +460,8 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'mark_all_present': 'تحديد الكل حاضر',
         'mark_all_absent': 'تحديد الكل غائب',
         'attendance_saved': 'تم حفظ الحضور بنجاح!',
+        'attendance_save_failed': 'تعذّر حفظ الحضور. تم الاحتفاظ بتحديداتك، يرجى المحاولة مرة أخرى.',
+        'retry': 'إعادة المحاولة',
         'attendance_for': 'الحضور لـ',
         
         # Attendance Button Emojis
@@ -453,6 +476,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'travel': 'سفر',
         'excused': 'معذور',
         'custom': 'سبب آخر',
+        'other_reasons': 'أسباب أخرى',
         'select_reason': 'اختر السبب',
         'enter_custom_reason': 'أدخل سبب الغياب (حد أقصى 100 حرف):',
         
@@ -467,6 +491,11 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'btn_last_saturday': '⏮️ السبت الماضي',
         'btn_this_saturday': '📍 هذا السبت',
         'btn_next_saturday': '⏭️ السبت القادم',
+        'select_class_date': 'اختر تاريخ الفصل',
+        'last_class': 'الفصل الماضي',
+        'btn_last_class': '⏮️ الفصل الماضي',
+        'btn_today_class': '📍 فصل اليوم',
+        'btn_next_class': '⏭️ الفصل القادم',
         'btn_choose_date': '📅 اختر التاريخ',
         
         # Statistics
@@ -522,7 +551,12 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'error_occurred': 'حدث خطأ. يرجى المحاولة مرة أخرى لاحقاً.',
         'no_permission': 'ليس لديك صلاحية لتنفيذ هذا الإجراء.',
         'not_saturday': 'لا يوجد فصل اليوم. الفصل القادم: السبت {date}',
+        'not_class_day': 'لا يوجد فصل في هذا التاريخ. يرجى اختيار تاريخ فصل.',
+        'no_recent_class': 'لم يُعقد هذا الفصل بعد.',
         'invalid_date_format': 'صيغة التاريخ خاطئة. يرجى استخدام: سنة-شهر-يوم',
+        'class_skipped': 'لا يوجد فصل في هذا التاريخ (إجازة أو جلسة ملغاة).',
+        'invalid_class_day': 'يوم الفصل غير صحيح.',
+        'skip_date_not_found': 'هذا التاريخ غير ملغى.',
         'session_expired': 'انتهت الجلسة. اضغط /start لتسجيل الدخول مرة أخرى.',
         'rate_limit': 'طلبات كثيرة جداً. يرجى الانتظار 30 ثانية.',
         'user_not_found': 'المستخدم غير موجود.',
@@ -612,6 +646,26 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
 }
 
 
+# Called after reload_translations (e.g. to drop cached keyboards)
+_reload_callbacks: List[Callable[[], None]] = []
+
+
+def on_translations_reload(callback: Callable[[], None]) -> None:
+    """
+    Call callback whenever reload_translations runs.
+
+    Args:
+        callback: Function without arguments
+    """
+    _reload_callbacks.append(callback)
+
+
+def reload_translations() -> None:
+    """Drop anything rendered from the old texts after TRANSLATIONS changed."""
+    for callback in _reload_callbacks:
+        callback()
+
+
 def get_translation(lang: str, key: str, **kwargs) -> str:
     """
     Get translated string with optional formatting.
@@ -625,11 +679,11 @@ def get_translation(lang: str, key: str, **kwargs) -> str:
         Translated string
     """
     # Default to Arabic if invalid language
-    if lang not in ['ar', 'en']:
-        lang = 'ar'
+    if lang not in TRANSLATIONS:
+        lang = DEFAULT_LANGUAGE
     
     # Get translation
-    text = TRANSLATIONS.get(lang, TRANSLATIONS['ar']).get(key, key)
+    text = TRANSLATIONS[lang].get(key, key)
     
     # Apply formatting if kwargs provided
     if kwargs:
@@ -691,10 +745,11 @@ def format_date_display(date_str: str, lang: str = 'ar') -> str:
     try:
         date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
         
-        if lang == 'ar':
-            return f"السبت {date_str}"
-        else:
-            return f"Saturday {date_str}"
+        # Classes may meet on other days than Saturday (see Class.class_day)
+        day_key = (
+            'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'
+        )[date_obj.weekday()]
+        return f"{get_translation(lang, day_key)} {date_str}"
     except ValueError:
         return date_str
 